@@ -0,0 +1,64 @@
+import statistics
+import time
+from io import BytesIO
+
+from api.v1.parsers import JSONParser, MessagePackParser
+from api.v1.renderers import JSONRenderer, MessagePackRenderer
+from django.core.management import BaseCommand
+from django.test import Client, override_settings
+from rest_framework import parsers, renderers
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark encoding and decoding a page of books with DRF's "
+        "stdlib JSON, the orjson JSON renderer and MessagePack"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=1000)
+        parser.add_argument(
+            "--paths",
+            nargs="+",
+            default=["/api/v1/books/", "/api/v1/books/?expand=authors,publisher"],
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        formats = [
+            ("json (stdlib)", renderers.JSONRenderer(), parsers.JSONParser()),
+            ("json (orjson)", JSONRenderer(), JSONParser()),
+            ("msgpack", MessagePackRenderer(), MessagePackParser()),
+        ]
+        self.stdout.write(
+            f"{'path':<42} {'format':<14} {'bytes':>10} {'encode ms':>10} "
+            f"{'decode ms':>10}"
+        )
+        for path in options["paths"]:
+            data = self._page(path, options["page_size"])
+            for label, renderer, parser in formats:
+                body = renderer.render(data)
+                encode = self._time(lambda: renderer.render(data), options["repeat"])
+                decode = self._time(
+                    lambda: parser.parse(BytesIO(body)), options["repeat"]
+                )
+                self.stdout.write(
+                    f"{path:<42} {label:<14} {len(body):>10,} "
+                    f"{encode * 1000:>10.2f} {decode * 1000:>10.2f}"
+                )
+
+    @staticmethod
+    def _page(path, size):
+        """The data of one API page of ``size`` rows, before rendering"""
+        separator = "&" if "?" in path else "?"
+        with override_settings(API_MAX_PAGE_SIZE=size):
+            return Client().get(f"{path}{separator}limit={size}").data
+
+    @staticmethod
+    def _time(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
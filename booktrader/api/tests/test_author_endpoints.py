@@ -68,8 +68,8 @@ class TestAuthorEndpoints(APITestCase):
         response = self.client.get(self.list_url)
 
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == expected_authors  # type: ignore
+        assert len(response.data["results"]) == expected_authors  # type: ignore
         # type: ignore on next line for pylance response.data issue
-        response_data = response.data  # type: ignore
+        response_data = response.data["results"]  # type: ignore
         for author, response_item in zip(Author.objects.all(), response_data):
             assert response_item["pk"] == author.pk
@@ -0,0 +1,141 @@
+# encoding: utf-8
+import datetime
+import os
+import tempfile
+from io import StringIO
+
+from books.models import Author, Book, Publisher, Rating
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class TestConditionalRequests(APITestCase):
+    def setUp(self):
+        self.publisher = Publisher.objects.create(name="Del Rey")
+        self.author = Author.objects.create(name="Frank Herbert")
+        self.book = Book.objects.create(
+            title="Dune", isbn="9780441013593", publisher=self.publisher
+        )
+        self.book.authors.add(self.author)
+        self.user = User.objects.create_user("reader")
+        self.detail_url = reverse("book-detail", kwargs={"pk": self.book.pk})
+        self.list_url = reverse("book-list")
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response["ETag"],
+            HTTP_IF_MODIFIED_SINCE=response.get("Last-Modified", ""),
+        )
+
+    def test_detail_not_modified(self):
+        """The 304 is answered from the row's timestamps alone"""
+        response = self.client.get(self.detail_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.has_header("Last-Modified")
+
+        with self.assertNumQueries(1):
+            revalidated = self.revalidate(self.detail_url, response)
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+        assert revalidated["ETag"] == response["ETag"]
+        assert not revalidated.content
+
+    def test_if_modified_since(self):
+        self.client.get(self.detail_url)
+        later = http_date((timezone.now() + datetime.timedelta(hours=1)).timestamp())
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=later)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        earlier = http_date((timezone.now() - datetime.timedelta(hours=1)).timestamp())
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=earlier)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_detail_changes_with_ratings_and_authors(self):
+        response = self.client.get(self.detail_url)
+        Rating.objects.create(book=self.book, user=self.user, rating=4)
+        rated = self.revalidate(self.detail_url, response)
+        assert rated.status_code == status.HTTP_200_OK
+        assert rated.data["rating_count"] == 1  # type: ignore
+
+        self.author.books.clear()
+        unlinked = self.revalidate(self.detail_url, rated)
+        assert unlinked.status_code == status.HTTP_200_OK
+        assert unlinked.data["authors"] == []  # type: ignore
+
+    def test_contributor_stats_change_validators(self):
+        for url in (
+            reverse("author-detail", kwargs={"pk": self.author.pk}),
+            reverse("publisher-detail", kwargs={"pk": self.publisher.pk}),
+        ):
+            response = self.client.get(url)
+            assert self.revalidate(url, response).status_code == 304
+            rating = Rating.objects.create(book=self.book, user=self.user, rating=3)
+            assert self.revalidate(url, response).status_code == 200
+            rating.delete()
+
+    def test_list_not_modified_until_catalog_changes(self):
+        response = self.client.get(self.list_url)
+        assert not response.has_header("Last-Modified")
+        with self.assertNumQueries(0):
+            revalidated = self.revalidate(self.list_url, response)
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+        filtered = self.client.get(self.list_url, {"ordering": "name"})
+        assert filtered["ETag"] != response["ETag"]
+
+        self.book.delete()
+        assert self.revalidate(self.list_url, response).status_code == 200
+
+    def test_expanded_detail_changes_with_nested_rows(self):
+        params = {"expand": "authors,publisher"}
+        response = self.client.get(self.detail_url, params)
+        assert not response.has_header("Last-Modified")
+        revalidated = self.client.get(
+            self.detail_url, params, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+        self.author.name = "Frank Patrick Herbert"
+        self.author.save()
+        renamed = self.client.get(
+            self.detail_url, params, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        assert renamed.status_code == status.HTTP_200_OK
+        assert renamed.data["authors"][0]["name"] == "Frank Patrick Herbert"
+
+    def test_list_etags_follow_management_commands(self):
+        """Writers outside the web process bump the shared version counters"""
+        urls = [
+            self.list_url,
+            f"{reverse('book-by-isbn')}?isbn={self.book.isbn}",
+            reverse("author-list"),
+        ]
+        path = os.path.join(tempfile.mkdtemp(), "catalog.csv")
+        self.addCleanup(os.remove, path)
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write("isbn,title,publisher,authors\n")
+            stream.write("9780441013593,Dune,Del Rey,Frank Herbert\n")
+
+        for command, *args in (
+            ("import_catalog", path),
+            ("generate_random_ratings", "--seed", "1"),
+        ):
+            responses = [self.client.get(url) for url in urls]
+            call_command(command, *args, stdout=StringIO(), stderr=StringIO())
+            for url, response in zip(urls, responses):
+                assert self.revalidate(url, response).status_code == 200, command
+
+    def test_representations_have_their_own_etags(self):
+        json = self.client.get(self.detail_url, HTTP_ACCEPT="application/json")
+        html = self.client.get(self.detail_url, HTTP_ACCEPT="text/html")
+        assert json["ETag"] != html["ETag"]
+
+    def test_missing_book(self):
+        url = reverse("book-detail", kwargs={"pk": self.book.pk + 1})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not response.has_header("ETag")
@@ -0,0 +1,161 @@
+# encoding: utf-8
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from api.v1.export import DATASETS, parse_since
+from auctions.models import Auction, Bid
+from books.models import Author, Book, Publisher, Rating
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class TestExport(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user("reader")
+        ace = Publisher.objects.create(name="Ace")
+        herbert = Author.objects.create(name="Frank Herbert")
+        anderson = Author.objects.create(name="Kevin J. Anderson")
+        self.books = []
+        for i in range(5):
+            book = Book.objects.create(
+                title=f"Dune {i}",
+                isbn=f"isbn-{i}",
+                publisher=ace,
+                original_price="9.99" if i % 2 else None,
+            )
+            book.authors.add(herbert, *([anderson] if i % 2 else []))
+            self.books.append(book)
+        Rating.objects.create(book=self.books[0], user=self.reader, rating=4)
+        for status_ in ("draft", "active"):
+            auction = Auction.objects.create(
+                title=f"Dune, {status_}",
+                book=self.books[0],
+                seller=self.reader,
+                condition="good",
+                starting_price=Decimal("5.00"),
+                reserve_price=Decimal("50.00"),
+                end_time=timezone.now() + timedelta(days=7),
+                status=status_,
+            )
+        Bid.objects.create(
+            auction=auction,
+            bidder=self.reader,
+            amount=Decimal("6.00"),
+            max_bid_amount=Decimal("40.00"),
+        )
+
+    def export(self, dataset, **params):
+        response = self.client.get(reverse("export", args=[dataset]), params)
+        assert response.status_code == status.HTTP_200_OK
+        return response, b"".join(response.streaming_content).decode()
+
+    def ndjson(self, dataset, **params):
+        response, body = self.export(dataset, **params)
+        return response, [json.loads(line) for line in body.splitlines()]
+
+    def test_books_ndjson(self):
+        response, rows = self.ndjson("books")
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert response["X-Accel-Buffering"] == "no"
+        assert [row["title"] for row in rows] == [f"Dune {i}" for i in range(5)]
+        assert rows[0]["publisher"] == "Ace"
+        assert rows[0]["original_price"] is None
+        assert rows[1]["original_price"] == "9.99"
+        assert rows[0]["authors"] == ["Frank Herbert"]
+        assert rows[1]["authors"] == ["Frank Herbert", "Kevin J. Anderson"]
+        assert rows[0]["rating_count"] == 1
+
+    def test_csv(self):
+        response, body = self.export("books", format="csv")
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        assert 'filename="books.csv"' in response["Content-Disposition"]
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert len(rows) == 5
+        assert rows[1]["authors"] == "Frank Herbert|Kevin J. Anderson"
+        assert rows[0]["original_price"] == ""
+        assert rows[1]["original_price"] == "9.99"
+
+        response = self.client.get(
+            reverse("export", args=["bids"]), HTTP_ACCEPT="text/csv"
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert lines[0] == "id,auction_id,bidder_id,amount,is_auto_bid,timestamp"
+        assert lines[1].split(",")[3:5] == ["6.00", "false"]
+
+    def test_private_fields(self):
+        _, auctions = self.ndjson("auctions")
+        assert [auction["status"] for auction in auctions] == ["active"]
+        assert "reserve_price" not in auctions[0]
+        _, bids = self.ndjson("bids")
+        assert bids[0]["amount"] == "6.00"
+        assert "max_bid_amount" not in bids[0]
+
+    @override_settings(API_EXPORT_OVERLAP=0)
+    def test_since(self):
+        response, rows = self.ndjson("ratings")
+        assert len(rows) == 1
+        since = response["X-Export-Until"]
+        assert self.ndjson("ratings", since=since)[1] == []
+        assert self.ndjson("books", since=since)[1] == []
+
+        Rating.objects.create(book=self.books[3], user=self.reader, rating=2)
+        _, ratings = self.ndjson("ratings", since=since)
+        assert [rating["book_id"] for rating in ratings] == [self.books[3].pk]
+        # A new rating changes the book's aggregates, not its updated_at
+        _, books = self.ndjson("books", since=since)
+        assert [book["id"] for book in books] == [self.books[3].pk]
+
+        assert len(self.ndjson("ratings", since="2000-01-01")[1]) == 2
+
+    def test_since_overlap(self):
+        response, _ = self.ndjson("ratings")
+        since = response["X-Export-Until"]
+        # Saved before that export started but committed after it
+        late = Rating.objects.create(book=self.books[3], user=self.reader, rating=2)
+        Rating.objects.filter(pk=late.pk).update(
+            updated_at=parse_since(since) - timedelta(seconds=1)
+        )
+        _, ratings = self.ndjson("ratings", since=since)
+        assert late.pk in [rating["id"] for rating in ratings]
+        with self.settings(API_EXPORT_OVERLAP=0):
+            assert self.ndjson("ratings", since=since)[1] == []
+
+    def test_chunks(self):
+        until = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(DATASETS["books"].chunks(None, until, chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        # One query for the books and one for their authors per chunk
+        assert len(queries.captured_queries) == 6
+        ids = [row["id"] for chunk in chunks for row in chunk]
+        assert ids == [book.pk for book in self.books]
+
+    async def test_asgi(self):
+        response = await self.async_client.get(reverse("export", args=["books"]))
+        assert response.status_code == status.HTTP_200_OK
+        # An async iterator is sent chunk by chunk instead of read whole first
+        assert response.is_async
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        assert len(body.decode().splitlines()) == 5
+
+    def test_errors(self):
+        response = self.client.get(reverse("export", args=["users"]))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = self.client.get(
+            reverse("export", args=["ratings"]), {"since": "yesterday"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert json.loads(response.content)["since"]
+        response = self.client.get(
+            reverse("export", args=["ratings"]), HTTP_ACCEPT="application/xml"
+        )
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
@@ -0,0 +1,107 @@
+# encoding: utf-8
+from books.models import Author, Book, Publisher
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class TestSparseFieldsets(APITestCase):
+    def setUp(self):
+        self.publisher = Publisher.objects.create(name="Ace")
+        self.herbert = Author.objects.create(name="Frank Herbert")
+        self.le_guin = Author.objects.create(name="Ursula K. Le Guin")
+        self.dune = Book.objects.create(
+            title="Dune",
+            isbn="9780441013593",
+            publisher=self.publisher,
+            description="Spice.",
+        )
+        self.dune.authors.add(self.herbert, self.le_guin)
+        self.list_url = reverse("book-list")
+
+    def add_books(self, count):
+        for i in range(count):
+            book = Book.objects.create(
+                title=f"Book {i}", isbn=f"isbn-{i}", publisher=self.publisher
+            )
+            book.authors.add(self.herbert)
+
+    def test_fields(self):
+        response = self.client.get(self.list_url, {"fields": "title,isbn,bogus"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == [  # type: ignore
+            {"title": "Dune", "isbn": "9780441013593"}
+        ]
+        # Unknown names alone leave the full representation
+        response = self.client.get(self.list_url, {"fields": "bogus"})
+        assert "description" in response.data["results"][0]  # type: ignore
+
+    def test_only_requested_columns_are_read(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.list_url, {"fields": "title"})
+        book_query = queries.captured_queries[0]["sql"]
+        assert '"title"' in book_query
+        assert '"description"' not in book_query
+        # No author pks requested, so no prefetch
+        assert len(queries.captured_queries) == 1
+
+    def test_expand(self):
+        response = self.client.get(
+            self.list_url, {"fields": "title,authors,publisher", "expand": "authors"}
+        )
+        book = response.data["results"][0]  # type: ignore
+        assert [author["name"] for author in book["authors"]] == [
+            "Frank Herbert",
+            "Ursula K. Le Guin",
+        ]
+        assert book["publisher"] == self.publisher.pk
+
+        response = self.client.get(
+            reverse("book-detail", kwargs={"pk": self.dune.pk}),
+            {"expand": "publisher"},
+        )
+        assert response.data["publisher"]["name"] == "Ace"  # type: ignore
+        assert response.data["authors"] == [  # type: ignore
+            self.herbert.pk,
+            self.le_guin.pk,
+        ]
+
+    def test_query_count_is_constant(self):
+        params = {"expand": "authors,publisher"}
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.list_url, params)
+        self.add_books(20)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.list_url, params)
+        assert len(response.data["results"]) == 21  # type: ignore
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    def test_detail_etag_varies(self):
+        url = reverse("book-detail", kwargs={"pk": self.dune.pk})
+        full = self.client.get(url)
+        sparse = self.client.get(url, {"fields": "title"})
+        assert full["ETag"] != sparse["ETag"]
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=sparse["ETag"])
+        assert revalidated.status_code == status.HTTP_200_OK
+
+    def test_writes_use_the_full_serializer(self):
+        url = reverse("book-detail", kwargs={"pk": self.dune.pk})
+        response = self.client.patch(
+            f"{url}?fields=title&expand=authors", {"description": "Sand."}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["description"] == "Sand."  # type: ignore
+        assert response.data["authors"] == [  # type: ignore
+            self.herbert.pk,
+            self.le_guin.pk,
+        ]
+
+    def test_by_isbn(self):
+        response = self.client.get(
+            reverse("book-by-isbn"), {"isbn": "0441013597", "fields": "title"}
+        )
+        assert response.data["results"] == [  # type: ignore
+            {"isbn": "0441013597", "isbn13": "9780441013593", "book": {"title": "Dune"}}
+        ]
@@ -0,0 +1,78 @@
+# encoding: utf-8
+from api.v1.views import MAX_ISBN_LOOKUPS
+from books.models import Author, Book, Publisher
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class TestISBNLookup(APITestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Ace")
+        author = Author.objects.create(name="Frank Herbert")
+        self.dune = Book.objects.create(
+            title="Dune", isbn="0441013597", publisher=publisher
+        )
+        self.dune.authors.add(author)
+        self.left_hand = Book.objects.create(
+            title="The Left Hand of Darkness", isbn="9780441478125", publisher=publisher
+        )
+        self.url = reverse("book-by-isbn")
+
+    def test_resolves_any_spelling(self):
+        with self.assertNumQueries(2):  # the IN lookup, then the books' authors
+            response = self.client.get(
+                self.url,
+                {"isbn": ["978-0-441-01359-3,0441478123", "9780000000002", "junk"]},
+            )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["found"] == 2  # type: ignore
+        results = response.data["results"]  # type: ignore
+        assert [result["isbn"] for result in results] == [
+            "978-0-441-01359-3",
+            "0441478123",
+            "9780000000002",
+            "junk",
+        ]
+        assert results[0]["isbn13"] == "9780441013593"
+        assert results[0]["book"]["pk"] == self.dune.pk
+        assert results[0]["book"]["authors"] == [self.dune.authors.get().pk]
+        assert results[1]["book"]["title"] == "The Left Hand of Darkness"
+        assert results[2]["book"] is None
+        assert results[3] == {"isbn": "junk", "isbn13": None, "book": None}
+
+    def test_post_body(self):
+        response = self.client.post(
+            self.url, {"isbn": ["0441013597", "9780441478125"]}, format="json"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["found"] == 2  # type: ignore
+
+    def test_revalidation(self):
+        response = self.client.get(self.url, {"isbn": "0441013597"})
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(
+                self.url, {"isbn": "0441013597"}, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_limits(self):
+        response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        too_many = ",".join(["0441013597"] * (MAX_ISBN_LOOKUPS + 1))
+        response = self.client.get(self.url, {"isbn": too_many})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_conflicting_spelling_is_rejected(self):
+        response = self.client.post(
+            reverse("book-list"),
+            {
+                "title": "Dune",
+                "isbn": "978-0-441-01359-3",
+                "publisher": self.dune.publisher_id,
+                "authors": [],
+            },
+            format="json",
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "isbn" in response.data  # type: ignore
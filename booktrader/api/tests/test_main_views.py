@@ -21,8 +21,9 @@ class TestUserViewSet(APITestCase):
         """Test GET /api/users/ returns user list"""
         response = self.client.get(self.list_url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1  # type: ignore
-        assert response.data[0]["username"] == self.user.username  # type: ignore
+        results = response.data["results"]  # type: ignore
+        assert len(results) == 1
+        assert results[0]["username"] == self.user.username
 
     def test_user_detail(self):
         """Test GET /api/users/{id}/ returns user details"""
@@ -90,7 +91,7 @@ class TestBookViewSet(APITestCase):
         response = self.client.get(self.list_url)
         assert response.status_code == status.HTTP_200_OK
 
-        books = response.data  # type: ignore
+        books = response.data["results"]  # type: ignore
         assert len(books) == 2
         # Should be ordered by average_rating descending
         assert float(books[0]["average_rating"]) == 4.5  # book2 first
@@ -120,7 +121,7 @@ class TestBookViewSet(APITestCase):
         assert new_book.average_rating == Decimal("0.0")
 
     def test_book_create_with_rating(self):
-        """Test POST /api/books/ creates book with provided rating"""
+        """Test POST /api/books/ ignores a provided rating"""
         data = {
             "title": "New Book with Rating",
             "isbn": "4444444444444",
@@ -132,9 +133,9 @@ class TestBookViewSet(APITestCase):
         response = self.client.post(self.list_url, data=data)
         assert response.status_code == status.HTTP_201_CREATED
 
-        # Should keep the provided rating
+        # The rating columns are maintained from the ratings only
         new_book = Book.objects.get(isbn="4444444444444")
-        assert new_book.average_rating == Decimal("2.5")
+        assert new_book.average_rating == Decimal("0.0")
 
     def test_book_update(self):
         """Test PUT /api/books/{id}/ updates book"""
@@ -183,7 +184,7 @@ class TestRatingViewSet(APITestCase):
         """Test GET /api/ratings/ returns rating list"""
         response = self.client.get(self.list_url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1  # type: ignore
+        assert len(response.data["results"]) == 1  # type: ignore
 
     def test_rating_detail(self):
         """Test GET /api/ratings/{id}/ returns rating details"""
@@ -276,7 +277,7 @@ class TestAuthorViewSet(APITestCase):
         """Test GET /api/authors/ returns author list"""
         response = self.client.get(self.list_url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1  # type: ignore
+        assert len(response.data["results"]) == 1  # type: ignore
 
     def test_author_detail(self):
         """Test GET /api/authors/{id}/ returns author details"""
@@ -316,7 +317,7 @@ class TestPublisherViewSet(APITestCase):
         """Test GET /api/publishers/ returns publisher list"""
         response = self.client.get(self.list_url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1  # type: ignore
+        assert len(response.data["results"]) == 1  # type: ignore
 
     def test_publisher_detail(self):
         """Test GET /api/publishers/{id}/ returns publisher details"""
@@ -0,0 +1,89 @@
+# encoding: utf-8
+import datetime
+from decimal import Decimal
+
+from books.models import Author, Book, Publisher, Rating
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class TestCursorPagination(APITestCase):
+    def setUp(self):
+        self.publisher = Publisher.objects.create(name="Ace")
+        # Ties on average_rating must not skip or repeat books across pages
+        self.books = [
+            Book.objects.create(
+                title=f"Book {i}",
+                isbn=f"isbn-{i}",
+                publisher=self.publisher,
+                average_rating=Decimal(i % 3),
+            )
+            for i in range(7)
+        ]
+
+    def walk(self, url, **params):
+        """pks on every page from ``url``, following ``next`` links"""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            pages.append([item["pk"] for item in response.data["results"]])
+            if response.data["next"] is None:
+                return pages, response
+            response = self.client.get(response.data["next"])
+
+    def test_books_by_rating(self):
+        pages, last = self.walk(reverse("book-list"), limit=3)
+        assert [len(page) for page in pages] == [3, 3, 1]
+        expected = sorted(self.books, key=lambda book: (-book.average_rating, book.pk))
+        assert sum(pages, []) == [book.pk for book in expected]
+        assert "count" not in last.data
+
+        previous = self.client.get(last.data["previous"])
+        assert [item["pk"] for item in previous.data["results"]] == pages[1]
+
+    def test_ratings_newest_first(self):
+        book = self.books[0]
+        ratings = [
+            Rating.objects.create(
+                book=book, user=User.objects.create_user(f"reader{i}"), rating=4
+            )
+            for i in range(5)
+        ]
+        pages, _ = self.walk(reverse("rating-list"), limit=2)
+        assert sum(pages, []) == [rating.pk for rating in reversed(ratings)]
+
+    @override_settings(API_MAX_PAGE_SIZE=4)
+    def test_page_size_cap(self):
+        response = self.client.get(reverse("book-list"), {"limit": 1000})
+        assert len(response.data["results"]) == 4
+        response = self.client.get(reverse("book-list"), {"limit": "many"})
+        assert len(response.data["results"]) == 7
+
+    def test_estimated_count(self):
+        response = self.client.get(
+            reverse("book-list"), {"limit": 2, "count": "estimated"}
+        )
+        assert response.data["count"] == 7
+        assert len(response.data["results"]) == 2
+
+    def test_invalid_cursor_starts_over(self):
+        response = self.client.get(reverse("book-list"), {"cursor": "bogus"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["previous"] is None
+        assert len(response.data["results"]) == 7
+
+    def test_nullable_stats_ordering(self):
+        for i, year in enumerate([None, 1965, None, 1974, 1951]):
+            Author.objects.create(
+                name=f"Author {i}",
+                latest_publication_date=year and datetime.date(year, 1, 1),
+            )
+        pages, _ = self.walk(
+            reverse("author-list"), ordering="-latest_publication_date", limit=2
+        )
+        names = [Author.objects.get(pk=pk).name for pk in sum(pages, [])]
+        assert names == ["Author 3", "Author 1", "Author 4", "Author 0", "Author 2"]
@@ -70,8 +70,8 @@ class TestPublisherEndpoints(APITestCase):
         response = self.client.get(self.list_url)
 
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == expected_publishers  # type: ignore
+        assert len(response.data["results"]) == expected_publishers  # type: ignore
         # type: ignore on next line for pylance response.data issue
-        response_data = response.data  # type: ignore
+        response_data = response.data["results"]  # type: ignore
         for publisher, response_item in zip(Publisher.objects.all(), response_data):
             assert response_item["pk"] == publisher.pk
@@ -0,0 +1,111 @@
+# encoding: utf-8
+
+import json
+from unittest import mock
+
+import msgpack
+from api.v1 import bulk
+from books.models import Book, Publisher, Rating
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class TestBulkRatings(APITestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Del Rey")
+        self.books = [
+            Book.objects.create(
+                title=f"Foundation {i}", isbn=f"97805533800{i:02d}", publisher=publisher
+            )
+            for i in range(2)
+        ]
+        self.users = [User.objects.create_user(f"reader{i}") for i in range(2)]
+        Rating.objects.create(user=self.users[0], book=self.books[0], rating=1)
+        self.url = reverse("rating-bulk")
+
+    def rows(self):
+        users, books = self.users, self.books
+        return [
+            {"user": users[0].pk, "book": books[0].pk, "rating": 5, "review": "Yes"},
+            {"user": users[1].pk, "book": books[0].pk, "rating": 3},
+            {"user": users[1].pk, "book": books[1].pk, "rating": 6},
+            {"user": users[1].pk, "book": 0, "rating": 2},
+            {"user": users[0].pk, "book": books[1].pk, "rating": 2},
+            {"user": users[0].pk, "book": books[1].pk, "rating": 4},
+        ]
+
+    def check_summary(self, response):
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["statuses"] == [  # type: ignore
+            "updated",
+            "created",
+            "invalid",
+            "invalid",
+            "duplicate",
+            "created",
+        ]
+        assert response.data["counts"] == {  # type: ignore
+            "created": 2,
+            "updated": 1,
+            "duplicate": 1,
+            "invalid": 2,
+        }
+        assert set(response.data["errors"]) == {2, 3}  # type: ignore
+        assert "rating" in response.data["errors"][2]  # type: ignore
+        assert "book" in response.data["errors"][3]  # type: ignore
+
+        first, second = (Book.objects.get(pk=book.pk) for book in self.books)
+        assert (first.rating_count, first.rating_sum, first.average_rating) == (2, 8, 4)
+        assert (second.rating_count, second.average_rating) == (1, 4)
+        assert Rating.objects.get(user=self.users[0], book=first).review == "Yes"
+
+    def test_json_array(self):
+        """POST /api/ratings/bulk/ upserts a JSON array of rows"""
+        self.check_summary(self.client.post(self.url, self.rows(), format="json"))
+
+    def test_ndjson_stream(self):
+        """NDJSON uploads are parsed line by line; bad lines are row errors"""
+        body = "\n".join(json.dumps(row) for row in self.rows()) + "\n{oops\n"
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+        assert response.data["statuses"][-1] == "invalid"  # type: ignore
+        response.data["statuses"].pop()  # type: ignore
+        response.data["counts"]["invalid"] -= 1  # type: ignore
+        del response.data["errors"][6]  # type: ignore
+        self.check_summary(response)
+
+    def test_msgpack_array(self):
+        response = self.client.post(
+            self.url,
+            msgpack.packb(self.rows()),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        assert response["Content-Type"] == "application/msgpack"
+        response.data = msgpack.unpackb(response.content, strict_map_key=False)
+        self.check_summary(response)
+
+    def test_failed_batch_leaves_committed_stats_current(self):
+        rows = self.rows()
+        refresh = bulk.refresh_rating_stats
+        calls = []
+
+        def fail_second_batch(book_ids, using):
+            calls.append(book_ids)
+            if len(calls) == 2:
+                raise RuntimeError("disk full")
+            refresh(book_ids, using=using)
+
+        with mock.patch.object(bulk, "refresh_rating_stats", fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                bulk.ingest_ratings([rows[0], rows[5]], batch_size=1)
+
+        first, second = (Book.objects.get(pk=book.pk) for book in self.books)
+        assert (first.rating_count, first.rating_sum) == (1, 5)
+        assert second.rating_count == 0
+        assert not Rating.objects.filter(book=second).exists()
+
+    def test_rejects_non_list(self):
+        response = self.client.post(self.url, {"user": 1}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,55 @@
+# encoding: utf-8
+import tempfile
+from io import StringIO
+
+from books.models import Book, Publisher, Rating
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class TestRecommendations(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(RECOMMENDATIONS_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        publisher = Publisher.objects.create(name="Gollancz")
+        self.books = [
+            Book.objects.create(
+                title=f"Volume {i}", isbn=f"97805750000{i:02d}", publisher=publisher
+            )
+            for i in range(4)
+        ]
+        self.user = User.objects.create_user("reader")
+        for i, book in enumerate(self.books[:2]):
+            Rating.objects.create(user=self.user, book=book, rating=5 - i)
+        self.url = reverse("user-recommendations", args=[self.user.pk])
+
+    def test_not_trained(self):
+        response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_rated_books_are_excluded(self):
+        other = User.objects.create_user("other")
+        for book in self.books:
+            Rating.objects.create(user=other, book=book, rating=4)
+        call_command("train_recommendations", "--factors=2", stdout=StringIO())
+
+        # user, their ratings, the books and their authors
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {"limit": 5})
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(book["pk"] for book in response.data) == [
+            book.pk for book in self.books[2:]
+        ]
+        assert all(isinstance(book["score"], float) for book in response.data)
+
+    def test_missing_user(self):
+        response = self.client.get(reverse("user-recommendations", args=[999]))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,111 @@
+# encoding: utf-8
+import datetime
+import json
+from decimal import Decimal
+from io import BytesIO
+
+import msgpack
+from api.v1.parsers import JSONParser, MessagePackParser
+from api.v1.renderers import (
+    CSVRenderer,
+    JSONRenderer,
+    MessagePackRenderer,
+    NDJSONRenderer,
+)
+from books.models import Book, Publisher
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import renderers, status
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APITestCase
+
+PAYLOAD = {
+    "title": "Dune   Messiah – ℵ",
+    "price": Decimal("19.99"),
+    "published": datetime.date(1965, 8, 1),
+    "rated_at": datetime.datetime(
+        2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+    ),
+    "label": gettext_lazy("Books"),
+    "errors": {2: ["bad"]},
+    "tags": ("sci_fi", None, True, 1.5),
+}
+
+
+class TestRenderers(APITestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Ace")
+        Book.objects.create(title="Dune", isbn="9780441013593", publisher=publisher)
+        self.url = reverse("book-list")
+
+    def test_json_matches_drf(self):
+        assert JSONRenderer().render(PAYLOAD) == renderers.JSONRenderer().render(
+            PAYLOAD
+        )
+        assert JSONRenderer().render(None) == b""
+        # Indented output is left to DRF's renderer
+        pretty = JSONRenderer().render(PAYLOAD, "application/json; indent=2")
+        assert pretty.startswith(b'{\n  "title"')
+
+    def test_msgpack(self):
+        packed = MessagePackRenderer().render(PAYLOAD)
+        # Values JSON has no type for are encoded as in JSON
+        assert msgpack.unpackb(packed, strict_map_key=False) == {
+            "title": PAYLOAD["title"],
+            "price": 19.99,
+            "published": "1965-08-01",
+            "rated_at": "2024-01-02T03:04:05.678901Z",
+            "label": "Books",
+            "errors": {2: ["bad"]},
+            "tags": ["sci_fi", None, True, 1.5],
+        }
+
+    def test_rows(self):
+        rows = [{"title": "Dune", "tags": ["a", "b"]}, {"title": "ℵ\u2028", "ok": True}]
+        assert NDJSONRenderer().render(rows) == (
+            b'{"title":"Dune","tags":["a","b"]}\n'
+            b'{"title":"\xe2\x84\xb5\\u2028","ok":true}\n'
+        )
+        assert CSVRenderer().render(rows) == (
+            "title,tags,ok\r\nDune,a|b,\r\nℵ\u2028,,true\r\n".encode()
+        )
+        line = CSVRenderer().render(PAYLOAD).decode().split("\r\n")[1]
+        assert line == (
+            f"{PAYLOAD['title']},19.99,1965-08-01,2024-01-02T03:04:05.678901Z,Books,"
+            '"{""2"":[""bad""]}",sci_fi||true|1.5'
+        )
+
+    def test_negotiation(self):
+        as_json = self.client.get(self.url)
+        assert as_json["Content-Type"] == "application/json"
+
+        packed = self.client.get(self.url, HTTP_ACCEPT="application/msgpack")
+        assert packed.status_code == status.HTTP_200_OK
+        assert packed["Content-Type"] == "application/msgpack"
+        assert msgpack.unpackb(packed.content) == as_json.json()
+        assert packed["ETag"] != as_json["ETag"]
+
+        refused = self.client.get(self.url, HTTP_ACCEPT="application/xml")
+        assert refused.status_code == status.HTTP_406_NOT_ACCEPTABLE
+
+    def test_parsers(self):
+        data = {"isbn": ["0441013597", "9780441013593"]}
+        assert JSONParser().parse(BytesIO(json.dumps(data).encode())) == data
+        assert MessagePackParser().parse(BytesIO(msgpack.packb(data))) == data
+        for parser, body in (
+            (JSONParser(), b'{"isbn": NaN}'),
+            (JSONParser(), b"{oops"),
+            (MessagePackParser(), b"\xc1"),
+            (MessagePackParser(), msgpack.packb({1: "x"})),
+        ):
+            with self.assertRaises(ParseError):
+                parser.parse(BytesIO(body))
+
+    def test_msgpack_request(self):
+        response = self.client.post(
+            reverse("book-by-isbn"),
+            msgpack.packb({"isbn": ["0441013597"]}),
+            content_type="application/msgpack",
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["found"] == 1  # type: ignore
@@ -0,0 +1,85 @@
+# encoding: utf-8
+from books.models import Author, Book, Publisher, Rating
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from images.models import ImageAsset
+from rest_framework.test import APITestCase
+
+
+class TestRowSerializer(APITestCase):
+    """The values() fast path answers exactly like the serializers"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.ace = Publisher.objects.create(name="Ace")
+        herbert = Author.objects.create(name="Frank Herbert")
+        le_guin = Author.objects.create(name="Ursula K. Le Guin")
+        reader = User.objects.create_user("reader")
+        for i in range(5):
+            book = Book.objects.create(
+                title=f"Book {i}",
+                isbn=f"isbn-{i}",
+                publisher=self.ace,
+                description="" if i % 2 else "Spice.",
+                original_price="19.99" if i % 2 else None,
+                cover_image=f"book_covers/{i}.jpg" if i < 2 else "",
+            )
+            book.authors.add(*([le_guin, herbert] if i % 2 else [herbert]))
+            Rating.objects.create(book=book, user=reader, rating=i + 1)
+        self.book = book
+        ImageAsset.objects.filter(source="book_covers/0.jpg").update(
+            status=ImageAsset.READY,
+            width=800,
+            height=1200,
+            derivatives=[
+                {
+                    "size": "thumb160",
+                    "width": 160,
+                    "height": 240,
+                    "webp": "derivatives/aa/a.webp",
+                    "jpeg": "derivatives/aa/a.jpg",
+                }
+            ],
+        )
+
+    def compare(self, url, params=None):
+        fast = self.client.get(url, params)
+        with self.settings(API_ROW_SERIALIZER=False):
+            slow = self.client.get(url, params)
+        assert fast.status_code == slow.status_code == 200
+        assert fast.json() == slow.json()
+        return fast.json()
+
+    def test_book_list(self):
+        data = self.compare(reverse("book-list"))
+        assert len(data["results"]) == 5
+        covers = [book["cover"] for book in data["results"]]
+        assert covers.count(None) == 3
+        assert any(cover["ready"] for cover in covers if cover)
+        self.compare(reverse("book-list"), {"limit": 2})
+        self.compare(reverse("book-list"), {"fields": "pk,title,authors"})
+        self.compare(reverse("book-list"), {"expand": "authors,publisher"})
+
+    def test_book_detail(self):
+        url = reverse("book-detail", kwargs={"pk": self.book.pk})
+        self.compare(url)
+        self.compare(url, {"expand": "authors", "fields": "title,authors"})
+        response = self.client.get(reverse("book-detail", kwargs={"pk": 0}))
+        assert response.status_code == 404
+
+    def test_ratings(self):
+        data = self.compare(reverse("rating-list"), {"limit": 3})
+        next_page = self.compare(data["next"])
+        assert len(data["results"]) + len(next_page["results"]) == 5
+        rating = Rating.objects.first()
+        self.compare(reverse("rating-detail", kwargs={"pk": rating.pk}))
+
+    def test_queries_per_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("book-list"), {"expand": "authors,publisher"})
+        # Books, author links, authors, publishers and image renditions
+        assert len(queries.captured_queries) == 5
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Batched rating upserts behind ``/api/v1/ratings/bulk/``.
+
+Rows are validated and written ``BULK_BATCH_SIZE`` at a time: field checks
+run in Python, users and books are checked with one ``IN`` query each, and
+the batch is written with a single ``INSERT ... ON CONFLICT (user, book) DO
+UPDATE``. The rating aggregates of the batch's books are recomputed in the same
+transaction, so a later failure never leaves committed ratings behind stale
+aggregates.
+"""
+
+from itertools import islice
+
+from books.models import Book, Rating
+from books.ratings import refresh_rating_stats
+from books.versions import RATINGS, bump_version
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .serializers import BulkRatingSerializer
+
+BULK_BATCH_SIZE = 1000
+
+CREATED = "created"
+UPDATED = "updated"
+DUPLICATE = "duplicate"  # superseded by a later row for the same user and book
+INVALID = "invalid"
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _validate(row):
+    if not isinstance(row, dict):
+        return None, {"non_field_errors": ["Expected a JSON object."]}
+    serializer = BulkRatingSerializer(data=row)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    return serializer.validated_data, None
+
+
+def _ingest_batch(batch, offset, statuses, errors, using):
+    valid = {}  # row number -> validated data
+    for number, row in enumerate(batch, start=offset):
+        data, row_errors = _validate(row)
+        if row_errors:
+            statuses.append(INVALID)
+            errors[number] = row_errors
+        else:
+            statuses.append(None)
+            valid[number] = data
+
+    user_ids = {data["user"] for data in valid.values()}
+    book_ids = {data["book"] for data in valid.values()}
+    known_users = set(
+        User.objects.using(using).filter(pk__in=user_ids).values_list("pk", flat=True)
+    )
+    known_books = set(
+        Book.objects.using(using).filter(pk__in=book_ids).values_list("pk", flat=True)
+    )
+
+    latest = {}  # (user, book) -> row number; the last row for a pair wins
+    for number, data in valid.items():
+        row_errors = {}
+        if data["user"] not in known_users:
+            row_errors["user"] = [
+                f"Invalid pk \"{data['user']}\" - object does not exist."
+            ]
+        if data["book"] not in known_books:
+            row_errors["book"] = [
+                f"Invalid pk \"{data['book']}\" - object does not exist."
+            ]
+        if row_errors:
+            statuses[number] = INVALID
+            errors[number] = row_errors
+            continue
+        pair = (data["user"], data["book"])
+        if pair in latest:
+            statuses[latest[pair]] = DUPLICATE
+        latest[pair] = number
+
+    if not latest:
+        return set()
+
+    existing = set(
+        Rating.objects.using(using)
+        .filter(
+            user_id__in={user for user, _ in latest},
+            book_id__in={book for _, book in latest},
+        )
+        .values_list("user_id", "book_id")
+    )
+    ratings = []
+    for (user_id, book_id), number in latest.items():
+        data = valid[number]
+        statuses[number] = UPDATED if (user_id, book_id) in existing else CREATED
+        ratings.append(
+            Rating(
+                user_id=user_id,
+                book_id=book_id,
+                rating=data["rating"],
+                review=data["review"],
+            )
+        )
+    Rating.objects.using(using).bulk_create(
+        ratings,
+        update_conflicts=True,
+        unique_fields=["user", "book"],
+        update_fields=["rating", "review", "updated_at"],
+    )
+    return {book_id for _, book_id in latest}
+
+
+def ingest_ratings(rows, batch_size=BULK_BATCH_SIZE, using="default"):
+    """Upsert ``rows`` of ``{user, book, rating, review}`` and summarise.
+
+    Returns ``{"counts": {...}, "statuses": [...], "errors": {row: {...}}}``
+    with one status per input row, in order.
+    """
+    statuses, errors, affected = [], {}, False
+    try:
+        for batch in _batches(rows, batch_size):
+            with transaction.atomic(using=using):
+                books = _ingest_batch(batch, len(statuses), statuses, errors, using)
+                if books:
+                    refresh_rating_stats(sorted(books), using=using)
+            affected = affected or bool(books)
+    finally:
+        if affected:
+            bump_version(RATINGS)
+
+    counts = {status: 0 for status in (CREATED, UPDATED, DUPLICATE, INVALID)}
+    for status in statuses:
+        counts[status] += 1
+    return {"counts": counts, "statuses": statuses, "errors": errors}
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Sparse fieldsets and inline expansion for the v1 API.
+
+``?fields=title,authors`` limits a representation to the named fields and
+``?expand=authors,publisher`` inlines those relations as nested objects
+instead of pks. Unknown names are ignored. Both apply to reads only; writes
+always use the full serializer.
+
+``optimize_queryset()`` derives the query from the serializer's final shape:
+``only()`` the columns it reads, ``select_related()`` for expanded foreign
+keys and a ``Prefetch`` (itself narrowed) for every to-many relation, so a
+page costs the same number of queries whatever its size.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def requested_names(request, param):
+    """Comma-separated names from ``?param=`` (repeatable), or None"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    values = request.query_params.getlist(param)
+    if not values:
+        return None
+    return {name.strip() for value in values for name in value.split(",")} - {""}
+
+
+class ExpandableFieldsMixin:
+    """Serializer mixin for ``?fields=`` and ``?expand=``.
+
+    ``Meta.expandable`` maps a field name to a ``(serializer class, kwargs)``
+    pair used in its place when the field is expanded.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Only the top-level representation follows the query string
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+        request = self.context.get("request")
+
+        selected = requested_names(request, FIELDS_PARAM)
+        if selected and selected & set(fields):
+            fields = {name: field for name, field in fields.items() if name in selected}
+
+        expandable = getattr(self.Meta, "expandable", {})
+        for name in requested_names(request, EXPAND_PARAM) or ():
+            if name in fields and name in expandable:
+                serializer_class, kwargs = expandable[name]
+                fields[name] = serializer_class(read_only=True, **kwargs)
+        return fields
+
+
+def _plan(serializer, model, prefix=""):
+    """``(only, select_related, prefetches)`` for ``serializer`` over
+    ``model``; ``only`` is None when some field may read any column"""
+    opts = model._meta
+    only, select, prefetches = {prefix + opts.pk.name}, [], []
+    narrow = True
+    for field in serializer.fields.values():
+        source = field.source
+        if source == "pk":
+            continue
+        try:
+            model_field = opts.get_field(source.split(".")[0])
+        except FieldDoesNotExist:
+            # "*", a property or a method
+            narrow = False
+            continue
+        name = prefix + model_field.name
+
+        if model_field.many_to_many or model_field.one_to_many:
+            related = model_field.related_model._default_manager.all()
+            if isinstance(field, ListSerializer):
+                related = optimize_queryset(related, field.child)
+            else:
+                related = related.only("pk")
+            prefetches.append(Prefetch(name, queryset=related))
+        elif model_field.is_relation and isinstance(field, BaseSerializer):
+            nested_only, nested_select, nested_prefetches = _plan(
+                field, model_field.related_model, f"{name}__"
+            )
+            select.extend([name, *nested_select])
+            prefetches.extend(nested_prefetches)
+            if nested_only is None:
+                narrow = False
+            else:
+                only.update([name, *nested_only])
+        elif model_field.is_relation:
+            # A pk field reads the foreign key column only
+            only.add(prefix + model_field.attname)
+        else:
+            only.add(name)
+    return (only if narrow else None), select, prefetches
+
+
+def optimize_queryset(queryset, serializer):
+    """``queryset`` narrowed to what ``serializer`` will read"""
+    only, select, prefetches = _plan(serializer, queryset.model)
+    if only is not None:
+        opts = queryset.model._meta
+        # Ordering keys are read back for pagination cursors
+        for ordering in queryset.query.order_by or opts.ordering:
+            if isinstance(ordering, str):
+                try:
+                    only.add(opts.get_field(ordering.lstrip("-")).attname)
+                except FieldDoesNotExist:
+                    pass
+        queryset = queryset.only(*only)
+    if select:
+        queryset = queryset.select_related(*select)
+    # The plan covers every relation the serializer reads
+    return queryset.prefetch_related(None).prefetch_related(*prefetches)
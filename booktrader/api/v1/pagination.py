@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Cursor pagination for the api/v1 list endpoints.
+
+Every list is served in keyset pages (``books.pagination.KeysetPaginator``)
+over its ordering with the primary key as the tie-breaker, so a page deep in
+the ratings table costs the same index range scan as the first one.
+Responses look like ``{"next": <url>, "previous": <url>, "results": [...]}``:
+
+* ``?cursor=`` is the opaque position taken from ``next``/``previous``;
+* ``?limit=`` picks the page size, capped at ``settings.API_MAX_PAGE_SIZE``
+  (``REST_FRAMEWORK["PAGE_SIZE"]`` when absent);
+* ``?count=estimated`` adds a ``count`` from ``estimated_count()``; no exact
+  ``COUNT(*)`` is ever run for a page.
+"""
+
+from books.pagination import KeysetPaginator, estimated_count
+from books.versions import CATALOG, RATINGS, get_version
+from django.conf import settings
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    count_query_param = "count"
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return min(max(page_size, 1), settings.API_MAX_PAGE_SIZE)
+
+    def get_ordering(self, queryset):
+        """The queryset's ordering, made unique with the primary key"""
+        opts = queryset.model._meta
+        ordering = list(queryset.query.order_by or opts.ordering)
+        if not ordering or ordering[-1].lstrip("-") not in ("pk", opts.pk.name):
+            # Follow the direction of the last key so one index serves both
+            descending = bool(ordering) and ordering[-1].startswith("-")
+            ordering.append("-pk" if descending else "pk")
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        count = None
+        if request.query_params.get(self.count_query_param) == "estimated":
+            count = estimated_count(
+                queryset, version=f"{get_version(CATALOG)}.{get_version(RATINGS)}"
+            )
+        paginator = KeysetPaginator(
+            queryset, self.get_ordering(queryset), self.get_page_size(request)
+        )
+        self.page = paginator.get_page(
+            request.query_params.get(self.cursor_query_param, ""), count=count
+        )
+        return self.page.object_list
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        payload = {}
+        if self.page.count is not None:
+            payload["count"] = self.page.count
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
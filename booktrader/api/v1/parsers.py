@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Request parsers for the v1 API, the counterparts of ``api.v1.renderers``"""
+
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import MSGPACK_MEDIA_TYPE, MessagePackRenderer, msgpack, orjson
+
+# orjson rejects NaN and Infinity, like DRF's strict JSON parsing
+loads = orjson.loads if orjson is not None else json.loads
+
+
+class JSONParser(parsers.JSONParser):
+    """DRF's ``JSONParser``, decoding with orjson when it is installed"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackParser(BaseParser):
+    media_type = MSGPACK_MEDIA_TYPE
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if msgpack is None:
+            raise ParseError("MessagePack is not supported by this server")
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
+
+
+class NDJSONParser(BaseParser):
+    """Newline-delimited JSON, parsed lazily one line at a time.
+
+    ``request.data`` is a generator, so large uploads are never held in
+    memory as a whole. A line that is not valid JSON yields ``None`` and is
+    reported by the view as a row error.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        return self._rows(codecs.getreader(encoding)(stream))
+
+    @staticmethod
+    def _rows(lines):
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                yield None
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Response renderers for the v1 API, picked by the ``Accept`` header.
+
+* ``JSONRenderer`` encodes with orjson when it is installed, several times
+  faster than the stdlib ``json`` DRF uses, and falls back to DRF's renderer
+  otherwise or when an indent is asked for (``application/json; indent=4``).
+  Types orjson does not know, and datetimes, go through DRF's encoder, so the
+  bytes match DRF's.
+* ``MessagePackRenderer`` (``Accept: application/msgpack``) is a compact
+  binary encoding for internal services; it needs ``msgpack``.
+* ``NDJSONRenderer`` and ``CSVRenderer`` write lists of flat rows, one line
+  each. ``stream()`` encodes chunks of rows as they come, for the streamed
+  exports in ``api.v1.export``.
+
+``api.v1.parsers`` reads both formats back.
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# List cells in CSV, as ``import_catalog`` reads author lists
+CSV_LIST_SEPARATOR = "|"
+# DRF escapes these so that JSON stays a strict JavaScript subset
+LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+_encoder = JSONEncoder()
+
+
+def _dumps(data):
+    """Compact JSON bytes, the same as DRF's ``JSONRenderer`` writes"""
+    if orjson is None:
+        ret = json.dumps(
+            data,
+            cls=JSONEncoder,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode()
+    else:
+        ret = orjson.dumps(
+            data,
+            default=_encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    for separator, escaped in LINE_SEPARATORS:
+        if separator in ret:
+            ret = ret.replace(separator, escaped)
+    return ret
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (str, int, float, Decimal)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return CSV_LIST_SEPARATOR.join(str(_cell(item)) for item in value)
+    if isinstance(value, dict):
+        return _dumps(value).decode()
+    return _encoder.default(value)
+
+
+def _columns(rows):
+    return list(dict.fromkeys(key for row in rows for key in row))
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        return _dumps(data)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # Decimals, datetimes, lazy strings... as they appear in JSON
+        return msgpack.packb(
+            data, default=_encoder.default, use_bin_type=True, datetime=False
+        )
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """One JSON object per line"""
+
+    media_type = NDJSON_MEDIA_TYPE
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(self.stream([rows], _columns(rows)))
+
+    def stream(self, chunks, columns):
+        """Encode each chunk of rows to one ``bytes``"""
+        for rows in chunks:
+            yield b"".join(_dumps(row) + b"\n" for row in rows)
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """A header line with the columns, then one line per row.
+
+    Empty cells are ``None``, booleans are ``true``/``false``, lists are joined
+    with ``CSV_LIST_SEPARATOR`` and other values are written as in JSON.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(self.stream([rows], _columns(rows)))
+
+    def stream(self, chunks, columns):
+        """Encode the header, then each chunk of rows, to one ``bytes`` each"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield self._drain(buffer)
+        for rows in chunks:
+            writer.writerows(
+                [_cell(row.get(column)) for column in columns] for row in rows
+            )
+            yield self._drain(buffer)
+
+    @staticmethod
+    def _drain(buffer):
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
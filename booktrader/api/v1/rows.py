@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""Read-only fast path: serializer output built straight from ``values()``.
+
+Most of a ``ModelSerializer`` list response goes to instantiating models and
+dispatching every field of every row through ``get_attribute()`` and
+``to_representation()``. ``RowSerializer.compile()`` inspects a serializer's
+final fields once (after ``?fields=``/``?expand=``) and turns them into
+``(name, key, convert)`` steps over ``values()`` dicts:
+
+* columns whose representation is the database value itself (text, integers,
+  pks) are copied as is; the others keep the DRF field's converter;
+* to-many pks come from one query on the through table, nested objects from
+  one ``values()`` query per relation and image renditions from one
+  ``get_renditions()`` call per page.
+
+The output matches the serializer's. Anything else (method fields, dotted
+sources, reverse relations) makes ``compile()`` return None, and the view
+uses the serializer instead.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from images.pipeline import describe, get_renditions
+from images.serializers import ImageRenditionsField
+from rest_framework import fields, relations, serializers
+
+# Converters that return a database value unchanged (text, integers, pks)
+PASSTHROUGH = {
+    fields.CharField.to_representation,
+    fields.IntegerField.to_representation,
+    fields.ReadOnlyField.to_representation,
+}
+
+
+def _converter(field):
+    if type(field).to_representation in PASSTHROUGH:
+        return None
+    return field.to_representation
+
+
+def _is_pk_relation(field):
+    return isinstance(field, relations.PrimaryKeyRelatedField) and not field.pk_field
+
+
+def _ordering_keys(queryset):
+    """Ordering names of ``queryset``; pagination cursors read them back"""
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return [name.lstrip("-") for name in ordering if isinstance(name, str)]
+
+
+class _ForeignKey:
+    """A nested serializer for a foreign key: one query per page"""
+
+    def __init__(self, key, rows):
+        self.key = key
+        self.rows = rows
+        self.objects = {}
+
+    def load(self, page, using):
+        ids = {row[self.key] for row in page} - {None}
+        related = list(
+            self.rows.model._default_manager.using(using)
+            .filter(pk__in=ids)
+            .values(*self.rows.keys)
+        )
+        self.objects = {
+            row["pk"]: item
+            for row, item in zip(related, self.rows.represent(related, using))
+        }
+
+    def get(self, value):
+        return self.objects.get(value)
+
+
+class _ManyToMany:
+    """Pks, or nested objects when ``rows`` is given, of a many-to-many
+    field in the related model's ordering: one query, or two, per page"""
+
+    def __init__(self, model_field, rows=None):
+        through = model_field.remote_field.through._meta
+        self.through = through.model
+        self.source = model_field.m2m_field_name()
+        self.target = model_field.m2m_reverse_field_name()
+        self.columns = (
+            through.get_field(self.source).attname,
+            through.get_field(self.target).attname,
+        )
+        self.ordering = [
+            (
+                f"-{self.target}__{name[1:]}"
+                if name[0] == "-"
+                else f"{self.target}__{name}"
+            )
+            for name in model_field.related_model._meta.ordering
+            if isinstance(name, str)
+        ]
+        self.rows = rows
+        self.links = {}
+
+    def load(self, page, using):
+        links = (
+            self.through._default_manager.using(using)
+            .filter(**{f"{self.source}__in": [row["pk"] for row in page]})
+            .order_by(*self.ordering, self.columns[1])
+            .values_list(*self.columns)
+        )
+        self.links = {}
+        for source_id, target_id in links:
+            self.links.setdefault(source_id, []).append(target_id)
+        if self.rows is None:
+            return
+
+        ids = {target_id for targets in self.links.values() for target_id in targets}
+        related = list(
+            self.rows.model._default_manager.using(using)
+            .filter(pk__in=ids)
+            .values(*self.rows.keys)
+        )
+        objects = {
+            row["pk"]: item
+            for row, item in zip(related, self.rows.represent(related, using))
+        }
+        self.links = {
+            source_id: [objects[target_id] for target_id in targets]
+            for source_id, targets in self.links.items()
+        }
+
+    def get(self, pk):
+        return self.links.get(pk, [])
+
+
+class _Renditions:
+    """An ``ImageRenditionsField``, with every rendition of the page fetched
+    in one ``get_renditions()`` call"""
+
+    def __init__(self, key, model_field, field):
+        self.key = key
+        self.model_field = model_field
+        request = field.context.get("request")
+        self.url = request.build_absolute_uri if request is not None else None
+        self.renditions = {}
+
+    def load(self, page, using):
+        self.renditions = get_renditions(row[self.key] for row in page)
+
+    def get(self, name):
+        fieldfile = self.model_field.attr_class(None, self.model_field, name)
+        return describe(fieldfile, url=self.url, renditions=self.renditions)
+
+
+class RowSerializer:
+    """Compiled representation of a serializer over ``values()`` rows"""
+
+    def __init__(self, model, keys, steps, loaders):
+        self.model = model
+        self.keys = keys
+        self.steps = steps
+        self.loaders = loaders
+
+    @classmethod
+    def compile(cls, serializer, model=None):
+        """A ``RowSerializer`` matching ``serializer``, or None"""
+        model = model or serializer.Meta.model
+        opts = model._meta
+        keys, steps, loaders = ["pk"], [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "pk":
+                steps.append((name, "pk", _converter(field)))
+                continue
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+
+            if isinstance(model_field, models.ManyToManyField):
+                if isinstance(field, relations.ManyRelatedField) and _is_pk_relation(
+                    field.child_relation
+                ):
+                    loader = _ManyToMany(model_field)
+                elif isinstance(field, serializers.ListSerializer):
+                    rows = cls.compile(field.child, model_field.related_model)
+                    if rows is None:
+                        return None
+                    loader = _ManyToMany(model_field, rows)
+                else:
+                    return None
+                loaders.append(loader)
+                steps.append((name, "pk", loader.get))
+                continue
+            if not model_field.concrete:
+                return None
+
+            key = model_field.attname
+            keys.append(key)
+            if isinstance(field, ImageRenditionsField):
+                loader = _Renditions(key, model_field, field)
+                loaders.append(loader)
+                steps.append((name, key, loader.get))
+            elif model_field.is_relation and _is_pk_relation(field):
+                steps.append((name, key, None))
+            elif model_field.is_relation and isinstance(field, serializers.Serializer):
+                rows = cls.compile(field, model_field.related_model)
+                if rows is None:
+                    return None
+                loader = _ForeignKey(key, rows)
+                loaders.append(loader)
+                steps.append((name, key, loader.get))
+            elif not model_field.is_relation and not isinstance(
+                field, (serializers.BaseSerializer, relations.RelatedField)
+            ):
+                steps.append((name, key, _converter(field)))
+            else:
+                return None
+        return cls(model, keys, steps, loaders)
+
+    def values(self, queryset):
+        """``queryset`` as the ``values()`` rows ``represent()`` expects"""
+        keys = self.keys + [
+            name for name in _ordering_keys(queryset) if name not in self.keys
+        ]
+        return queryset.prefetch_related(None).values(*keys)
+
+    def represent(self, page, using):
+        """The serializer's output for a page of ``values()`` rows"""
+        for loader in self.loaders:
+            loader.load(page, using)
+        steps = self.steps
+        data = []
+        for row in page:
+            item = {}
+            for name, key, convert in steps:
+                value = row[key]
+                item[name] = (
+                    value if convert is None or value is None else convert(value)
+                )
+            data.append(item)
+        return data
@@ -1,9 +1,14 @@
+from books.isbn import normalize_isbn
 from books.models import Author, Book, Publisher, Rating
+from books.ratings import RATING_STATS_FIELDS
 from django.contrib.auth.models import User
+from images.serializers import ImageRenditionsField
 
 # from django.db.models import Avg
 from rest_framework import serializers
 
+from .fieldsets import ExpandableFieldsMixin
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,7 +21,29 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class BookSerializer(serializers.ModelSerializer):
+CATALOG_STATS_FIELDS = (
+    "book_count",
+    "rating_count",
+    "average_rating",
+    "latest_publication_date",
+)
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Author
+        fields = ("pk", "name", *CATALOG_STATS_FIELDS)
+        read_only_fields = CATALOG_STATS_FIELDS
+
+
+class PublisherSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Publisher
+        fields = ("pk", "name", *CATALOG_STATS_FIELDS)
+        read_only_fields = CATALOG_STATS_FIELDS
+
+
+class BookSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     # average_rating = serializers.SerializerMethodField()
     #
     # @staticmethod
@@ -27,6 +54,8 @@ class BookSerializer(serializers.ModelSerializer):
     #     else:
     #         return 0
 
+    cover = ImageRenditionsField(source="cover_image")
+
     class Meta:
         model = Book
         fields = (
@@ -34,28 +63,30 @@ class BookSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "isbn",
+            "isbn13",
             "authors",
             "publisher",
             "average_rating",
+            "rating_count",
+            "cover",
         )
+        # Maintained from the ratings by books.ratings
+        read_only_fields = RATING_STATS_FIELDS
+        # ?expand= inlines these instead of their pks
+        expandable = {
+            "authors": (AuthorSerializer, {"many": True}),
+            "publisher": (PublisherSerializer, {}),
+        }
 
-
-class AuthorSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Author
-        fields = (
-            "pk",
-            "name",
-        )
-
-
-class PublisherSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Publisher
-        fields = (
-            "pk",
-            "name",
-        )
+    def validate_isbn(self, value):
+        # Different spellings of one ISBN share the unique isbn13 column
+        isbn13 = normalize_isbn(value)
+        books = Book.objects.filter(isbn13=isbn13)
+        if self.instance is not None:
+            books = books.exclude(pk=self.instance.pk)
+        if isbn13 and books.exists():
+            raise serializers.ValidationError("A book with this ISBN already exists.")
+        return value
 
 
 class RatingSerializer(serializers.ModelSerializer):
@@ -67,3 +98,12 @@ class RatingSerializer(serializers.ModelSerializer):
             "user",
             "book",
         )
+
+
+class BulkRatingSerializer(serializers.Serializer):
+    """One row of a bulk rating upload; user and book are checked per batch"""
+
+    user = serializers.IntegerField()
+    book = serializers.IntegerField()
+    rating = serializers.IntegerField(min_value=1, max_value=5)
+    review = serializers.CharField(allow_blank=True, default="")
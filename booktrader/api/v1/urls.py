@@ -13,4 +13,5 @@ router.register(r"ratings", views.RatingViewSet)
 # Wire up our API using automatic URL routing.
 urlpatterns = [
     path("", include(router.urls)),
+    path("export/<slug:dataset>/", views.ExportView.as_view(), name="export"),
 ]
@@ -1,15 +1,62 @@
-from api.serializers import (
+import datetime
+import math
+from functools import partial
+
+from api.v1.serializers import (
     AuthorSerializer,
     BookSerializer,
     PublisherSerializer,
     RatingSerializer,
     UserSerializer,
 )
+from books.conditional import make_etag, not_modified, row_validators, set_validators
+from books.isbn import normalize_isbn
 from books.models import Author, Book, Publisher, Rating
+from books.pagecache import params_digest
+from books.recommendations import recommend_books
+from books.search import get_search_backend
+from books.versions import CATALOG, RATINGS, get_version
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Avg
-from rest_framework import viewsets
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .bulk import ingest_ratings
+from .export import DATASETS, aiterate, format_until, parse_since
+from .fieldsets import optimize_queryset, requested_names
+from .parsers import JSONParser, MessagePackParser, NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .rows import RowSerializer
+
+SEARCH_RESULTS_LIMIT = 50
+MAX_ISBN_LOOKUPS = 1000
+STATS_ORDERING_FIELDS = (
+    "name",
+    "book_count",
+    "rating_count",
+    "average_rating",
+    "latest_publication_date",
+)
+NULLABLE_STATS_FIELDS = ("latest_publication_date",)
+# query param -> (lookup on the maintained stats columns, value type)
+STATS_FILTERS = {
+    "min_books": ("book_count__gte", int),
+    "min_ratings": ("rating_count__gte", int),
+    "min_rating": ("average_rating__gte", float),
+}
+RECOMMENDATIONS_LIMIT = 10
+MAX_RECOMMENDATIONS_LIMIT = 100
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -18,35 +65,291 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
+    @action(detail=True, methods=["get"])
+    def recommendations(self, request, pk=None):
+        """Books this user has not rated, best predicted first:
+        /api/v1/users/<id>/recommendations/?limit=<n>"""
+        user = self.get_object()
+        try:
+            limit = int(request.query_params.get("limit", RECOMMENDATIONS_LIMIT))
+        except ValueError:
+            limit = RECOMMENDATIONS_LIMIT
+        limit = min(max(limit, 1), MAX_RECOMMENDATIONS_LIMIT)
+
+        picks = recommend_books(user.pk, limit, using=self.get_queryset().db)
+        if picks is None:
+            return Response(
+                {"detail": "Recommendations have not been trained yet."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        books = BookSerializer(
+            [book for book, _ in picks], many=True, context={"request": request}
+        ).data
+        for book, (_, score) in zip(books, picks):
+            book["score"] = score
+        return Response(books)
+
+
+class ConditionalGetMixin:
+    """Answer ``If-None-Match`` / ``If-Modified-Since`` with 304 before any
+    serialization.
+
+    A detail response's validators come from the row's ``validator_fields``
+    timestamps alone; with ``?expand=`` the nested rows can change on their
+    own, so the ETag also takes the catalog version counters and there is no
+    ``Last-Modified``. A list's ETag comes from the catalog version counters
+    and the query string; lists get no ``Last-Modified`` because a deleted row
+    leaves no newer timestamp behind.
+    """
+
+    validator_fields = ("updated_at",)
+
+    def _conditional(self, request, validators, respond):
+        response = not_modified(request, *validators)
+        if response is None:
+            response = set_validators(respond(), *validators)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag = make_etag(
+            self.get_queryset().model._meta.label_lower,
+            get_version(CATALOG),
+            get_version(RATINGS),
+            params_digest(request.query_params),
+            request.accepted_renderer.format,
+        )
+        return self._conditional(
+            request,
+            (etag, None),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
 
-class BookViewSet(viewsets.ModelViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        # ?fields= and ?expand= change the representation
+        variant = (
+            request.accepted_renderer.format,
+            params_digest(request.query_params),
+        )
+        expanded = requested_names(request, "expand")
+        if expanded:
+            variant += (get_version(CATALOG), get_version(RATINGS))
+        validators = row_validators(
+            self.get_queryset(),
+            kwargs[self.lookup_url_kwarg or self.lookup_field],
+            self.validator_fields,
+            variant=variant,
+        )
+        if validators is None:
+            return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        if expanded:
+            # The nested rows' changes leave the book's timestamps alone
+            validators = (validators[0], None)
+        return self._conditional(
+            request,
+            validators,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+
+class RowSerializerMixin:
+    """Serve ``list`` and ``retrieve`` from ``values()`` rows whenever the
+    serializer compiles to a ``RowSerializer`` (see api.v1.rows)"""
+
+    def get_row_serializer(self):
+        """The compiled serializer for this list or retrieve, or None"""
+        if not hasattr(self, "_row_serializer"):
+            self._row_serializer = None
+            if self.action in ("list", "retrieve") and settings.API_ROW_SERIALIZER:
+                self._row_serializer = self._compile_row_serializer()
+        return self._row_serializer
+
+    def _compile_row_serializer(self):
+        # Dict rows cannot go through per-object permission checks
+        for permission in self.get_permissions():
+            if (
+                type(permission).has_object_permission
+                is not BasePermission.has_object_permission
+            ):
+                return None
+        return RowSerializer.compile(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        rows = self.get_row_serializer()
+        if rows is None:
+            return super(RowSerializerMixin, self).list(request, *args, **kwargs)
+        queryset = rows.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.represent(page, queryset.db))
+        return Response(rows.represent(list(queryset), queryset.db))
+
+    def retrieve(self, request, *args, **kwargs):
+        rows = self.get_row_serializer()
+        if rows is None:
+            return super(RowSerializerMixin, self).retrieve(request, *args, **kwargs)
+        queryset = rows.values(self.filter_queryset(self.get_queryset()))
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            queryset, **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        return Response(rows.represent([row], queryset.db)[0])
+
+
+class BookViewSet(ConditionalGetMixin, RowSerializerMixin, viewsets.ModelViewSet):
     """API endpoint that allows books to be viewed or edited."""
 
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    # Rating stats are updated in place and stamp ratings_changed_at instead
+    validator_fields = ("updated_at", "ratings_changed_at")
 
     def get_queryset(self):
         queryset = super(BookViewSet, self).get_queryset()
 
-        queryset = queryset.order_by("-average_rating")
+        # Keyset pages walk book_rating_keyset_idx
+        queryset = queryset.order_by("-average_rating", "pk")
+        reads = self.action not in ("update", "partial_update", "destroy")
+        if reads and self.get_row_serializer() is None:
+            # Only what ?fields= / ?expand= will read, without N+1 queries
+            queryset = optimize_queryset(queryset, self.get_serializer())
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """Full-text search: /api/v1/books/search/?q=<terms>, best match first"""
+        query = request.query_params.get("q", "").strip()
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = (
+            get_search_backend(queryset.db)
+            .search(queryset, query)
+            .order_by("-search_rank", "pk")
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset[:SEARCH_RESULTS_LIMIT], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get", "post"], url_path="by-isbn")
+    def by_isbn(self, request):
+        """Resolve up to 1000 ISBNs (any ISBN-10/13 spelling) in one query:
+        /api/v1/books/by-isbn/?isbn=<isbn>,<isbn>&isbn=<isbn>, or POST
+        ``{"isbn": [...]}`` for batches too long for a URL"""
+        if request.method == "POST":
+            values = (
+                request.data.get("isbn", []) if hasattr(request.data, "get") else []
+            )
+            values = [values] if isinstance(values, str) else values
+        else:
+            values = request.query_params.getlist("isbn")
+        isbns = [
+            isbn.strip()
+            for value in values
+            if isinstance(value, str)
+            for isbn in value.split(",")
+            if isbn.strip()
+        ]
+        if not isbns:
+            return Response(
+                {"detail": "Pass one or more ISBNs as isbn."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(isbns) > MAX_ISBN_LOOKUPS:
+            return Response(
+                {"detail": f"At most {MAX_ISBN_LOOKUPS} ISBNs per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Input spelling -> canonical ISBN-13 (None if invalid), deduplicated
+        canonical = {isbn: normalize_isbn(isbn) for isbn in isbns}
+        respond = partial(self._resolve_isbns, canonical)
+        if request.method != "GET":
+            return respond()
+        etag = make_etag(
+            "by-isbn",
+            get_version(CATALOG),
+            get_version(RATINGS),
+            # The ISBN spellings, ?fields= and ?expand= all shape the body
+            params_digest(request.query_params),
+            request.accepted_renderer.format,
+        )
+        return self._conditional(request, (etag, None), respond)
+
+    def _resolve_isbns(self, canonical):
+        # Annotated, as ?fields= may leave isbn13 itself deferred
+        books = {
+            book.matched_isbn13: book
+            for book in self.get_queryset()
+            .order_by()
+            .filter(isbn13__in={isbn13 for isbn13 in canonical.values() if isbn13})
+            .annotate(matched_isbn13=F("isbn13"))
+        }
+        serialized = dict(
+            zip(books, self.get_serializer(list(books.values()), many=True).data)
+        )
+        results = [
+            {"isbn": isbn, "isbn13": isbn13, "book": serialized.get(isbn13)}
+            for isbn, isbn13 in canonical.items()
+        ]
+        found = sum(result["book"] is not None for result in results)
+        return Response({"found": found, "results": results})
+
+
+class CatalogStatsMixin:
+    """Filter and order by the maintained catalog stats columns.
+
+    ``?ordering=-average_rating`` sorts by any of ``STATS_ORDERING_FIELDS``;
+    ``?min_books=``, ``?min_ratings=`` and ``?min_rating=`` filter. Values
+    that are not numbers are ignored, as in the book list filters; ``nan`` and
+    ``inf``, which no stats column can be compared with, are a 400.
+    """
+
+    def get_queryset(self):
+        queryset = super(CatalogStatsMixin, self).get_queryset()
+        params = self.request.query_params
+
+        for param, (lookup, cast) in STATS_FILTERS.items():
+            try:
+                value = cast(params.get(param, ""))
+            except ValueError:
+                continue
+            if not math.isfinite(value):
+                raise ValidationError({param: ["A finite number is required."]})
+            queryset = queryset.filter(**{lookup: value})
+
+        ordering = params.get("ordering", "")
+        field = ordering.lstrip("-")
+        if field in NULLABLE_STATS_FIELDS:
+            # Cursor keys cannot be NULL: undated rows sort as the oldest
+            queryset = queryset.annotate(
+                **{f"{field}_key": Coalesce(field, Value(datetime.date.min))}
+            )
+            ordering = f"{ordering}_key"
+        if field in STATS_ORDERING_FIELDS:
+            queryset = queryset.order_by(ordering, "pk")
         return queryset
 
 
-class AuthorViewSet(viewsets.ModelViewSet):
+class AuthorViewSet(ConditionalGetMixin, CatalogStatsMixin, viewsets.ModelViewSet):
     """API endpoint that allows authors to be viewed or edited."""
 
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
 
 
-class PublisherViewSet(viewsets.ModelViewSet):
+class PublisherViewSet(ConditionalGetMixin, CatalogStatsMixin, viewsets.ModelViewSet):
     """API endpoint that allows publishers to be viewed or edited."""
 
     queryset = Publisher.objects.all()
     serializer_class = PublisherSerializer
 
 
-class RatingViewSet(viewsets.ModelViewSet):
+class RatingViewSet(RowSerializerMixin, viewsets.ModelViewSet):
     """API endpoint that allows publishers to be viewed or edited."""
 
     queryset = Rating.objects.all()
@@ -87,25 +390,52 @@ class RatingViewSet(viewsets.ModelViewSet):
         else:
             return super(RatingViewSet, self).update(request, *args, **kwargs)
 
-    def perform_destroy(self, instance):
-        rating_id = instance.id
-        try:
-            rating = Rating.objects.get(id=rating_id)
-            book_id = rating.book.id
-            book = Book.objects.get(id=book_id)
-        except ObjectDoesNotExist:
-            book_id = None
-            book = None
-        instance.delete()
-
-        if book and book_id:
-            rating_average = (
-                Rating.objects.filter(book_id=book_id)
-                .aggregate(Avg("rating"))
-                .get("rating__avg")
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[JSONParser, MessagePackParser, NDJSONParser],
+    )
+    def bulk(self, request):
+        """Upsert many ratings from a JSON or MessagePack array, or an NDJSON
+        stream, of ``{"user", "book", "rating", "review"}`` rows"""
+        rows = request.data
+        if isinstance(rows, (dict, str)) or not hasattr(rows, "__iter__"):
+            return Response(
+                {"detail": "Expected a list of rating objects."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            if rating_average:
-                book.average_rating = round(rating_average, 1)
-            else:
-                book.average_rating = 0
-            book.save()
+        return Response(ingest_ratings(rows, using=self.get_queryset().db))
+
+
+class ExportView(APIView):
+    """Stream a whole table as NDJSON or CSV (``?format=csv``), or the rows
+    changed shortly before ``?since=`` and after (see ``api.v1.export``)"""
+
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request, dataset):
+        try:
+            export = DATASETS[dataset]
+        except KeyError:
+            raise NotFound()
+        since = parse_since(request.query_params.get("since"))
+        if since is not None:
+            # Take in rows stamped before the last export but committed after it
+            since -= datetime.timedelta(seconds=settings.API_EXPORT_OVERLAP)
+        until = timezone.now()
+
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        content = renderer.stream(export.chunks(since, until), export.names)
+        if isinstance(request._request, ASGIRequest):
+            content = aiterate(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{dataset}.{renderer.format}"'
+        )
+        response["X-Export-Until"] = format_until(until)
+        # Let nginx pass chunks on as they come instead of buffering them
+        response["X-Accel-Buffering"] = "no"
+        return response
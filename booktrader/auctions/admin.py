@@ -1,13 +1,22 @@
+from decimal import Decimal
+
+from books.admin_tools import PaginatedTabularInline
+from books.pagination import EstimatedCountPaginator
 from django.contrib import admin
+from django.db.models import DecimalField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 from .models import Auction, Bid, WatchList
 
+CENTS = Decimal("0.01")
+
 
-class BidInline(admin.TabularInline):
+class BidInline(PaginatedTabularInline):
     model = Bid
     extra = 0
     readonly_fields = ["timestamp"]
     ordering = ["-amount"]
+    autocomplete_fields = ["bidder"]
 
 
 @admin.register(Auction)
@@ -20,10 +29,14 @@ class AuctionAdmin(admin.ModelAdmin):
         "status",
         "end_time",
     ]
+    list_select_related = ["seller"]
     list_filter = ["status", "condition", "created_at"]
     search_fields = ["title", "description", "seller__username", "book__title"]
     readonly_fields = ["created_at", "updated_at", "current_price"]
+    autocomplete_fields = ["book", "seller"]
     inlines = [BidInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ("Basic Info", {"fields": ("title", "description", "book", "seller")}),
@@ -48,17 +61,44 @@ class AuctionAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_queryset(self, request):
+        # Highest bid per row from the (auction, -amount) index
+        highest_bid = (
+            Bid.objects.filter(auction_id=OuterRef("pk"))
+            .order_by("-amount")
+            .values("amount")[:1]
+        )
+        queryset = super(AuctionAdmin, self).get_queryset(request)
+        return queryset.annotate(
+            price=Coalesce(
+                Subquery(highest_bid),
+                "starting_price",
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+        )
+
+    @admin.display(description="Current price", ordering="price")
+    def current_price(self, obj):
+        # SQLite hands back computed decimals unscaled
+        return obj.price.quantize(CENTS)
+
 
 @admin.register(Bid)
 class BidAdmin(admin.ModelAdmin):
     list_display = ["auction", "bidder", "amount", "timestamp", "is_auto_bid"]
+    list_select_related = ["auction__seller", "bidder"]
     list_filter = ["is_auto_bid", "timestamp"]
     search_fields = ["auction__title", "bidder__username"]
     readonly_fields = ["timestamp"]
+    autocomplete_fields = ["auction", "bidder"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(WatchList)
 class WatchListAdmin(admin.ModelAdmin):
     list_display = ["user", "auction", "added_at"]
+    list_select_related = ["user", "auction__seller"]
     search_fields = ["user__username", "auction__title"]
     readonly_fields = ["added_at"]
+    autocomplete_fields = ["user", "auction"]
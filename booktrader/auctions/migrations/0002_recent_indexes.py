@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0001_initial"),
+        ("books", "0010_rating_recent_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="auction_recent_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(fields=["-timestamp", "-id"], name="bid_recent_idx"),
+        ),
+    ]
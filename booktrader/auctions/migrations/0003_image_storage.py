@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:10
+
+import images.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auctions", "0002_recent_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="auction",
+            name="image1",
+            field=models.ImageField(
+                blank=True,
+                storage=images.storage.image_storage,
+                upload_to="auction_images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="auction",
+            name="image2",
+            field=models.ImageField(
+                blank=True,
+                storage=images.storage.image_storage,
+                upload_to="auction_images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="auction",
+            name="image3",
+            field=models.ImageField(
+                blank=True,
+                storage=images.storage.image_storage,
+                upload_to="auction_images/",
+            ),
+        ),
+    ]
@@ -6,6 +6,7 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
+from images.storage import image_storage
 
 
 class Auction(models.Model):
@@ -82,9 +83,15 @@ class Auction(models.Model):
     )
 
     # Images
-    image1 = models.ImageField(upload_to="auction_images/", blank=True)
-    image2 = models.ImageField(upload_to="auction_images/", blank=True)
-    image3 = models.ImageField(upload_to="auction_images/", blank=True)
+    image1 = models.ImageField(
+        upload_to="auction_images/", storage=image_storage, blank=True
+    )
+    image2 = models.ImageField(
+        upload_to="auction_images/", storage=image_storage, blank=True
+    )
+    image3 = models.ImageField(
+        upload_to="auction_images/", storage=image_storage, blank=True
+    )
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -92,6 +99,9 @@ class Auction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="auction_recent_idx"),
+        ]
 
     def __str__(self):
         return f"Auction: {self.title} by {self.seller.username}"
@@ -141,6 +151,7 @@ class Bid(models.Model):
         ordering = ["-timestamp"]
         indexes = [
             models.Index(fields=["auction", "-amount"]),
+            models.Index(fields=["-timestamp", "-id"], name="bid_recent_idx"),
         ]
 
     def __str__(self):
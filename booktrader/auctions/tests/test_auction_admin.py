@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+from decimal import Decimal
+
+from auctions.models import Auction, Bid
+from books.models import Book, Publisher
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+
+class TestAuctionAdmin(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin)
+        publisher = Publisher.objects.create(name="Test Publisher")
+        self.book = Book.objects.create(
+            title="Test Book", isbn="1234567890123", publisher=publisher
+        )
+        self.users = [User.objects.create_user(f"user{i}") for i in range(3)]
+
+    def add_auctions(self, count):
+        for i in range(count):
+            auction = Auction.objects.create(
+                title=f"Auction {i}",
+                description="A test auction",
+                book=self.book,
+                seller=self.users[i % 3],
+                condition="good",
+                starting_price=Decimal("10.00"),
+                end_time=timezone.now() + timedelta(days=7),
+                status="active",
+            )
+            for amount in ("12.00", "15.50"):
+                Bid.objects.create(
+                    auction=auction, bidder=self.users[0], amount=Decimal(amount)
+                )
+
+    def changelist(self, name):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(f"admin:auctions_{name}_changelist"))
+        assert response.status_code == 200
+        return response, len(context.captured_queries)
+
+    def test_changelists_do_not_grow_with_rows(self):
+        for name in ("auction", "bid", "watchlist"):
+            self.add_auctions(2)
+            _, few = self.changelist(name)
+            self.add_auctions(8)
+            _, many = self.changelist(name)
+            assert few == many, name
+
+    def test_current_price_is_annotated(self):
+        self.add_auctions(1)
+        Auction.objects.create(
+            title="No bids",
+            description="A test auction",
+            book=self.book,
+            seller=self.users[1],
+            condition="good",
+            starting_price=Decimal("8.00"),
+            end_time=timezone.now() + timedelta(days=7),
+        )
+        response, _ = self.changelist("auction")
+        prices = {
+            auction.title: auction.price
+            for auction in response.context["cl"].result_list
+        }
+        assert prices == {"Auction 0": Decimal("15.50"), "No bids": Decimal("8.00")}
+        self.assertContains(response, "15.50")
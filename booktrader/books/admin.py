@@ -1,23 +1,66 @@
 from django.contrib import admin
+from django.db.models import OuterRef, Subquery
+from django.http import QueryDict
 
+from .admin_tools import PaginatedTabularInline
+from .facets import get_facets
+from .filters import get_book_filters
+from .functions import StringAgg
 from .models import Author, Book, BookCondition, Publisher, Rating
+from .pagination import EstimatedCountPaginator
+from .ratings import RATING_SCORES
+from .stats import STATS_FIELDS
+
+
+class LanguageFilter(admin.SimpleListFilter):
+    """Languages from the cached book list facets, not a DISTINCT scan"""
+
+    title = "language"
+    parameter_name = "language"
+
+    def lookups(self, request, model_admin):
+        facets = get_facets(get_book_filters(QueryDict()))
+        return [(facet["value"], facet["label"]) for facet in facets["languages"]]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(language=self.value())
+        return queryset
+
+
+class RatingScoreFilter(admin.SimpleListFilter):
+    """The fixed 1-5 scores, not a DISTINCT scan of the ratings table"""
+
+    title = "rating"
+    parameter_name = "rating"
+
+    def lookups(self, request, model_admin):
+        return [(str(score), str(score)) for score in RATING_SCORES]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(rating=self.value())
+        return queryset
 
 
 class AuthorInline(admin.TabularInline):
     model = Book.authors.through
     extra = 1
+    autocomplete_fields = ["author"]
 
 
-class RatingInline(admin.TabularInline):
+class RatingInline(PaginatedTabularInline):
     model = Rating
     extra = 0
     readonly_fields = ["created_at", "updated_at"]
+    autocomplete_fields = ["user"]
 
 
-class BookConditionInline(admin.TabularInline):
+class BookConditionInline(PaginatedTabularInline):
     model = BookCondition
     extra = 0
     readonly_fields = ["created_at", "updated_at"]
+    autocomplete_fields = ["owner"]
 
 
 @admin.register(Book)
@@ -30,11 +73,15 @@ class BookAdmin(admin.ModelAdmin):
         "average_rating",
         "isbn",
     ]
-    list_filter = ["genre", "publication_date", "publisher", "language"]
+    list_select_related = ["publisher"]
+    # A publisher filter would list every publisher; search covers it
+    list_filter = ["genre", "publication_date", LanguageFilter]
     search_fields = ["title", "isbn", "authors__name", "publisher__name"]
     readonly_fields = ["average_rating", "created_at", "updated_at"]
-    filter_horizontal = ["authors"]
+    autocomplete_fields = ["authors", "publisher"]
     inlines = [RatingInline, BookConditionInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ("Basic Info", {"fields": ("title", "authors", "publisher", "description")}),
@@ -50,27 +97,49 @@ class BookAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_queryset(self, request):
+        # The page's author names in one correlated subquery per row
+        authors = (
+            Book.authors.through.objects.filter(book_id=OuterRef("pk"))
+            .order_by()
+            .values("book_id")
+            .annotate(names=StringAgg("author__name", ", "))
+            .values("names")
+        )
+        queryset = super(BookAdmin, self).get_queryset(request)
+        return queryset.annotate(author_list=Subquery(authors))
+
+    @admin.display(description="Authors")
+    def author_names(self, obj):
+        return obj.author_list or ""
+
 
 @admin.register(Author)
 class AuthorAdmin(admin.ModelAdmin):
     list_display = ["name", "birth_date", "created_at"]
     search_fields = ["name", "bio"]
-    readonly_fields = ["created_at"]
+    # Maintained by books.stats
+    readonly_fields = ["created_at", *STATS_FIELDS]
 
 
 @admin.register(Publisher)
 class PublisherAdmin(admin.ModelAdmin):
     list_display = ["name", "founded_year", "created_at"]
     search_fields = ["name"]
-    readonly_fields = ["created_at"]
+    # Maintained by books.stats
+    readonly_fields = ["created_at", *STATS_FIELDS]
 
 
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
     list_display = ["book", "user", "rating", "created_at"]
-    list_filter = ["rating", "created_at"]
+    list_select_related = ["book", "user"]
+    list_filter = [RatingScoreFilter, "created_at"]
     search_fields = ["book__title", "user__username", "review"]
     readonly_fields = ["created_at", "updated_at"]
+    autocomplete_fields = ["book", "user"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(BookCondition)
@@ -82,6 +151,10 @@ class BookConditionAdmin(admin.ModelAdmin):
         "is_available_for_trade",
         "is_available_for_auction",
     ]
+    list_select_related = ["book", "owner"]
     list_filter = ["condition", "is_available_for_trade", "is_available_for_auction"]
     search_fields = ["book__title", "owner__username"]
     readonly_fields = ["created_at", "updated_at"]
+    autocomplete_fields = ["book", "owner"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
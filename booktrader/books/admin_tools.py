@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Admin building blocks that keep change pages bounded on large tables"""
+
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.http import QueryDict
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset holding one page of the parent's related rows.
+
+    The page is picked by the ``<prefix>-page`` query parameter, which the
+    change form keeps when it posts back, so edits apply to the rows shown.
+    """
+
+    per_page = 20
+    query = QueryDict()
+
+    @property
+    def page_param(self):
+        return f"{self.prefix}-page"
+
+    def get_queryset(self):
+        if not hasattr(self, "page_obj"):
+            self.paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page_obj = self.paginator.get_page(self.query.get(self.page_param))
+        return self.page_obj.object_list
+
+    def _page_query(self, number):
+        query = self.query.copy()
+        query[self.page_param] = number
+        return query.urlencode()
+
+    @property
+    def previous_page_query(self):
+        return self._page_query(self.page_obj.previous_page_number())
+
+    @property
+    def next_page_query(self):
+        return self._page_query(self.page_obj.next_page_number())
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """``TabularInline`` that renders ``per_page`` related rows at a time"""
+
+    formset = PaginatedInlineFormSet
+    per_page = 20
+    template = "admin/edit_inline/paginated_tabular.html"
+
+    def get_formset(self, request, obj=None, **kwargs):
+        # The factory builds a new class per call, so this stays per request
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.query = request.GET
+        return formset
@@ -6,3 +6,6 @@ from django.apps import AppConfig
 class BooksConfig(AppConfig):
     name = "books"
     default_auto_field = "django.db.models.BigAutoField"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
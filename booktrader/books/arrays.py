@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""NumPy helpers shared by the offline related-books and recommendation jobs"""
+
+import itertools
+
+import numpy as np
+
+
+def fetch_columns(queryset, fields, chunk_size=10_000):
+    """Integer columns of ``queryset`` as a ``len(fields) x n`` array"""
+    rows = queryset.values_list(*fields).order_by().iterator(chunk_size=chunk_size)
+    flat = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64)
+    return flat.reshape(-1, len(fields)).T
+
+
+def csr(rows, columns, values, n_rows):
+    """CSR ``(indptr, indices, data)`` of ``(rows[i], columns[i]) = values[i]``"""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, columns[order], values[order]
+
+
+def ranges(starts, lengths):
+    """``np.concatenate([np.arange(s, s + n) for s, n in zip(starts, lengths)])``"""
+    total = int(lengths.sum())
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(total) - np.repeat(offsets - starts, lengths)
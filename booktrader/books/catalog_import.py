@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""Streaming catalog import behind ``manage.py import_catalog``.
+
+Records are read one at a time from CSV or JSON Lines and written
+``batch_size`` at a time, each batch in its own transaction:
+
+* publishers and authors are resolved through in-memory name -> id maps, and
+  only names not seen before are inserted;
+* books are upserted on the canonical ISBN-13 (``books.isbn``) with a single
+  ``INSERT ... ON CONFLICT (isbn13) DO UPDATE`` that returns every row's pk
+  (legacy books holding a row's isbn with a NULL isbn13 are given it first);
+* the author links of the batch are replaced with one DELETE and one INSERT;
+* the batch's books are reindexed for search and their authors' stats
+  refreshed.
+
+After each commit the byte offset of the next record is written to a
+checkpoint file, so an interrupted import resumes where it stopped; a batch
+replayed after a crash is harmless because every write is an upsert.
+"""
+
+import csv
+import json
+import os
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import NotSupportedError, connections, transaction
+from django.utils import timezone
+
+from .isbn import normalize_isbn
+from .models import Author, Book, Publisher
+from .search import get_search_backend
+from .stats import refresh_author_stats
+
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = {".csv": CSV, ".jsonl": JSONL, ".ndjson": JSONL}
+
+# CSV author lists are separated by "|" ("Ursula K. Le Guin|Brian Attebery")
+AUTHOR_SEPARATOR = "|"
+# Book columns an import may set, besides the publisher and the ISBN itself
+BOOK_FIELDS = (
+    "title",
+    "description",
+    "publication_date",
+    "page_count",
+    "language",
+    "genre",
+    "original_price",
+)
+GENRES = {value for value, _ in Book.GENRE_CHOICES}
+WHITESPACE = re.compile(r"\s+")
+
+csv.field_size_limit(16 * 1024 * 1024)
+
+
+class RecordError(ValueError):
+    pass
+
+
+def detect_format(path):
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def _clean_name(value):
+    return WHITESPACE.sub(" ", str(value)).strip()
+
+
+def _parse_optional(record, field, parse):
+    value = record.get(field)
+    if value is None or value == "":
+        return None
+    try:
+        return parse(value)
+    except (TypeError, ValueError, InvalidOperation):
+        raise RecordError(f"invalid {field} {value!r}")
+
+
+def parse_record(record):
+    """Validated import row for one input ``record`` (a dict).
+
+    Only fields present in ``record`` are returned, so an update leaves the
+    others alone. Raises ``RecordError``.
+    """
+    if isinstance(record, RecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise RecordError("expected an object")
+    isbn = str(record.get("isbn") or "").strip()
+    isbn13 = normalize_isbn(isbn)
+    if isbn13 is None:
+        raise RecordError(f"invalid isbn {isbn!r}")
+    title = _clean_name(record.get("title") or "")[:255]
+    publisher = _clean_name(record.get("publisher") or "")[:255]
+    if not title:
+        raise RecordError("missing title")
+    if not publisher:
+        raise RecordError("missing publisher")
+
+    row = {"isbn": isbn[:255], "isbn13": isbn13, "publisher": publisher}
+    row["title"] = title
+    if "description" in record:
+        row["description"] = str(record["description"] or "")
+    if "publication_date" in record:
+        row["publication_date"] = _parse_optional(
+            record, "publication_date", date.fromisoformat
+        )
+    if "page_count" in record:
+        page_count = _parse_optional(record, "page_count", int)
+        if page_count is not None and page_count < 0:
+            raise RecordError(f"invalid page_count {page_count!r}")
+        row["page_count"] = page_count
+    if record.get("language"):
+        row["language"] = str(record["language"]).strip()[:10]
+    if record.get("genre"):
+        genre = str(record["genre"]).strip()
+        row["genre"] = genre if genre in GENRES else "other"
+    if "original_price" in record:
+        price = _parse_optional(
+            record, "original_price", lambda value: Decimal(str(value))
+        )
+        row["original_price"] = None if price is None else round(price, 2)
+
+    if "authors" in record:
+        authors = record["authors"] or []
+        if isinstance(authors, str):
+            authors = authors.split(AUTHOR_SEPARATOR)
+        names = dict.fromkeys(_clean_name(name)[:255] for name in authors)
+        row["authors"] = [name for name in names if name]
+    return row
+
+
+def _lines(stream, offset):
+    """``(line, end_offset)`` for each line of a binary ``stream``"""
+    for line in stream:
+        # A UTF-8 byte order mark can only start the file
+        encoding = "utf-8-sig" if offset == 0 else "utf-8"
+        offset += len(line)
+        yield line.decode(encoding), offset
+
+
+class RecordReader:
+    """``(record, next_offset)`` pairs from byte ``offset`` of ``path``.
+
+    ``next_offset`` is where reading resumes after ``record``. CSV input
+    resumed mid-file needs the ``fieldnames`` read from its header row.
+    Undecodable JSON lines are yielded as ``RecordError`` instances.
+    """
+
+    def __init__(self, path, fmt, offset=0, fieldnames=None):
+        self.path = path
+        self.format = fmt
+        self.offset = offset
+        self.fieldnames = fieldnames
+
+    def __iter__(self):
+        with open(self.path, "rb") as stream:
+            stream.seek(self.offset)
+            if self.format == JSONL:
+                yield from self._jsonl(stream)
+            else:
+                yield from self._csv(stream)
+
+    def _jsonl(self, stream):
+        for line, end in _lines(stream, self.offset):
+            if line.strip():
+                try:
+                    yield json.loads(line), end
+                except json.JSONDecodeError as exc:
+                    yield RecordError(f"invalid JSON: {exc}"), end
+
+    def _csv(self, stream):
+        lines = _lines(stream, self.offset)
+        end = self.offset
+
+        def text():
+            nonlocal end
+            # csv.reader pulls exactly the lines of one record at a time
+            for line, end in lines:
+                yield line
+
+        reader = csv.reader(text())
+        if self.fieldnames is None:
+            self.fieldnames = [name.strip() for name in next(reader, [])]
+            self.offset = end
+        for values in reader:
+            if values:
+                yield dict(zip(self.fieldnames, values)), end
+
+
+class _Inserter:
+    """Multi-row ``INSERT`` of ``fields`` into ``model``, bypassing the ORM.
+
+    ``bulk_create()`` prepares every concrete column of every row, which for
+    a book is ~30 values and dominates an import. Here only ``fields`` are
+    bound per row; the other columns get their default, prepared once, and
+    ``auto_now``/``auto_now_add`` columns the statement's time. Uses
+    ``ON CONFLICT`` and ``RETURNING``, as SQLite and PostgreSQL both do.
+    """
+
+    def __init__(self, connection, model, fields):
+        self.connection = connection
+        self.model = model
+        self.fields = [model._meta.get_field(name) for name in fields]
+        self.defaults = [
+            field
+            for field in model._meta.concrete_fields
+            if not field.primary_key and field not in self.fields
+        ]
+        # Only these need converting for the database; strings and ints do not
+        self.prepared = [
+            field.get_internal_type() in ("DateField", "DateTimeField", "DecimalField")
+            for field in self.fields
+        ]
+        self.per_statement = min(
+            1000,
+            (connection.features.max_query_params or 65535)
+            // (len(self.fields) + len(self.defaults)),
+        )
+
+    def _default(self, field, now):
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+            return field.get_db_prep_save(now, self.connection)
+        return field.get_db_prep_save(field.get_default(), self.connection)
+
+    def __call__(self, rows, suffix="", returning=()):
+        """Insert ``rows`` (tuples ordered like ``fields``), then ``suffix``
+        (an ``ON CONFLICT`` clause); returns the ``returning`` columns"""
+        quote = self.connection.ops.quote_name
+        now = timezone.now()
+        defaults = tuple(self._default(field, now) for field in self.defaults)
+        columns = [*self.fields, *self.defaults]
+        placeholder = "({})".format(", ".join(["%s"] * len(columns)))
+        columns = ", ".join(quote(field.column) for field in columns)
+        if returning:
+            suffix += " RETURNING " + ", ".join(
+                quote(self.model._meta.get_field(name).column) for name in returning
+            )
+
+        prepare = [
+            (
+                (
+                    lambda value, field=field: field.get_db_prep_save(
+                        value, self.connection
+                    )
+                )
+                if prepared
+                else None
+            )
+            for field, prepared in zip(self.fields, self.prepared)
+        ]
+        results = []
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(rows), self.per_statement):
+                chunk = rows[start : start + self.per_statement]
+                params = []
+                for row in chunk:
+                    params.extend(
+                        value if convert is None else convert(value)
+                        for convert, value in zip(prepare, row)
+                    )
+                    params.extend(defaults)
+                cursor.execute(
+                    f"INSERT INTO {quote(self.model._meta.db_table)} ({columns}) "
+                    f"VALUES {', '.join([placeholder] * len(chunk))} {suffix}",
+                    params,
+                )
+                if returning:
+                    results.extend(cursor.fetchall())
+        return results
+
+
+class CatalogImporter:
+    """Writes batches of parsed rows; see the module docstring"""
+
+    def __init__(self, using="default"):
+        self.using = using
+        self.connection = connections[using]
+        if self.connection.vendor not in ("sqlite", "postgresql"):
+            raise NotSupportedError("Catalog imports need SQLite or PostgreSQL")
+        self.publishers = dict(
+            Publisher.objects.using(using).values_list("name", "pk").iterator()
+        )
+        # Author names are not unique; new books link to the oldest namesake
+        self.authors = {}
+        for name, pk in (
+            Author.objects.using(using)
+            .order_by("-pk")
+            .values_list("name", "pk")
+            .iterator()
+        ):
+            self.authors[name] = pk
+        self.touched_publishers = set()
+        self.created = self.updated = 0
+        self._inserters = {}
+
+    def _inserter(self, model, fields):
+        key = (model, fields)
+        if key not in self._inserters:
+            self._inserters[key] = _Inserter(self.connection, model, fields)
+        return self._inserters[key]
+
+    def _resolve_publishers(self, names):
+        missing = sorted(set(names).difference(self.publishers))
+        if missing:
+            self._inserter(Publisher, ("name",))(
+                [(name,) for name in missing], "ON CONFLICT DO NOTHING"
+            )
+            self.publishers.update(
+                Publisher.objects.using(self.using)
+                .filter(name__in=missing)
+                .values_list("name", "pk")
+            )
+
+    def _resolve_authors(self, names):
+        missing = sorted(set(names).difference(self.authors))
+        if missing:
+            created = self._inserter(Author, ("name",))(
+                [(name,) for name in missing], returning=("id", "name")
+            )
+            self.authors.update((name, pk) for pk, name in created)
+
+    def write(self, rows):
+        """Upsert one batch of ``parse_record()`` rows in a transaction"""
+        # The last record for an ISBN wins
+        rows = list({row["isbn13"]: row for row in rows}.values())
+        if not rows:
+            return
+        with transaction.atomic(using=self.using):
+            self._write(rows)
+
+    def _write(self, rows):
+        books = Book.objects.using(self.using)
+        links = Book.authors.through.objects.using(self.using)
+        self._resolve_publishers(row["publisher"] for row in rows)
+        self._resolve_authors(name for row in rows for name in row.get("authors", ()))
+
+        existing = dict(
+            books.filter(isbn13__in=[row["isbn13"] for row in rows]).values_list(
+                "isbn13", "publisher_id"
+            )
+        )
+        # A legacy book may hold a row's isbn spelling with isbn13 NULL (it was
+        # another book's when the column was filled). If no book holds the
+        # isbn13 now, the upsert would insert and fail on the unique isbn:
+        # give it the isbn13 first, so the upsert updates it instead
+        strays = []
+        for isbn, pk, publisher_id in books.filter(
+            isbn__in=[row["isbn"] for row in rows], isbn13__isnull=True
+        ).values_list("isbn", "pk", "publisher_id"):
+            isbn13 = normalize_isbn(isbn)
+            if isbn13 not in existing:
+                existing[isbn13] = publisher_id
+                strays.append(Book(pk=pk, isbn13=isbn13))
+        books.bulk_update(strays, ["isbn13"])
+        self.touched_publishers.update(existing.values())
+
+        # One upsert per combination of provided fields, so that an update
+        # never resets a column its record did not mention
+        groups = {}
+        for row in rows:
+            fields = tuple(field for field in BOOK_FIELDS if field in row)
+            groups.setdefault(fields, []).append(row)
+        quote = self.connection.ops.quote_name
+        book_ids = {}
+        for fields, group in groups.items():
+            # The stored isbn spelling is kept on update; isbn13 is the key
+            updated = [*fields, "publisher", "updated_at"]
+            upsert = self._inserter(Book, ("isbn", "isbn13", "publisher", *fields))
+            book_ids.update(
+                upsert(
+                    [
+                        (
+                            row["isbn"],
+                            row["isbn13"],
+                            self.publishers[row["publisher"]],
+                            *(row[field] for field in fields),
+                        )
+                        for row in group
+                    ],
+                    "ON CONFLICT ({}) DO UPDATE SET {}".format(
+                        quote("isbn13"),
+                        ", ".join(
+                            "{0} = EXCLUDED.{0}".format(
+                                quote(Book._meta.get_field(name).column)
+                            )
+                            for name in updated
+                        ),
+                    ),
+                    returning=("isbn13", "id"),
+                )
+            )
+
+        # Authors of updated books need fresh stats even if their links stay
+        author_ids = set(
+            links.filter(
+                book_id__in=[book_ids[isbn13] for isbn13 in existing]
+            ).values_list("author_id", flat=True)
+        )
+        linked = [row for row in rows if "authors" in row]
+        links.filter(
+            book_id__in=[
+                book_ids[row["isbn13"]] for row in linked if row["isbn13"] in existing
+            ]
+        ).delete()
+        new_links = [
+            (book_ids[row["isbn13"]], self.authors[name])
+            for row in linked
+            for name in row["authors"]
+        ]
+        self._inserter(Book.authors.through, ("book", "author"))(
+            new_links, "ON CONFLICT DO NOTHING"
+        )
+        author_ids.update(author_id for _, author_id in new_links)
+
+        get_search_backend(self.using).index_books(list(book_ids.values()))
+        refresh_author_stats(author_ids, using=self.using)
+        self.touched_publishers.update(
+            self.publishers[row["publisher"]] for row in rows
+        )
+        self.updated += len(existing)
+        self.created += len(rows) - len(existing)
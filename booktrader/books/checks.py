@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""System checks for the books app"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries live in one process only
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """The version counters in ``books.versions`` need a cache every process
+    shares, or changes made by other processes never invalidate pages"""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"The default cache ({backend}) is not shared between processes.",
+            hint=(
+                "Set REDIS_URL, or run on PostgreSQL to use the database cache, "
+                "so that imports, the images worker and other management "
+                "commands invalidate cached pages, facets and ETags."
+            ),
+            id="books.W001",
+        )
+    ]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""HTTP validators (``ETag`` / ``Last-Modified``) for catalog responses.
+
+Validators are derived from a row's timestamps or from the version counters
+in ``books.versions``, never from the payload itself, so a client that already
+holds the current representation is answered with 304 before anything is
+loaded, serialized or rendered.
+"""
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts, weak=False):
+    """Quoted ETag identifying ``parts``"""
+    digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def row_validators(queryset, pk, fields, variant=()):
+    """``(etag, last_modified)`` for row ``pk`` from its timestamp ``fields``.
+
+    Only ``fields`` are read. ``variant`` is mixed into the ETag to tell apart
+    representations of the same row. Returns None when there is no such row.
+    """
+    try:
+        stamps = queryset.filter(pk=pk).values_list(*fields).first()
+    except (ValidationError, ValueError, TypeError):
+        return None
+    if stamps is None:
+        return None
+    last_modified = max((stamp for stamp in stamps if stamp is not None), default=None)
+    etag = make_etag(queryset.model._meta.label_lower, pk, *stamps, *variant)
+    return etag, last_modified
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """Add the validators to a successful (or 304) response"""
+    if response.status_code not in (200, 304):
+        return response
+    if etag:
+        response.headers.setdefault("ETag", etag)
+    if last_modified:
+        response.headers.setdefault(
+            "Last-Modified", http_date(last_modified.timestamp())
+        )
+    return response
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """The 304 (or 412) response ``request``'s preconditions call for, or None"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
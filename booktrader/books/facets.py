@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Count-annotated filter facets for the book list.
+
+Each facet lists the values a filter can take together with how many books
+would match if it were selected alongside the *other* active filters (a facet
+never narrows itself, so picking one publisher still shows the alternatives).
+Results are cached under keys that embed the catalog version, so any
+Book/Author/Publisher change retires them; ``min_rating`` facets additionally
+depend on the ratings version. The versions live in the shared cache: bulk
+writers that skip model signals (``import_catalog``, ``ingest_ratings``, the
+images worker and the other management commands) bump them when they finish
+or fail, which retires facets in every process.
+"""
+
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Count
+
+from .filters import filter_books
+from .models import Book
+from .versions import CATALOG, RATINGS, aget_version, get_version
+
+FACET_CACHE_TIMEOUT = 60 * 60
+FACET_LIMIT = 500
+
+# facet name -> (filter it drives, Book field it groups by)
+FACETS = {
+    "authors": ("author", "authors__name"),
+    "publishers": ("publisher", "publisher__name"),
+    "genres": ("genre", "genre"),
+    "languages": ("language", "language"),
+}
+
+
+def _versions_needed(filters):
+    return (CATALOG, RATINGS) if filters.get("min_rating") else (CATALOG,)
+
+
+def _cache_key(filters, versions):
+    active = {name: value for name, value in filters.items() if value}
+    digest = hashlib.md5(json.dumps(active, sort_keys=True).encode("utf-8")).hexdigest()
+    return "books:facets:{}:{}".format(".".join(map(str, versions)), digest)
+
+
+def _facet_values(filters, filter_name, field):
+    queryset = filter_books(Book.objects.all(), filters, exclude=(filter_name,))
+    rows = (
+        queryset.exclude(**{f"{field}__isnull": True})
+        .values(field)
+        .annotate(count=Count("pk", distinct=True))
+        .order_by("-count", field)[:FACET_LIMIT]
+    )
+    labels = dict(Book.GENRE_CHOICES) if field == "genre" else {}
+    values = [
+        {
+            "value": row[field],
+            "label": labels.get(row[field], row[field]),
+            "count": row["count"],
+        }
+        for row in rows
+    ]
+    return sorted(values, key=lambda item: str(item["label"]).casefold())
+
+
+def compute_facets(filters):
+    return {
+        name: _facet_values(filters, filter_name, field)
+        for name, (filter_name, field) in FACETS.items()
+    }
+
+
+def get_facets(filters):
+    """Return ``{facet: [{"value", "label", "count"}, ...]}`` for ``filters``"""
+    versions = [get_version(name) for name in _versions_needed(filters)]
+    key = _cache_key(filters, versions)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filters)
+        cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
+
+
+async def aget_facets(filters):
+    """Async version of ``get_facets()``; only a cache miss leaves the loop"""
+    versions = [await aget_version(name) for name in _versions_needed(filters)]
+    key = _cache_key(filters, versions)
+    facets = await cache.aget(key)
+    if facets is None:
+        facets = await sync_to_async(compute_facets)(filters)
+        await cache.aset(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
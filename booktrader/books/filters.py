@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Book list filters shared by the list view and its facets"""
+
+import math
+
+from .search import get_search_backend
+
+BOOK_FILTER_PARAMS = (
+    "search",
+    "author",
+    "publisher",
+    "genre",
+    "language",
+    "min_rating",
+)
+
+
+def get_book_filters(params):
+    """Extract the book list filters from a ``QueryDict``"""
+    return {name: params.get(name, "").strip() for name in BOOK_FILTER_PARAMS}
+
+
+def filter_books(queryset, filters, exclude=()):
+    """Narrow ``queryset`` by ``filters``, skipping the names in ``exclude``.
+
+    The search filter only restricts the rows here; callers that want the
+    results ranked apply the search backend themselves and exclude "search".
+    """
+    active = {
+        name: value for name, value in filters.items() if value and name not in exclude
+    }
+
+    if "search" in active:
+        matches = get_search_backend(queryset.db).search(
+            queryset.model.objects.all(), active["search"]
+        )
+        queryset = queryset.filter(pk__in=matches.values("pk"))
+
+    if "author" in active:
+        queryset = queryset.filter(authors__name__icontains=active["author"])
+
+    if "publisher" in active:
+        queryset = queryset.filter(publisher__name__icontains=active["publisher"])
+
+    if "genre" in active:
+        queryset = queryset.filter(genre=active["genre"])
+
+    if "language" in active:
+        queryset = queryset.filter(language=active["language"])
+
+    if "min_rating" in active:
+        try:
+            min_rating_float = float(active["min_rating"])
+        except ValueError:
+            min_rating_float = None  # Invalid rating filter, ignore
+        # nan and inf are no values for the decimal column
+        if min_rating_float is not None and math.isfinite(min_rating_float):
+            queryset = queryset.filter(average_rating__gte=min_rating_float)
+
+    return queryset
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""Database functions that work on both SQLite and PostgreSQL"""
+
+from django.db.models import Aggregate, TextField, Value
+
+
+class StringAgg(Aggregate):
+    """Join the values of ``expression`` with ``delimiter``.
+
+    ``STRING_AGG`` on PostgreSQL, ``GROUP_CONCAT`` on SQLite; the order of
+    the values is up to the database.
+    """
+
+    function = "STRING_AGG"
+    output_field = TextField()
+
+    def __init__(self, expression, delimiter, **extra):
+        super().__init__(expression, Value(delimiter), **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, function="GROUP_CONCAT", **extra_context
+        )
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""ISBN parsing: any ISBN-10 or ISBN-13 spelling to its canonical ISBN-13.
+
+``Book.isbn`` keeps whatever was entered; ``Book.isbn13`` holds the
+canonical form (digits only, checksum verified, ISBN-10s converted), which is
+what lookups from scanners and imports match on.
+"""
+
+import re
+
+PREFIX = re.compile(r"^\s*ISBN(?:-1[03])?:?", re.IGNORECASE)
+# Hyphens (ASCII and Unicode), spaces and dots used to group ISBN digits
+SEPARATORS = re.compile(r"[\s.\-‐‑‒–]")
+ISBN10 = re.compile(r"^\d{9}[\dX]$")
+ISBN13 = re.compile(r"^97[89]\d{10}$")
+
+
+class InvalidISBN(ValueError):
+    pass
+
+
+def compact(value):
+    """``value`` without an ``ISBN`` prefix, separators or lowercase ``x``"""
+    return SEPARATORS.sub("", PREFIX.sub("", value)).upper()
+
+
+def isbn10_check_digit(digits):
+    """Check digit for the first nine digits of an ISBN-10"""
+    total = sum((10 - i) * int(d) for i, d in enumerate(digits[:9]))
+    check = (11 - total % 11) % 11
+    return "X" if check == 10 else str(check)
+
+
+def isbn13_check_digit(digits):
+    """Check digit for the first twelve digits of an ISBN-13"""
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def to_isbn13(value):
+    """Canonical ISBN-13 for ``value``; raises ``InvalidISBN``"""
+    digits = compact(value or "")
+    if ISBN13.match(digits):
+        if digits[12] != isbn13_check_digit(digits):
+            raise InvalidISBN(f"{value!r} has an invalid ISBN-13 check digit")
+        return digits
+    if ISBN10.match(digits):
+        if digits[9] != isbn10_check_digit(digits):
+            raise InvalidISBN(f"{value!r} has an invalid ISBN-10 check digit")
+        digits = "978" + digits[:9]
+        return digits + isbn13_check_digit(digits)
+    raise InvalidISBN(f"{value!r} is not an ISBN-10 or ISBN-13")
+
+
+def normalize_isbn(value):
+    """Canonical ISBN-13 for ``value``, or None if it is not a valid ISBN"""
+    try:
+        return to_isbn13(value)
+    except InvalidISBN:
+        return None
@@ -0,0 +1,110 @@
+import time
+import tracemalloc
+
+from books.models import Author, Book, Publisher
+from books.pagination import KeysetPaginator, encode_cursor, estimated_count
+from books.views import BOOK_LIST_ORDERING, BOOKS_PER_PAGE
+from django.core.management import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Avg, Count
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the book list pagination strategies against synthetic "
+        "catalogs (all generated rows are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help="Catalog sizes to measure",
+        )
+        parser.add_argument(
+            "--legacy-limit",
+            type=int,
+            default=1_000_000,
+            help="Skip the materialise-everything strategy above this size",
+        )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options["sizes"])
+        self.stdout.write(
+            f"{'books':>10} {'strategy':<14} {'page':<6} {'ms':>10} {'peak MiB':>10}"
+        )
+        with transaction.atomic():
+            publisher = Publisher.objects.create(name="Benchmark Press")
+            author = Author.objects.create(name="Benchmark Author")
+            seeded = 0
+            for size in sizes:
+                seeded = self._seed(publisher, author, seeded, size, options)
+                for label, page, func in self._strategies(size, options):
+                    elapsed, peak = self._measure(func)
+                    self.stdout.write(
+                        f"{size:>10} {label:<14} {page:<6} "
+                        f"{elapsed * 1000:>10.1f} {peak / 2**20:>10.1f}"
+                    )
+            transaction.set_rollback(True)
+
+    def _seed(self, publisher, author, start, size, options):
+        through = Book.authors.through
+        batch_size = options["batch_size"]
+        for offset in range(start, size, batch_size):
+            stop = min(offset + batch_size, size)
+            books = Book.objects.bulk_create(
+                Book(
+                    title=f"Benchmark Book {i:08d}",
+                    isbn=f"bench-{i:012d}",
+                    publisher=publisher,
+                )
+                for i in range(offset, stop)
+            )
+            through.objects.bulk_create(
+                through(book_id=book.pk, author_id=author.pk) for book in books
+            )
+        return size
+
+    def _strategies(self, size, options):
+        queryset = Book.objects.select_related("publisher").prefetch_related("authors")
+        middle = (size // BOOKS_PER_PAGE) // 2 or 1
+
+        def legacy(page):
+            books_list = list(
+                queryset.annotate(
+                    avg_rating=Avg("ratings__rating"), num_ratings=Count("ratings")
+                ).prefetch_related("ratings")
+            )
+            return Paginator(books_list, BOOKS_PER_PAGE).get_page(page)
+
+        def keyset(cursor):
+            count = estimated_count(queryset)
+            paginator = KeysetPaginator(queryset, BOOK_LIST_ORDERING, BOOKS_PER_PAGE)
+            return paginator.get_page(cursor, count=count)
+
+        # A cursor pointing at the middle of the catalog, as reached by
+        # following "Next" links (building it is not part of the timing).
+        anchor = Book.objects.order_by(*BOOK_LIST_ORDERING).values_list("title", "pk")[
+            middle * BOOKS_PER_PAGE
+        ]
+        cursor = encode_cursor(list(anchor), "n")
+
+        if size <= options["legacy_limit"]:
+            yield "legacy", "1", lambda: legacy(1)
+            yield "legacy", "middle", lambda: legacy(middle)
+        yield "keyset", "1", lambda: keyset("")
+        yield "keyset", "middle", lambda: keyset(cursor)
+
+    @staticmethod
+    def _measure(func):
+        tracemalloc.start()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak
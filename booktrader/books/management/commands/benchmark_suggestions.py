@@ -0,0 +1,64 @@
+import random
+import statistics
+import time
+import tracemalloc
+
+from books.suggestions import PrefixIndex
+from django.core.management import BaseCommand
+
+WORDS = (
+    "the of and a in to night shadow garden city river house winter summer "
+    "dragon empire stars history secret war love last first queen king "
+    "ocean mountain silent road rune glass iron golden forgotten lost "
+    "kingdom letters journey north island fire storm daughter son memory "
+    "café müller señor über naïve"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark memory footprint and lookup latency of the suggestion "
+        "prefix index on synthetic titles (no database access)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=1_000_000)
+        parser.add_argument("--queries", type=int, default=20_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        titles = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 7))).title()
+            for _ in range(options["titles"])
+        ]
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = PrefixIndex(enumerate(titles, start=1))
+        build_seconds = time.perf_counter() - started
+        size, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        queries = []
+        for _ in range(options["queries"]):
+            word = rng.choice(WORDS)
+            queries.append(word[: rng.randint(2, len(word))] if len(word) > 2 else word)
+
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, limit=5)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+
+        def percentile(fraction):
+            return latencies[int(fraction * (len(latencies) - 1))] * 1e6
+
+        self.stdout.write(f"titles:          {options['titles']:,}")
+        self.stdout.write(f"build:           {build_seconds:.2f} s")
+        self.stdout.write(f"resident:        {size / 2**20:.1f} MiB")
+        self.stdout.write(f"build peak:      {peak / 2**20:.1f} MiB")
+        self.stdout.write(f"lookup mean:     {statistics.mean(latencies) * 1e6:.1f} µs")
+        self.stdout.write(f"lookup p50:      {percentile(0.50):.1f} µs")
+        self.stdout.write(f"lookup p99:      {percentile(0.99):.1f} µs")
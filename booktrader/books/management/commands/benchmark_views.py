@@ -0,0 +1,145 @@
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the books views under uvicorn (ASGI) and report throughput "
+        "and tail latency per concurrency level"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--paths",
+            nargs="+",
+            default=["/books/", "/books/search-suggestions/?q=the"],
+            help="Request paths to cycle through",
+        )
+        parser.add_argument(
+            "--concurrency", nargs="+", type=int, default=[50, 200, 1000]
+        )
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--port", type=int, default=0)
+
+    def handle(self, *args, **options):
+        port = options["port"] or self._free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "core.asgi:application",
+                "--port",
+                str(port),
+                "--workers",
+                str(options["workers"]),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ]
+        )
+        try:
+            asyncio.run(self._wait_for(port, server))
+            self.stdout.write(
+                f"{'path':<32} {'conns':>6} {'req/s':>10} {'p50 ms':>9} "
+                f"{'p99 ms':>9} {'errors':>7}"
+            )
+            for path in options["paths"]:
+                for concurrency in options["concurrency"]:
+                    latencies, errors, elapsed = asyncio.run(
+                        self._load(port, path, concurrency, options["duration"])
+                    )
+                    self._report(path, concurrency, latencies, errors, elapsed)
+        finally:
+            server.terminate()
+            server.wait()
+
+    @staticmethod
+    def _free_port():
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    async def _wait_for(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("uvicorn exited before accepting connections")
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                await asyncio.sleep(0.1)
+                continue
+            writer.close()
+            return
+        raise CommandError("uvicorn did not start in time")
+
+    async def _load(self, port, path, concurrency, duration):
+        request = (
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + duration
+
+        async def client():
+            nonlocal errors
+            reader = writer = None
+            while time.perf_counter() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(
+                            "127.0.0.1", port
+                        )
+                    started = time.perf_counter()
+                    writer.write(request)
+                    status = await self._read_response(reader)
+                    latencies.append(time.perf_counter() - started)
+                    if status >= 400:
+                        errors += 1
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+    @staticmethod
+    async def _read_response(reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = dict(line.lower().split(":", 1) for line in lines[1:] if ":" in line)
+        if "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").strip() == "chunked":
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        return status
+
+    def _report(self, path, concurrency, latencies, errors, elapsed):
+        if not latencies:
+            self.stdout.write(f"{path:<32} {concurrency:>6} no completed requests")
+            return
+        latencies.sort()
+        p99 = latencies[int(0.99 * (len(latencies) - 1))]
+        self.stdout.write(
+            f"{path:<32} {concurrency:>6} {len(latencies) / elapsed:>10.1f} "
+            f"{statistics.median(latencies) * 1000:>9.1f} {p99 * 1000:>9.1f} "
+            f"{errors:>7}"
+        )
@@ -0,0 +1,791 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from decimal import Decimal
+from itertools import islice
+
+from auctions.models import Auction, Bid
+from books.models import Author, Book, BookCondition, Publisher
+from books.search import get_search_backend
+from books.stats import refresh_author_stats, refresh_publisher_stats
+from books.versions import CATALOG, RATINGS, bump_version
+from django.contrib.auth.models import User
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+from trades.models import Trade, TradeItem, TradeMessage, TradeOffer
+from users.models import UserProfile, UserReputation
+
+# Row counts at --scale 1 (about 1.1M rows including bids, items and messages)
+DEFAULT_COUNTS = {
+    "publishers": 500,
+    "authors": 20_000,
+    "books": 100_000,
+    "users": 25_000,
+    "copies": 150_000,
+    "auctions": 40_000,
+    "trades": 30_000,
+}
+
+WORDS = (
+    "shadow garden city river house winter summer dragon empire stars secret "
+    "war love queen king ocean mountain silent road glass iron golden lost "
+    "kingdom letters journey north island fire storm daughter memory night "
+    "library map clock harbor orchard lantern signal archive frontier"
+).split()
+FIRST_NAMES = (
+    "Ada Alan Beatrix Carlos Chen Dara Elena Farah Grace Hiro Ines Jonas Kwame "
+    "Lena Malik Nadia Omar Priya Quinn Rosa Sven Tariq Uma Viktor Wen Yara Zoe"
+).split()
+LAST_NAMES = (
+    "Abara Becker Castillo Dubois Eriksen Fischer Garcia Haddad Ito Jensen "
+    "Kowalski Larsen Moreau Nakamura Okafor Petrov Quispe Rossi Santos Tanaka "
+    "Umarov Vargas Weber Xu Yilmaz Zhang"
+).split()
+CITIES = (
+    ("Portland", "OR"),
+    ("Austin", "TX"),
+    ("Chicago", "IL"),
+    ("Boston", "MA"),
+    ("Denver", "CO"),
+    ("Seattle", "WA"),
+    ("Atlanta", "GA"),
+    ("Madison", "WI"),
+)
+CONDITIONS = [value for value, _ in BookCondition.CONDITION_CHOICES]
+GENRES = [value for value, _ in Book.GENRE_CHOICES]
+LANGUAGES = ["en"] * 16 + ["es", "fr", "de", "it"]
+# Author/publisher stats start empty and are computed once everything is in
+STATS_COLUMNS = ("book_count", "rating_count", "rating_sum", "average_rating")
+EMPTY_STATS = (0, 0, 0, Decimal("0.0"))
+
+AUCTION_STATUSES = (
+    ("active", 30),
+    ("ended", 20),
+    ("sold", 40),
+    ("cancelled", 5),
+    ("draft", 5),
+)
+TRADE_STATUSES = (
+    ("proposed", 20),
+    ("counter_offered", 10),
+    ("accepted", 10),
+    ("in_progress", 10),
+    ("completed", 40),
+    ("cancelled", 8),
+    ("disputed", 2),
+)
+
+
+def isbn13(number):
+    """A valid 979-8 ISBN-13 that is unique per ``number``"""
+    digits = f"9798{number:08d}"
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+
+def money(cents):
+    return Decimal(cents) / 100
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic marketplace (catalog, users, "
+        "copies, auctions with bids, trades, reputation) for benchmarking"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiply every default row count",
+        )
+        for name, count in DEFAULT_COUNTS.items():
+            parser.add_argument(f"--{name}", type=int, help=f"Default {count:,}")
+        parser.add_argument(
+            "--as-of",
+            type=date.fromisoformat,
+            default=date.today(),
+            help="Date the generated history leads up to (YYYY-MM-DD)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        self.using = options["database"]
+        self.connection = connections[self.using]
+        self.seed = options["seed"]
+        self.batch_size = options["batch_size"]
+        self.now = datetime.combine(options["as_of"], dt_time(12), timezone.utc)
+        self.counts = {
+            name: (
+                options[name]
+                if options[name] is not None
+                else max(1, round(count * options["scale"]))
+            )
+            for name, count in DEFAULT_COUNTS.items()
+        }
+        if self.counts["auctions"] or self.counts["trades"]:
+            if self.counts["users"] < 2 or self.counts["books"] < 1:
+                raise CommandError("Auctions and trades need two users and a book")
+
+        self.use_copy = self._supports_copy()
+        self.stdout.write(
+            f"Writing with {'COPY' if self.use_copy else 'bulk_create'} "
+            f"(seed {self.seed}, as of {options['as_of']})"
+        )
+        started = time.perf_counter()
+        self.written = 0
+        with transaction.atomic(using=self.using), self._explicit_timestamps():
+            self._generate()
+            self._reset_sequences()
+
+        self.stdout.write("Indexing books for search...")
+        get_search_backend(self.using).index_books(list(self.book_ids))
+        self.stdout.write("Updating author and publisher stats...")
+        refresh_author_stats(using=self.using)
+        refresh_publisher_stats(using=self.using)
+        bump_version(CATALOG)
+        bump_version(RATINGS)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {self.written:,} rows in {elapsed:.1f}s "
+                f"({self.written / elapsed:,.0f} rows/s). "
+                "Run generate_random_ratings to add ratings."
+            )
+        )
+
+    # Writing
+
+    def _supports_copy(self):
+        if self.connection.vendor != "postgresql":
+            return False
+        with self.connection.cursor() as cursor:
+            return hasattr(cursor.cursor, "copy")  # psycopg 3
+
+    @contextmanager
+    def _explicit_timestamps(self):
+        # bulk_create() would stamp auto_now(_add) fields with the current time
+        fields = [
+            field
+            for model in self.models
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+            or getattr(field, "auto_now_add", False)
+        ]
+        saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+        for field in fields:
+            field.auto_now = field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field, auto_now, auto_now_add in saved:
+                field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+    def _next_pk(self, model):
+        return (model.objects.using(self.using).aggregate(pk=Max("pk"))["pk"] or 0) + 1
+
+    def _write(self, model, fields, rows):
+        """Insert ``rows`` (tuples ordered like ``fields``) into ``model``"""
+        started = time.perf_counter()
+        count = 0
+        if self.use_copy:
+            quote = self.connection.ops.quote_name
+            columns = ", ".join(
+                quote(model._meta.get_field(name).column) for name in fields
+            )
+            sql = f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN"
+            with self.connection.cursor() as cursor:
+                with cursor.cursor.copy(sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                        count += 1
+        else:
+            attnames = [model._meta.get_field(name).attname for name in fields]
+            objects = model.objects.using(self.using)
+            rows = iter(rows)
+            while batch := list(islice(rows, self.batch_size)):
+                objects.bulk_create(
+                    [model(**dict(zip(attnames, row))) for row in batch],
+                    batch_size=self.batch_size,
+                )
+                count += len(batch)
+
+        self.written += count
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  {model._meta.db_table:<28} {count:>10,} rows {elapsed:>7.1f}s"
+        )
+
+    def _reset_sequences(self):
+        statements = self.connection.ops.sequence_reset_sql(no_style(), self.models)
+        if statements:
+            with self.connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    # Generation
+
+    models = [
+        Publisher,
+        Author,
+        Book,
+        Book.authors.through,
+        User,
+        UserProfile,
+        BookCondition,
+        Auction,
+        Bid,
+        Trade,
+        TradeItem,
+        TradeMessage,
+        TradeOffer,
+        UserReputation,
+    ]
+
+    def rng(self, name):
+        # One stream per table: changing one count leaves the others alone
+        return random.Random(f"{self.seed}:{name}")
+
+    def past(self, rng, days):
+        return self.now - timedelta(seconds=rng.randrange(days * 86_400))
+
+    def _generate(self):
+        self.publisher_ids = self._ids(Publisher, self.counts["publishers"])
+        self.author_ids = self._ids(Author, self.counts["authors"])
+        self.book_ids = self._ids(Book, self.counts["books"])
+        self.user_ids = self._ids(User, self.counts["users"])
+        self.auction_ids = self._ids(Auction, self.counts["auctions"])
+        self.trade_ids = self._ids(Trade, self.counts["trades"])
+        if self.book_ids and not self.publisher_ids:
+            raise CommandError("Books need at least one publisher")
+
+        self._write(
+            Publisher,
+            (
+                "id",
+                "name",
+                "website",
+                "founded_year",
+                *STATS_COLUMNS,
+                "created_at",
+                "updated_at",
+            ),
+            self._publishers(),
+        )
+        self._write(
+            Author,
+            (
+                "id",
+                "name",
+                "bio",
+                "birth_date",
+                "death_date",
+                "website",
+                *STATS_COLUMNS,
+                "created_at",
+                "updated_at",
+            ),
+            self._authors(),
+        )
+        self._write(
+            Book,
+            (
+                "id",
+                "title",
+                "description",
+                "publisher_id",
+                "isbn",
+                "isbn13",
+                "publication_date",
+                "page_count",
+                "language",
+                "genre",
+                "average_rating",
+                "rating_count",
+                "rating_sum",
+                "rating_1_count",
+                "rating_2_count",
+                "rating_3_count",
+                "rating_4_count",
+                "rating_5_count",
+                "original_price",
+                "cover_image",
+                "created_at",
+                "updated_at",
+            ),
+            self._books(),
+        )
+        self._write(
+            Book.authors.through,
+            ("book_id", "author_id"),
+            self._book_authors(),
+        )
+        self._write(
+            User,
+            (
+                "id",
+                "password",
+                "last_login",
+                "is_superuser",
+                "username",
+                "first_name",
+                "last_name",
+                "email",
+                "is_staff",
+                "is_active",
+                "date_joined",
+            ),
+            self._users(),
+        )
+        self._write(
+            UserProfile,
+            (
+                "user_id",
+                "phone_number",
+                "address_line1",
+                "address_line2",
+                "city",
+                "state",
+                "postal_code",
+                "country",
+                "bio",
+                "avatar",
+                "date_of_birth",
+                "preferred_genres",
+                "willing_to_ship_internationally",
+                "max_shipping_distance_miles",
+                "reputation_score",
+                "email_notifications",
+                "is_verified",
+                "created_at",
+                "updated_at",
+            ),
+            self._profiles(),
+        )
+        self._write(
+            BookCondition,
+            (
+                "book_id",
+                "owner_id",
+                "condition",
+                "condition_notes",
+                "acquired_date",
+                "purchase_price",
+                "is_available_for_trade",
+                "is_available_for_auction",
+                "created_at",
+                "updated_at",
+            ),
+            self._copies(),
+        )
+
+        self.sold_auctions = []  # (auction, seller, buyer, ended)
+        self._write(
+            Auction,
+            (
+                "id",
+                "title",
+                "description",
+                "book_id",
+                "seller_id",
+                "condition",
+                "condition_notes",
+                "starting_price",
+                "reserve_price",
+                "buy_now_price",
+                "start_time",
+                "end_time",
+                "status",
+                "shipping_cost",
+                "ships_to_countries",
+                "image1",
+                "image2",
+                "image3",
+                "created_at",
+                "updated_at",
+            ),
+            self._auctions(),
+        )
+        self._write(
+            Bid,
+            (
+                "auction_id",
+                "bidder_id",
+                "amount",
+                "timestamp",
+                "is_auto_bid",
+                "max_bid_amount",
+            ),
+            self._bids(),
+        )
+
+        self.completed_trades = []  # (trade, initiator, responder, completed)
+        self._write(
+            Trade,
+            (
+                "id",
+                "initiator_id",
+                "responder_id",
+                "title",
+                "description",
+                "status",
+                "initiator_pays_shipping",
+                "responder_pays_shipping",
+                "cash_difference",
+                "proposed_at",
+                "accepted_at",
+                "completed_at",
+                "expires_at",
+            ),
+            self._trades(),
+        )
+        self._write(
+            TradeItem,
+            (
+                "trade_id",
+                "book_id",
+                "owner_id",
+                "condition",
+                "condition_notes",
+                "estimated_value",
+                "image1",
+                "image2",
+            ),
+            self._trade_items(),
+        )
+        self._write(
+            TradeMessage,
+            ("trade_id", "sender_id", "message", "timestamp", "is_system_message"),
+            self._trade_messages(),
+        )
+        self._write(
+            TradeOffer,
+            (
+                "trade_id",
+                "offered_by_id",
+                "description",
+                "cash_difference",
+                "created_at",
+                "is_active",
+            ),
+            self._trade_offers(),
+        )
+        self._write(
+            UserReputation,
+            (
+                "user_id",
+                "reputation_type",
+                "points",
+                "description",
+                "created_at",
+                "related_auction_id",
+                "related_trade_id",
+            ),
+            self._reputation(),
+        )
+
+    def _ids(self, model, count):
+        start = self._next_pk(model)
+        return range(start, start + count)
+
+    def _publishers(self):
+        rng = self.rng("publishers")
+        for pk in self.publisher_ids:
+            name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Press {pk}"
+            founded = rng.randint(1850, 2020)
+            created = self.past(rng, 3650)
+            yield pk, name, "", founded, *EMPTY_STATS, created, created
+
+    def _authors(self):
+        rng = self.rng("authors")
+        for pk in self.author_ids:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            born = date(1900, 1, 1) + timedelta(days=rng.randrange(36_500))
+            created = self.past(rng, 3650)
+            yield pk, name, "", born, None, "", *EMPTY_STATS, created, created
+
+    def _books(self):
+        rng = self.rng("books")
+        for pk in self.book_ids:
+            words = rng.sample(WORDS, rng.randint(1, 5))
+            title = " ".join(["The", *words] if rng.random() < 0.3 else words).title()
+            description = " ".join(
+                rng.choices(WORDS, k=rng.randint(20, 60))
+            ).capitalize()
+            created = self.past(rng, 1825)
+            isbn = isbn13(pk)
+            yield (
+                pk,
+                title,
+                description + ".",
+                rng.choice(self.publisher_ids),
+                isbn,
+                isbn,  # already canonical
+                date(1950, 1, 1) + timedelta(days=rng.randrange(27_000)),
+                rng.randint(80, 1200),
+                rng.choice(LANGUAGES),
+                rng.choice(GENRES),
+                Decimal("0.0"),
+                *[0] * 7,  # rating count, sum and 1-5 star histogram
+                money(rng.randint(499, 6999)),
+                "",
+                created,
+                created,
+            )
+
+    def _book_authors(self):
+        rng = self.rng("book_authors")
+        if not self.author_ids:
+            return
+        for book_id in self.book_ids:
+            count = min(len(self.author_ids), weighted(rng, ((1, 80), (2, 15), (3, 5))))
+            for author_id in rng.sample(self.author_ids, count):
+                yield book_id, author_id
+
+    def _users(self):
+        rng = self.rng("users")
+        for pk in self.user_ids:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f"{first.lower()}.{last.lower()}.{pk}"
+            joined = self.past(rng, 1825)
+            # "!" is an unusable password: synthetic accounts cannot log in
+            yield (
+                pk,
+                "!",
+                None,
+                False,
+                username,
+                first,
+                last,
+                f"{username}@example.com",
+                False,
+                True,
+                joined,
+            )
+
+    def _profiles(self):
+        rng = self.rng("profiles")
+        for user_id in self.user_ids:
+            city, state = rng.choice(CITIES)
+            created = self.past(rng, 1825)
+            yield (
+                user_id,
+                f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+                f"{rng.randint(1, 9999)} {rng.choice(WORDS).title()} St",
+                "",
+                city,
+                state,
+                f"{rng.randint(10000, 99999)}",
+                "US",
+                "",
+                None,
+                None,
+                ",".join(rng.sample(GENRES, rng.randint(0, 3))),
+                rng.random() < 0.2,
+                rng.choice([None, 100, 500, 1000]),
+                Decimal(rng.randint(30, 50)) / 10,
+                rng.random() < 0.8,
+                rng.random() < 0.6,
+                created,
+                created,
+            )
+
+    def _copies(self):
+        rng = self.rng("copies")
+        if not self.user_ids or not self.book_ids:
+            return
+        per_user, remainder = divmod(self.counts["copies"], len(self.user_ids))
+        for index, owner_id in enumerate(self.user_ids):
+            count = min(per_user + (index < remainder), len(self.book_ids))
+            for book_id in rng.sample(self.book_ids, count):
+                created = self.past(rng, 1095)
+                yield (
+                    book_id,
+                    owner_id,
+                    rng.choice(CONDITIONS),
+                    "",
+                    created.date(),
+                    money(rng.randint(100, 4000)),
+                    rng.random() < 0.3,
+                    rng.random() < 0.1,
+                    created,
+                    created,
+                )
+
+    def _auctions(self):
+        rng = self.rng("auctions")
+        self.auction_plans = []  # (auction, seller, starting, status, start, end)
+        for pk in self.auction_ids:
+            status = weighted(rng, AUCTION_STATUSES)
+            if status == "active":
+                start = self.now - timedelta(seconds=rng.randrange(6 * 86_400))
+            elif status == "draft":
+                start = self.now + timedelta(days=rng.randint(1, 14))
+            else:
+                start = self.past(rng, 730) - timedelta(days=7)
+            end = start + timedelta(days=rng.choice([3, 5, 7, 10]))
+            starting = money(rng.randint(100, 3000))
+            seller = rng.choice(self.user_ids)
+            self.auction_plans.append((pk, seller, starting, status, start, end))
+            book_id = rng.choice(self.book_ids)
+            updated = min(end, self.now) if start < self.now else start
+            reserve = starting * 2 if status == "ended" else None
+            buy_now = starting * 4 if rng.random() < 0.3 else None
+            yield (
+                pk,
+                f"Auction {pk}: {' '.join(rng.sample(WORDS, 3)).title()}",
+                "Synthetic listing.",
+                book_id,
+                seller,
+                rng.choice(CONDITIONS),
+                "",
+                starting,
+                reserve,
+                buy_now,
+                start,
+                end,
+                status,
+                money(rng.choice([0, 399, 499, 999])),
+                "US",
+                "",
+                "",
+                "",
+                start - timedelta(hours=1),
+                updated,
+            )
+
+    def _bids(self):
+        rng = self.rng("bids")
+        bid_counts = {"active": (0, 12), "sold": (2, 20), "ended": (0, 4)}
+        for pk, seller, starting, status, start, end in self.auction_plans:
+            low, high = bid_counts.get(status, (0, 0))
+            count = rng.randint(low, high)
+            if not count:
+                continue
+            # Bids climb from the starting price in 3-12% steps, at ordered
+            # moments between the start and the end (or now, if still open)
+            window = (min(end, self.now) - start).total_seconds()
+            moments = sorted(rng.uniform(0, window) for _ in range(count))
+            amount, bidder = starting, None
+            for moment in moments:
+                step = max(Decimal("0.50"), amount * Decimal(rng.randint(3, 12)) / 100)
+                amount = (amount + step).quantize(Decimal("0.01"))
+                previous, bidder = bidder, rng.choice(self.user_ids)
+                while bidder in (seller, previous) and len(self.user_ids) > 2:
+                    bidder = rng.choice(self.user_ids)
+                auto = rng.random() < 0.2
+                ceiling = (amount * Decimal("1.3")).quantize(Decimal("0.01"))
+                yield (
+                    pk,
+                    bidder,
+                    amount,
+                    start + timedelta(seconds=moment),
+                    auto,
+                    ceiling if auto else None,
+                )
+            if status == "sold" and bidder != seller:
+                self.sold_auctions.append((pk, seller, bidder, end))
+
+    def _trades(self):
+        rng = self.rng("trades")
+        self.trade_plans = []  # (trade, initiator, responder, status, proposed)
+        for pk in self.trade_ids:
+            initiator, responder = rng.sample(self.user_ids, 2)
+            status = weighted(rng, TRADE_STATUSES)
+            proposed = self.past(rng, 730)
+            accepted = completed = None
+            if status in ("accepted", "in_progress", "completed", "disputed"):
+                accepted = proposed + timedelta(hours=rng.randint(1, 96))
+            if status == "completed":
+                completed = accepted + timedelta(days=rng.randint(2, 21))
+                self.completed_trades.append((pk, initiator, responder, completed))
+            self.trade_plans.append((pk, initiator, responder, status, proposed))
+            yield (
+                pk,
+                initiator,
+                responder,
+                f"Trade {pk}",
+                "",
+                status,
+                rng.random() < 0.9,
+                rng.random() < 0.9,
+                money(rng.randint(-1500, 1500)) if rng.random() < 0.3 else Decimal(0),
+                proposed,
+                accepted,
+                completed,
+                proposed + timedelta(days=14),
+            )
+
+    def _trade_items(self):
+        rng = self.rng("trade_items")
+        for pk, initiator, responder, _, _ in self.trade_plans:
+            sizes = rng.randint(1, 3), rng.randint(1, 3)
+            books = rng.sample(self.book_ids, min(sum(sizes), len(self.book_ids)))
+            owners = [initiator] * sizes[0] + [responder] * sizes[1]
+            for book_id, owner in zip(books, owners):
+                yield (
+                    pk,
+                    book_id,
+                    owner,
+                    rng.choice(CONDITIONS),
+                    "",
+                    money(rng.randint(300, 5000)),
+                    "",
+                    "",
+                )
+
+    def _trade_messages(self):
+        rng = self.rng("trade_messages")
+        for pk, initiator, responder, status, proposed in self.trade_plans:
+            moment = proposed
+            for index in range(rng.randint(1, 8)):
+                moment += timedelta(minutes=rng.randint(5, 2880))
+                sender = initiator if index % 2 == 0 else responder
+                text = " ".join(rng.choices(WORDS, k=rng.randint(4, 20))).capitalize()
+                yield pk, sender, text + ".", moment, False
+            if status in ("accepted", "completed"):
+                yield pk, initiator, "Trade accepted.", moment, True
+
+    def _trade_offers(self):
+        rng = self.rng("trade_offers")
+        for pk, initiator, responder, status, proposed in self.trade_plans:
+            count = 1 + (rng.randint(1, 2) if status == "counter_offered" else 0)
+            for index in range(count):
+                yield (
+                    pk,
+                    initiator if index % 2 == 0 else responder,
+                    "Counter offer" if index else "Initial offer",
+                    money(rng.randint(-1000, 1000)),
+                    proposed + timedelta(hours=index * rng.randint(1, 48)),
+                    index == count - 1,
+                )
+
+    def _reputation(self):
+        rng = self.rng("reputation")
+        for pk, initiator, responder, completed in self.completed_trades:
+            for user in (initiator, responder):
+                yield user, "trade_complete", Decimal("1.0"), "", completed, None, pk
+                roll = rng.random()
+                if roll < 0.5:
+                    yield user, "positive_feedback", Decimal(
+                        "0.5"
+                    ), "", completed, None, pk
+                elif roll < 0.6:
+                    yield user, "negative_feedback", Decimal(
+                        "-1.0"
+                    ), "", completed, None, pk
+        for pk, seller, buyer, ended in self.sold_auctions:
+            yield seller, "auction_complete", Decimal("1.0"), "", ended, pk, None
+            if rng.random() < 0.6:
+                yield buyer, "positive_feedback", Decimal("0.5"), "", ended, pk, None
@@ -1,24 +1,146 @@
-import logging
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
+import django
 from books.models import Book, Rating
+from books.ratings import rebuild_all_rating_stats
+from books.versions import RATINGS, bump_version
 from django.contrib.auth.models import User
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import connections, transaction
 
-logger = logging.getLogger(__name__)
+USERS_PER_CHUNK = 100
+
+
+def generate_chunk(user_ids, book_ids, density, seed, batch_size, using):
+    """Insert the ratings of ``user_ids``; returns how many were written.
+
+    Every user draws from its own ``Random(f"{seed}:{user_id}")``, so the
+    result does not depend on how users are split into chunks or workers.
+    """
+    per_user = round(len(book_ids) * density)
+
+    def ratings():
+        for user_id in user_ids:
+            rng = random.Random(f"{seed}:{user_id}")
+            for book_id in rng.sample(book_ids, per_user):
+                yield Rating(user_id=user_id, book_id=book_id, rating=rng.randint(1, 5))
+
+    written = 0
+    rows = ratings()
+    while batch := list(islice(rows, batch_size)):
+        with transaction.atomic(using=using):
+            Rating.objects.using(using).bulk_create(batch, batch_size=batch_size)
+        written += len(batch)
+    return written
 
 
 class Command(BaseCommand):
-    help = "Generate randomized ratings for all books and users (!! deletes all existing ratings !!)"
+    help = (
+        "Generate randomized ratings for users and books "
+        "(!! deletes all existing ratings !!)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, help="Rate with the first N users (default: all)"
+        )
+        parser.add_argument(
+            "--books", type=int, help="Rate the first N books (default: all)"
+        )
+        parser.add_argument(
+            "--density",
+            type=float,
+            default=1.0,
+            help="Fraction of the books each user rates (0-1)",
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Seed for reproducible datasets (default: random)"
+        )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes inserting disjoint user pk ranges",
+        )
+        parser.add_argument("--database", default="default")
 
     def handle(self, *args, **options):
-        Rating.objects.all().delete()
-        for user in User.objects.all():
-            for book in Book.objects.all():
-                random_rating = random.randint(0, 5)
-                rating = Rating.objects.create(
-                    rating=random_rating,
-                    user=user,
-                    book=book,
+        using = options["database"]
+        self.verbosity = options["verbosity"]
+        density = options["density"]
+        if not 0 <= density <= 1:
+            raise CommandError("--density must be between 0 and 1")
+        seed = options["seed"]
+        if seed is None:
+            seed = random.randrange(2**32)
+
+        users = User.objects.using(using).order_by("pk").values_list("pk", flat=True)
+        books = Book.objects.using(using).order_by("pk").values_list("pk", flat=True)
+        user_ids = list(users[: options["users"]] if options["users"] else users)
+        book_ids = list(books[: options["books"]] if options["books"] else books)
+        chunks = [
+            user_ids[start : start + USERS_PER_CHUNK]
+            for start in range(0, len(user_ids), USERS_PER_CHUNK)
+        ]
+        expected = len(user_ids) * round(len(book_ids) * density)
+        self.stdout.write(
+            f"Generating {expected:,} ratings for {len(user_ids):,} users x "
+            f"{len(book_ids):,} books (density {density}, seed {seed})"
+        )
+
+        started = time.perf_counter()
+        # The old ratings are gone once the DELETE runs, whatever happens next
+        try:
+            with connections[using].cursor() as cursor:
+                # A plain DELETE: Rating.objects.delete() would load every row to
+                # send post_delete signals.
+                cursor.execute(
+                    "DELETE FROM %s"
+                    % connections[using].ops.quote_name(Rating._meta.db_table)
                 )
-                print(f"Generated rating: {rating}")
+
+            workers = options["workers"]
+            if connections[using].vendor == "sqlite":
+                workers = 1  # a single writer; extra processes would only wait
+            args = (book_ids, density, seed, options["batch_size"], using)
+            written = 0
+            if workers > 1:
+                # Forked workers must not share the parent's connections; spawned
+                # ones need Django set up before the first task is unpickled.
+                connections.close_all()
+                with ProcessPoolExecutor(workers, initializer=django.setup) as executor:
+                    futures = [
+                        executor.submit(generate_chunk, c, *args) for c in chunks
+                    ]
+                    for done, future in enumerate(futures, start=1):
+                        written += future.result()
+                        self._progress(done, len(chunks), written, started)
+            else:
+                for done, chunk in enumerate(chunks, start=1):
+                    written += generate_chunk(chunk, *args)
+                    self._progress(done, len(chunks), written, started)
+
+            self.stdout.write("Updating book rating aggregates...")
+            rebuild_all_rating_stats(using=using)
+        finally:
+            bump_version(RATINGS)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {written:,} ratings in {elapsed:.1f}s (seed {seed})"
+            )
+        )
+
+    def _progress(self, done, total, written, started):
+        if self.verbosity < 1:
+            return
+        if done != total and done % max(1, total // 20):
+            return
+        rate = written / max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(
+            f"  {done}/{total} user chunks, {written:,} ratings ({rate:,.0f}/s)"
+        )
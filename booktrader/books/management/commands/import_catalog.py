@@ -0,0 +1,154 @@
+import json
+import os
+import time
+
+from books.catalog_import import (
+    FORMATS,
+    CatalogImporter,
+    RecordError,
+    RecordReader,
+    detect_format,
+    parse_record,
+)
+from books.stats import refresh_publisher_stats
+from books.versions import CATALOG, bump_version
+from django.core.management import BaseCommand, CommandError
+
+PROGRESS_INTERVAL = 5  # seconds between progress lines
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream books from a CSV or JSON Lines file into the catalog, upserting "
+        "on ISBN. Columns: isbn, title, publisher, authors ('|'-separated in "
+        "CSV, a list in JSONL), description, publication_date (YYYY-MM-DD), "
+        "page_count, language, genre, original_price. Progress is checkpointed "
+        "after every batch and an interrupted import resumes from it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+        parser.add_argument("--batch-size", type=int, default=2_000)
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (default: <path>.checkpoint)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the top",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or detect_format(path)
+        if fmt is None:
+            raise CommandError("Cannot tell the format; pass --format csv|jsonl")
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+        checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+        self.path = path
+
+        state = self._load_checkpoint(checkpoint_path, path, options["restart"])
+        importer = CatalogImporter(using=options["database"])
+        importer.touched_publishers.update(state["publishers"])
+        reader = RecordReader(path, fmt, state["offset"], state["fieldnames"])
+        if state["rows"]:
+            self.stdout.write(f"Resuming after row {state['rows']:,}")
+
+        started = last_report = time.perf_counter()
+        rows_at_start = state["rows"]
+        batch = []
+        # Batches commit as they go, so even an interrupted import has changed
+        # the catalog that cached pages and facets were built from
+        try:
+            for record, offset in reader:
+                state["rows"] += 1
+                try:
+                    batch.append(parse_record(record))
+                except RecordError as exc:
+                    state["skipped"] += 1
+                    if state["skipped"] <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(f"Row {state['rows']:,}: {exc}")
+                if len(batch) >= options["batch_size"]:
+                    importer.write(batch)
+                    batch = []
+                    self._save_checkpoint(
+                        checkpoint_path, state, importer, offset, reader.fieldnames
+                    )
+                    if time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+                        last_report = time.perf_counter()
+                        self._report(state["rows"] - rows_at_start, started)
+            importer.write(batch)
+
+            self.stdout.write("Updating publisher stats...")
+            refresh_publisher_stats(importer.touched_publishers, using=importer.using)
+        finally:
+            bump_version(CATALOG)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        processed = state["rows"] - rows_at_start
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {processed:,} rows in {elapsed:.1f}s "
+                f"({processed / elapsed:,.0f} rows/s): "
+                f"{state['created'] + importer.created:,} created, "
+                f"{state['updated'] + importer.updated:,} updated, "
+                f"{state['skipped']:,} skipped"
+            )
+        )
+
+    def _report(self, processed, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  {processed:>12,} rows {elapsed:>8.1f}s "
+            f"{processed / elapsed:>10,.0f} rows/s"
+        )
+
+    @staticmethod
+    def _fingerprint(path):
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _load_checkpoint(self, checkpoint_path, path, restart):
+        state = {
+            "offset": 0,
+            "fieldnames": None,
+            "rows": 0,
+            "skipped": 0,
+            "created": 0,
+            "updated": 0,
+            "publishers": [],
+        }
+        if restart or not os.path.exists(checkpoint_path):
+            return state
+        with open(checkpoint_path) as checkpoint:
+            saved = json.load(checkpoint)
+        if saved.get("source") != self._fingerprint(path):
+            raise CommandError(
+                f"{path} changed since {checkpoint_path} was written; "
+                "pass --restart to import it from the top"
+            )
+        state.update((key, saved[key]) for key in state)
+        return state
+
+    def _save_checkpoint(self, checkpoint_path, state, importer, offset, fieldnames):
+        saved = {
+            **state,
+            "offset": offset,
+            "fieldnames": fieldnames,
+            "created": state["created"] + importer.created,
+            "updated": state["updated"] + importer.updated,
+            "publishers": sorted(importer.touched_publishers),
+            "source": self._fingerprint(self.path),
+        }
+        # Replace atomically: a crash mid-write must not lose the old offset
+        partial = f"{checkpoint_path}.tmp"
+        with open(partial, "w") as checkpoint:
+            json.dump(saved, checkpoint)
+        os.replace(partial, checkpoint_path)
@@ -0,0 +1,22 @@
+from books.search import get_search_backend
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for every book"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to rebuild the index for",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options["database"])
+        count = backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {count} books with {backend.__class__.__name__}"
+            )
+        )
@@ -0,0 +1,49 @@
+import time
+
+from books.similarity import (
+    TOP_K,
+    SimilarityModel,
+    rebuild_similarities,
+    stale_book_ids,
+)
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the precomputed related-books table (top-K neighbours per "
+        "book from co-ratings, co-authorship, genre and publisher)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=TOP_K)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "Only recompute books whose ratings or details changed since "
+                "their last run, and the books their changes can reach"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        book_ids = None
+        if options["incremental"]:
+            book_ids = list(stale_book_ids(using))
+            if not book_ids:
+                self.stdout.write("Similarities are up to date")
+                return
+
+        started = time.perf_counter()
+        model = SimilarityModel.load(using)
+        loaded = time.perf_counter()
+        books, rows = rebuild_similarities(
+            book_ids, k=options["top_k"], using=using, model=model
+        )
+        finished = time.perf_counter()
+        self.stdout.write(
+            f"Recomputed {books} books ({rows} neighbours) in "
+            f"{finished - started:.2f}s (loading {loaded - started:.2f}s)"
+        )
@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from books.models import Book
+from books.ratings import RATING_SCORES, RATING_STATS_FIELDS, rating_stats
+from books.stats import refresh_contributor_stats
+from books.versions import RATINGS, bump_version
+from django.core.management import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the Book rating aggregates and histogram from the ratings "
+        "table and repair any drift, in parallel pk-range chunks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=10_000)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted books without writing",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        bounds = Book.objects.using(using).aggregate(low=Min("pk"), high=Max("pk"))
+        if bounds["low"] is None:
+            self.stdout.write("No books to reconcile")
+            return
+
+        chunk_size = options["chunk_size"]
+        chunks = [
+            (start, start + chunk_size)
+            for start in range(bounds["low"], bounds["high"] + 1, chunk_size)
+        ]
+        workers = options["workers"]
+        if connections[using].vendor == "sqlite":
+            # SQLite has a single writer; parallel chunks would only deadlock
+            workers = 1
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(lambda chunk: self._run_chunk(chunk, options), chunks)
+                )
+        else:
+            results = [self._reconcile(chunk, options) for chunk in chunks]
+
+        checked = sum(checked for checked, _ in results)
+        drifted = [book_id for _, book_ids in results for book_id in book_ids]
+        verb = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(f"Checked {checked} books. {verb} {len(drifted)} drifted.")
+        if drifted and options["verbosity"] > 1:
+            self.stdout.write("Book ids: " + ", ".join(map(str, sorted(drifted))))
+
+    def _run_chunk(self, chunk, options):
+        # Each worker thread gets its own connection; close it when done
+        try:
+            return self._reconcile(chunk, options)
+        finally:
+            connections[options["database"]].close()
+
+    @staticmethod
+    def _reconcile(chunk, options):
+        using = options["database"]
+        start, stop = chunk
+        with transaction.atomic(using=using):
+            # Lock the chunk's books first: concurrent rating writes then
+            # queue their F() deltas behind our absolute values instead of
+            # being overwritten by them.
+            books = Book.objects.using(using).filter(pk__gte=start, pk__lt=stop)
+            list(books.select_for_update().values_list("pk", flat=True))
+            stored = books.order_by().values("pk", *RATING_STATS_FIELDS)
+            true_counts = (
+                books.order_by()
+                .annotate(
+                    **{
+                        f"true_{score}": Count(
+                            "ratings", filter=Q(ratings__rating=score)
+                        )
+                        for score in RATING_SCORES
+                    }
+                )
+                .values_list("pk", *(f"true_{score}" for score in RATING_SCORES))
+            )
+            histograms = {
+                pk: dict(zip(RATING_SCORES, counts)) for pk, *counts in true_counts
+            }
+
+            checked, repaired, now = 0, [], timezone.now()
+            for row in stored:
+                checked += 1
+                pk = row.pop("pk")
+                stats = rating_stats(histograms[pk])
+                if row != stats:
+                    repaired.append(Book(pk=pk, ratings_changed_at=now, **stats))
+            if repaired and not options["dry_run"]:
+                Book.objects.using(using).bulk_update(
+                    repaired, [*RATING_STATS_FIELDS, "ratings_changed_at"]
+                )
+                refresh_contributor_stats([book.pk for book in repaired], using=using)
+        if repaired and not options["dry_run"]:
+            # bulk_update() sends no signals; retire pages, facets and ETags
+            # built from the drifted stats once the chunk has committed
+            bump_version(RATINGS)
+        return checked, [book.pk for book in repaired]
@@ -0,0 +1,133 @@
+import random
+import time
+
+import numpy as np
+from books import recommendations
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Train user and book factors for personalised recommendations with "
+        "ALS over the ratings table and publish them as the current model"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--factors", type=int, default=recommendations.FACTORS)
+        parser.add_argument(
+            "--iterations", type=int, default=recommendations.ITERATIONS
+        )
+        parser.add_argument(
+            "--regularization", type=float, default=recommendations.REGULARIZATION
+        )
+        parser.add_argument(
+            "--implicit",
+            action="store_true",
+            help="Treat ratings as interactions weighted by 1 + alpha * score",
+        )
+        parser.add_argument("--alpha", type=float, default=recommendations.ALPHA)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            default=0,
+            metavar="REQUESTS",
+            help="Time this many recommendation requests after training",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        started = time.perf_counter()
+        user_ids, book_ids, user_index, book_index, scores = (
+            recommendations.load_ratings(using)
+        )
+        if not len(scores):
+            self.stdout.write("No ratings to train on")
+            return
+        self.stdout.write(
+            f"Loaded {len(scores):,} ratings ({len(user_ids):,} users, "
+            f"{len(book_ids):,} books) in {time.perf_counter() - started:.2f}s"
+        )
+
+        implicit = options["implicit"]
+        sweep_started = time.perf_counter()
+
+        def report(iteration, user_factors, book_factors):
+            nonlocal sweep_started
+            line = (
+                f"Iteration {iteration + 1}: {time.perf_counter() - sweep_started:.2f}s"
+            )
+            if not implicit:
+                error = recommendations.rmse(
+                    user_index, book_index, scores, user_factors, book_factors
+                )
+                line += f", training RMSE {error:.4f}"
+            self.stdout.write(line)
+            sweep_started = time.perf_counter()
+
+        training_started = time.perf_counter()
+        user_factors, book_factors = recommendations.train(
+            user_index,
+            book_index,
+            scores,
+            len(user_ids),
+            len(book_ids),
+            factors=options["factors"],
+            iterations=options["iterations"],
+            regularization=options["regularization"],
+            implicit=implicit,
+            alpha=options["alpha"],
+            seed=options["seed"],
+            callback=report if options["verbosity"] > 1 else None,
+        )
+        trained = time.perf_counter() - training_started
+
+        counts = np.bincount(book_index, minlength=len(book_ids))
+        popular = np.argsort(-counts, kind="stable")[: recommendations.POPULAR_BOOKS]
+        directory = recommendations.save(
+            user_ids,
+            user_factors,
+            book_ids,
+            book_factors,
+            popular,
+            factors=options["factors"],
+            iterations=options["iterations"],
+            regularization=options["regularization"],
+            implicit=implicit,
+            alpha=options["alpha"],
+            ratings=len(scores),
+        )
+        self.stdout.write(
+            f"Trained {options['factors']} factors in {trained:.2f}s "
+            f"({trained / max(options['iterations'], 1):.2f}s per iteration); "
+            f"saved to {directory}"
+        )
+
+        if options["benchmark"]:
+            self._benchmark(user_ids.tolist(), options["benchmark"], using)
+
+    def _benchmark(self, user_ids, requests, using):
+        rng = random.Random(0)
+        sample = [rng.choice(user_ids) for _ in range(requests)]
+        recommender = recommendations.get_recommender()
+        for label, serve in (
+            ("model only", lambda user_id: recommender.recommend(user_id, 10)),
+            (
+                "with database",
+                lambda user_id: recommendations.recommend_books(
+                    user_id, 10, using=using
+                ),
+            ),
+        ):
+            timings = []
+            for user_id in sample:
+                started = time.perf_counter()
+                serve(user_id)
+                timings.append(time.perf_counter() - started)
+            timings = np.array(timings) * 1000
+            self.stdout.write(
+                f"Serving ({label}): {requests / timings.sum() * 1000:,.0f} QPS, "
+                f"p50 {np.percentile(timings, 50):.2f}ms, "
+                f"p99 {np.percentile(timings, 99):.2f}ms"
+            )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0002_bookcondition_alter_author_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["title", "id"], name="books_book_title_eba785_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:52
+
+from django.db import migrations
+
+# The search index lives outside the Django model: a tsvector column behind a
+# GIN index on PostgreSQL, an FTS5 shadow table on SQLite (see books.search).
+# Other databases keep using the unindexed icontains backend.
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE books_book ADD COLUMN search_vector tsvector",
+    "CREATE INDEX books_book_search_vector_gin ON books_book "
+    "USING gin (search_vector)",
+    """
+    UPDATE books_book SET search_vector =
+        setweight(to_tsvector('english'::regconfig, books_book.title), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce((
+            SELECT string_agg(books_author.name, ' ')
+            FROM books_author
+            INNER JOIN books_book_authors
+                ON books_book_authors.author_id = books_author.id
+            WHERE books_book_authors.book_id = books_book.id
+        ), '')), 'B')
+        || setweight(to_tsvector('english'::regconfig, books_book.description), 'C')
+    """,
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS books_book_search_vector_gin",
+    "ALTER TABLE books_book DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE books_book_fts USING fts5("
+    "title, authors, description, tokenize = 'unicode61 remove_diacritics 2')",
+    """
+    INSERT INTO books_book_fts (rowid, title, authors, description)
+    SELECT books_book.id, books_book.title, coalesce((
+        SELECT group_concat(books_author.name, ' ')
+        FROM books_author
+        INNER JOIN books_book_authors
+            ON books_book_authors.author_id = books_author.id
+        WHERE books_book_authors.book_id = books_book.id
+    ), ''), books_book.description
+    FROM books_book
+    """,
+]
+SQLITE_BACKWARD = ["DROP TABLE IF EXISTS books_book_fts"]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif connection.vendor == "sqlite" and _sqlite_has_fts5(connection):
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        _run(schema_editor, POSTGRES_BACKWARD)
+    elif connection.vendor == "sqlite":
+        _run(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0003_book_title_id_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
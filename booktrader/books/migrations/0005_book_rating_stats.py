@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:46
+
+from django.db import migrations, models
+
+# Set-based backfill; the second statement reads the columns the first one set.
+BACKFILL_SQL = [
+    """
+    UPDATE books_book SET
+        rating_count = (
+            SELECT COUNT(*) FROM books_rating
+            WHERE books_rating.book_id = books_book.id
+        ),
+        rating_sum = (
+            SELECT COALESCE(SUM(books_rating.rating), 0) FROM books_rating
+            WHERE books_rating.book_id = books_book.id
+        )
+    """,
+    """
+    UPDATE books_book SET average_rating = CASE
+        WHEN rating_count > 0 THEN ROUND(rating_sum * 1.0 / rating_count, 1)
+        ELSE 0
+    END
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0004_book_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["average_rating", "rating_count"],
+                name="books_book_average_eee30a_idx",
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
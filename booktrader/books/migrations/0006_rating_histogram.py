@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_SQL = "UPDATE books_book SET " + ", ".join(f"""rating_{score}_count = (
+        SELECT COUNT(*) FROM books_rating
+        WHERE books_rating.book_id = books_book.id AND books_rating.rating = {score}
+    )""" for score in range(1, 6))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0005_book_rating_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="rating_1_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_2_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_3_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_4_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_5_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="rating",
+            index=models.Index(
+                fields=["book", "-created_at", "-id"], name="rating_book_recent_idx"
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
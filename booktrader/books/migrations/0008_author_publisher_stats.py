@@ -0,0 +1,141 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:34
+
+import django.core.validators
+from django.db import migrations, models
+
+# (table, subquery joining its rows to their books as ``b``)
+CONTRIBUTORS = [
+    (
+        "books_author",
+        "FROM books_book_authors ba JOIN books_book b ON b.id = ba.book_id"
+        " WHERE ba.author_id = books_author.id",
+    ),
+    (
+        "books_publisher",
+        "FROM books_book b WHERE b.publisher_id = books_publisher.id",
+    ),
+]
+
+# Set-based backfill; the second statement reads the columns the first one set.
+BACKFILL_SQL = [
+    statement
+    for table, books in CONTRIBUTORS
+    for statement in (
+        f"""
+        UPDATE {table} SET
+            book_count = (SELECT COUNT(*) {books}),
+            rating_count = (SELECT COALESCE(SUM(b.rating_count), 0) {books}),
+            rating_sum = (SELECT COALESCE(SUM(b.rating_sum), 0) {books}),
+            latest_publication_date = (SELECT MAX(b.publication_date) {books})
+        """,
+        f"""
+        UPDATE {table} SET average_rating = CASE
+            WHEN rating_count > 0 THEN ROUND(rating_sum * 1.0 / rating_count, 1)
+            ELSE 0
+        END
+        """,
+    )
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0007_book_similarity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="average_rating",
+            field=models.DecimalField(
+                decimal_places=1,
+                default=0.0,
+                max_digits=2,
+                validators=[
+                    django.core.validators.MinValueValidator(0),
+                    django.core.validators.MaxValueValidator(5),
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="book_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="latest_publication_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="publisher",
+            name="average_rating",
+            field=models.DecimalField(
+                decimal_places=1,
+                default=0.0,
+                max_digits=2,
+                validators=[
+                    django.core.validators.MinValueValidator(0),
+                    django.core.validators.MaxValueValidator(5),
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="publisher",
+            name="book_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="publisher",
+            name="latest_publication_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="publisher",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="publisher",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="author",
+            index=models.Index(
+                fields=["average_rating", "rating_count"],
+                name="books_autho_average_c551f7_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="author",
+            index=models.Index(
+                fields=["book_count"], name="books_autho_book_co_f12dca_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publisher",
+            index=models.Index(
+                fields=["average_rating", "rating_count"],
+                name="books_publi_average_dc9b16_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publisher",
+            index=models.Index(
+                fields=["book_count"], name="books_publi_book_co_aba866_idx"
+            ),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
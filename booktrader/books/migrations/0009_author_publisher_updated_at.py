@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0008_author_publisher_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="publisher",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
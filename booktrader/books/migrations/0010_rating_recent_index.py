@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0009_author_publisher_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="rating",
+            index=models.Index(fields=["-created_at", "-id"], name="rating_recent_idx"),
+        ),
+    ]
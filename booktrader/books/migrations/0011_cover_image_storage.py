@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:10
+
+import images.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0010_rating_recent_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="book",
+            name="cover_image",
+            field=models.ImageField(
+                blank=True,
+                storage=images.storage.image_storage,
+                upload_to="book_covers/",
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:14
+
+from books.isbn import normalize_isbn
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_isbn13(apps, schema_editor):
+    """Canonicalize existing ISBNs; the lowest pk keeps a duplicated ISBN-13"""
+    Book = apps.get_model("books", "Book")
+    books = Book.objects.using(schema_editor.connection.alias)
+    seen, batch = set(), []
+    for pk, isbn in books.order_by("pk").values_list("pk", "isbn").iterator():
+        isbn13 = normalize_isbn(isbn)
+        if isbn13 is None or isbn13 in seen:
+            continue
+        seen.add(isbn13)
+        batch.append(Book(pk=pk, isbn13=isbn13))
+        if len(batch) == BATCH_SIZE:
+            books.bulk_update(batch, ["isbn13"])
+            batch = []
+    books.bulk_update(batch, ["isbn13"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0011_cover_image_storage"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="book",
+            name="books_book_isbn_54becd_idx",
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="isbn13",
+            field=models.CharField(
+                blank=True, editable=False, max_length=13, null=True, unique=True
+            ),
+        ),
+        migrations.RunPython(fill_isbn13, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0012_isbn13"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="author",
+            index=models.Index(fields=["name", "id"], name="author_name_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["-average_rating", "id"], name="book_rating_keyset_idx"
+            ),
+        ),
+    ]
@@ -1,8 +1,11 @@
 # encoding: utf-8
 
+from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Avg
+from django.db import models, router, transaction
+from images.storage import image_storage
+
+from .isbn import normalize_isbn
 
 
 class Book(models.Model):
@@ -11,6 +14,10 @@ class Book(models.Model):
     description = models.TextField(blank=True)
     publisher = models.ForeignKey("Publisher", on_delete=models.CASCADE)
     isbn = models.CharField(max_length=255, unique=True, help_text="ISBN-10 or ISBN-13")
+    # Canonical form of ``isbn`` (see books.isbn); NULL when it is not a valid ISBN
+    isbn13 = models.CharField(
+        max_length=13, unique=True, blank=True, null=True, editable=False
+    )
 
     # Book Details
     publication_date = models.DateField(blank=True, null=True)
@@ -45,6 +52,19 @@ class Book(models.Model):
         default=0.0,
         validators=[MinValueValidator(0), MaxValueValidator(5)],
     )
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    ratings_changed_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    # Related books (see books.similarity)
+    similarities_computed_at = models.DateTimeField(
+        blank=True, null=True, editable=False
+    )
 
     # Market Info
     original_price = models.DecimalField(
@@ -56,7 +76,9 @@ class Book(models.Model):
     )
 
     # Images
-    cover_image = models.ImageField(upload_to="book_covers/", blank=True)
+    cover_image = models.ImageField(
+        upload_to="book_covers/", storage=image_storage, blank=True
+    )
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -65,13 +87,50 @@ class Book(models.Model):
     class Meta:
         ordering = ("title",)
         indexes = [
-            models.Index(fields=["isbn"]),
             models.Index(fields=["genre"]),
+            models.Index(fields=["title", "id"]),
+            models.Index(fields=["average_rating", "rating_count"]),
+            # Best-rated-first API pages (keyset on average_rating, id)
+            models.Index(
+                fields=["-average_rating", "id"], name="book_rating_keyset_idx"
+            ),
         ]
 
     def __str__(self):
         return self.title
 
+    def clean(self):
+        super().clean()
+        isbn13 = normalize_isbn(self.isbn)
+        if isbn13 and Book.objects.filter(isbn13=isbn13).exclude(pk=self.pk).exists():
+            raise ValidationError({"isbn": "A book with this ISBN already exists."})
+
+    def save(self, *args, **kwargs):
+        isbn13 = normalize_isbn(self.isbn)
+        if isbn13 is not None and isbn13 != self.isbn13:
+            # Another spelling of the same ISBN may already hold it (legacy
+            # rows migration 0012 left NULL); clean() reports that, and a save
+            # that skipped validation keeps this book's isbn13 NULL
+            using = kwargs.get("using") or router.db_for_write(Book, instance=self)
+            taken = Book.objects.using(using).filter(isbn13=isbn13)
+            if taken.exclude(pk=self.pk).exists():
+                isbn13 = None
+        self.isbn13 = isbn13
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "isbn" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "isbn13"}
+        super().save(*args, **kwargs)
+
+    @property
+    def rating_histogram(self):
+        """``(stars, count, percent)`` for 5 down to 1 stars"""
+        counts = [getattr(self, f"rating_{stars}_count") for stars in range(5, 0, -1)]
+        total = sum(counts) or 1
+        return [
+            (stars, count, round(100 * count / total))
+            for stars, count in zip(range(5, 0, -1), counts)
+        ]
+
     @property
     def author_names(self):
         """Get comma-separated list of author names"""
@@ -83,10 +142,27 @@ class Publisher(models.Model):
     website = models.URLField(blank=True)
     founded_year = models.PositiveIntegerField(blank=True, null=True)
 
+    # Catalog stats, maintained by books.stats
+    book_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.DecimalField(
+        decimal_places=1,
+        max_digits=2,
+        default=0.0,
+        validators=[MinValueValidator(0), MaxValueValidator(5)],
+    )
+    latest_publication_date = models.DateField(blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["average_rating", "rating_count"]),
+            models.Index(fields=["book_count"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -99,10 +175,29 @@ class Author(models.Model):
     death_date = models.DateField(blank=True, null=True)
     website = models.URLField(blank=True)
 
+    # Catalog stats, maintained by books.stats
+    book_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.DecimalField(
+        decimal_places=1,
+        max_digits=2,
+        default=0.0,
+        validators=[MinValueValidator(0), MaxValueValidator(5)],
+    )
+    latest_publication_date = models.DateField(blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["average_rating", "rating_count"]),
+            models.Index(fields=["book_count"]),
+            # API pages in name order (keyset on name, id)
+            models.Index(fields=["name", "id"], name="author_name_keyset_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -129,24 +224,86 @@ class Rating(models.Model):
     class Meta:
         unique_together = ["user", "book"]
         ordering = ["-created_at"]
+        indexes = [
+            # Newest-first review pages per book (keyset on created_at, id)
+            models.Index(
+                fields=["book", "-created_at", "-id"], name="rating_book_recent_idx"
+            ),
+            # Newest-first across all books (the admin changelist)
+            models.Index(fields=["-created_at", "-id"], name="rating_recent_idx"),
+        ]
 
     def __str__(self):
         return f"{self.rating} - {self.book.title} by {self.user.username}"
 
-    def save(self, *args, **kwargs):
-        super(Rating, self).save(*args, **kwargs)
-        book_id = self.book.id
-        rating_average = (
-            Rating.objects.filter(book_id=book_id)
-            .aggregate(Avg("rating"))
-            .get("rating__avg")
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Rating, cls).from_db(db, field_names, values)
+        instance._remember_score()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super(Rating, self).refresh_from_db(*args, **kwargs)
+        self._remember_score()
+
+    def _remember_score(self):
+        # (book_id, rating) as stored, so writes can apply the difference
+        self._stored_score = (self.__dict__.get("book_id"), self.__dict__.get("rating"))
+
+    def stored_score(self, using):
+        """``(book_id, rating)`` of this row in the database, or None"""
+        stored = getattr(self, "_stored_score", (None, None))
+        if None not in stored:
+            return stored
+        if self.pk is None:
+            return None
+        return (
+            Rating.objects.using(using)
+            .select_for_update()
+            .filter(pk=self.pk)
+            .values_list("book_id", "rating")
+            .first()
         )
-        book = Book.objects.get(id=book_id)
-        if rating_average and book:
-            book.average_rating = round(rating_average, 1)
-        else:
-            book.average_rating = 0
-        book.save()
+
+    def save(self, *args, **kwargs):
+        from .ratings import record_rating_change
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {"rating", "book", "book_id"} & set(
+            update_fields
+        ):
+            return super(Rating, self).save(*args, **kwargs)
+
+        using = kwargs.get("using") or router.db_for_write(Rating, instance=self)
+        with transaction.atomic(using=using):
+            previous = self.stored_score(using)
+            super(Rating, self).save(*args, **kwargs)
+            record_rating_change(previous, (self.book_id, self.rating), using=using)
+        self._remember_score()
+
+
+class BookSimilarity(models.Model):
+    """One of a book's precomputed top-K related books"""
+
+    book = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="similarities"
+    )
+    neighbor = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="similar_to"
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["book", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book", "rank"], name="book_similarity_rank_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} -> {self.neighbor_id} ({self.score:.3f})"
 
 
 class BookCondition(models.Model):
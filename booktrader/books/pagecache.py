@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Rendered page bodies shared between anonymous visitors.
+
+Entries are stored under a stable key per page (e.g. one book, one set of
+list filters) together with the version tag of the data they were rendered
+from (see ``books.versions``). When the signals bump a version the stored tag
+no longer matches and the entry becomes stale: one request takes a short lock
+and re-renders it while concurrent requests keep serving the stale copy, so a
+popular page never sees a thundering herd. Requests that find nothing at all
+wait briefly for the renderer before rendering themselves.
+
+Outcomes are counted in the cache (``page_cache_stats``) and reported in an
+``X-Cache`` response header. The version tag also makes a cheap ETag, so
+browsers revalidating a current page get a 304 without the body being fetched.
+"""
+
+import asyncio
+import hashlib
+import time
+
+from django.core.cache import cache
+
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24  # how long a stale copy may still be served
+FRESH_FOR = 10 * 60  # re-render even unchanged pages this often
+LOCK_TIMEOUT = 30
+WAIT_FOR = 2.0
+POLL_INTERVAL = 0.05
+
+HIT = "hit"  # fresh copy
+STALE = "stale"  # outdated copy served while another request re-renders
+WAIT = "wait"  # copy rendered by another request while this one waited
+MISS = "miss"  # rendered by this request
+BYPASS = "bypass"  # not cacheable (signed-in users)
+NOT_MODIFIED = "not-modified"  # the client's copy is current: 304, no body
+OUTCOMES = (HIT, STALE, WAIT, MISS, BYPASS, NOT_MODIFIED)
+
+
+def _key(name):
+    return f"books:page:{name}"
+
+
+def _stats_key(outcome):
+    return f"books:page-stats:{outcome}"
+
+
+def params_digest(query_dict):
+    """Stable digest of a request's query parameters"""
+    items = sorted(
+        (key, value) for key, values in query_dict.lists() for value in values
+    )
+    return hashlib.md5(repr(items).encode("utf-8")).hexdigest()
+
+
+async def acount(outcome):
+    try:
+        await cache.aincr(_stats_key(outcome))
+    except ValueError:
+        if not await cache.aadd(_stats_key(outcome), 1, timeout=None):
+            await cache.aincr(_stats_key(outcome))
+
+
+def page_cache_stats():
+    """``{outcome: count}`` since the counters were last cleared"""
+    counts = cache.get_many([_stats_key(outcome) for outcome in OUTCOMES])
+    return {outcome: counts.get(_stats_key(outcome), 0) for outcome in OUTCOMES}
+
+
+async def _store(key, tag, render):
+    html = await render()
+    await cache.aset(key, (tag, html, time.time() + FRESH_FOR), PAGE_CACHE_TIMEOUT)
+    return html
+
+
+async def aget_page(name, tag, render):
+    """``(html, outcome)`` for page ``name`` rendered from data at ``tag``.
+
+    ``render`` is a coroutine function returning the page body; it only runs
+    when there is no usable copy and this request wins the re-render lock.
+    """
+    key = _key(name)
+    entry = await cache.aget(key)
+    if entry is not None and entry[0] == tag and entry[2] > time.time():
+        return entry[1], HIT
+
+    lock = f"{key}:lock:{tag}"
+    if await cache.aadd(lock, 1, LOCK_TIMEOUT):
+        try:
+            return await _store(key, tag, render), MISS
+        finally:
+            await cache.adelete(lock)
+
+    if entry is not None:
+        return entry[1], STALE
+
+    deadline = time.monotonic() + WAIT_FOR
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None and entry[0] == tag:
+            return entry[1], WAIT
+    # The renderer is slow or gone: do the work here rather than fail
+    return await render(), MISS
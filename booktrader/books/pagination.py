@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""Keyset (cursor) pagination for large querysets.
+
+Offset pagination has to count and skip every row before the requested page,
+and the old book list went further by materialising the whole catalog before
+slicing it.  Keyset pagination instead remembers the ordering key of the last
+row on a page and asks the database for the next ``per_page`` rows after it,
+so every page costs one LIMIT-bounded index range scan regardless of depth.
+"""
+
+import base64
+import datetime
+import hashlib
+import json
+from functools import reduce
+from operator import or_
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor string cannot be decoded"""
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder drops microseconds past milliseconds, which would
+        # make cursors on timestamp keys skip or repeat rows.
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({"v": values, "d": direction}, cls=_CursorEncoder)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        values, direction = payload["v"], payload["d"]
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise InvalidCursor(cursor)
+    if direction not in ("n", "p") or not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values, direction
+
+
+class KeysetPage:
+    """A single page of results, iterable like a Django ``Page``"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` by the unique, indexed key ``ordering``.
+
+    ``ordering`` is a sequence of field (or annotation) names, each optionally
+    prefixed with ``-`` for descending order.  The last entry must make the key
+    unique (normally ``"pk"``) so that ties never skip or repeat rows.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [field.lstrip("-") for field in self.ordering]
+
+    def get_page(self, cursor=None, count=None):
+        """Return the page addressed by ``cursor`` (the first page if empty).
+
+        Invalid cursors fall back to the first page, mirroring
+        ``Paginator.get_page`` for out-of-range page numbers.
+        """
+        queryset, values, backwards = self._page_query(cursor)
+        return self._build_page(list(queryset), values, backwards, count)
+
+    async def aget_page(self, cursor=None, count=None):
+        """Async version of ``get_page()``"""
+        queryset, values, backwards = self._page_query(cursor)
+        rows = [row async for row in queryset]
+        return self._build_page(rows, values, backwards, count)
+
+    def _page_query(self, cursor):
+        values, direction = None, "n"
+        if cursor:
+            try:
+                values, direction = decode_cursor(cursor)
+            except InvalidCursor:
+                values, direction = None, "n"
+            if values is not None and len(values) != len(self.fields):
+                values, direction = None, "n"
+
+        backwards = direction == "p"
+        queryset = self.queryset
+        if values is not None:
+            try:
+                queryset = queryset.filter(self._position_filter(values, backwards))
+            except (ValidationError, ValueError, TypeError):
+                # A decodable cursor whose values don't fit the key's fields
+                values, backwards = None, False
+        ordering = self._reversed_ordering() if backwards else self.ordering
+        return queryset.order_by(*ordering)[: self.per_page + 1], values, backwards
+
+    def _build_page(self, rows, values, backwards, count):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = encode_cursor(self._key(rows[-1]), "n")
+            if values is not None and (has_more or not backwards):
+                previous_cursor = encode_cursor(self._key(rows[0]), "p")
+        return KeysetPage(rows, next_cursor, previous_cursor, count=count)
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def _reversed_ordering(self):
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+
+    def _position_filter(self, values, backwards):
+        """Build ``(a, b, c) > (x, y, z)`` as an OR of prefix matches"""
+        clauses = []
+        for index, field in enumerate(self.ordering):
+            name = self.fields[index]
+            descending = field.startswith("-")
+            lookup = "lt" if descending != backwards else "gt"
+            equal = {self.fields[i]: values[i] for i in range(index)}
+            clauses.append(Q(**equal, **{f"{name}__{lookup}": values[index]}))
+        return reduce(or_, clauses)
+
+
+def _reltuples(queryset):
+    """The planner's row estimate for an unfiltered PostgreSQL table"""
+    connection = connections[queryset.db]
+    if queryset.query.where or connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] > 0 else None
+
+
+def _count_cache_key(queryset, version):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f"{sql}{params!r}".encode("utf-8")).hexdigest()
+    return f"books:count:{version}:{digest}"
+
+
+def estimated_count(queryset, timeout=60, version=None):
+    """Return a cheap total row count for ``queryset``.
+
+    Unfiltered PostgreSQL tables use the planner's ``reltuples`` estimate.
+    Everything else runs a real ``COUNT(*)`` whose result is cached for
+    ``timeout`` seconds under a key derived from the SQL and ``version``.
+    """
+    estimate = _reltuples(queryset)
+    if estimate is not None:
+        return estimate
+
+    cache_key = _count_cache_key(queryset, version)
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout)
+    return count
+
+
+async def aestimated_count(queryset, timeout=60, version=None):
+    """Async version of ``estimated_count()``"""
+    if connections[queryset.db].vendor == "postgresql":
+        estimate = await sync_to_async(_reltuples)(queryset)
+        if estimate is not None:
+            return estimate
+
+    cache_key = _count_cache_key(queryset, version)
+    count = await cache.aget(cache_key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(cache_key, count, timeout)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """``Paginator`` whose total comes from ``estimated_count()``.
+
+    Meant for admin changelists over large tables, where the exact
+    ``COUNT(*)`` on every page view costs more than the page itself.
+    """
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Denormalised rating aggregates on ``Book``.
+
+``rating_count``, ``rating_sum``, ``average_rating`` and the per-score
+histogram (``rating_1_count`` ... ``rating_5_count``) are kept on the book row
+so listings, filters, ordering and the detail page never join or aggregate
+``Rating``. Single-rating writes adjust them with one ``F()`` UPDATE, whatever
+the number of ratings (plus one each for the book's authors and publisher,
+see ``books.stats``); ``refresh_rating_stats`` and the ``reconcile_ratings``
+command recompute them from scratch for bulk writes and drift repair.
+"""
+
+from collections import Counter, defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Book, Rating
+from .stats import (
+    apply_contributor_delta,
+    average_expression,
+    refresh_author_stats,
+    refresh_contributor_stats,
+    refresh_publisher_stats,
+)
+
+RATING_SCORES = range(1, 6)
+HISTOGRAM_FIELDS = tuple(f"rating_{score}_count" for score in RATING_SCORES)
+RATING_STATS_FIELDS = (
+    "rating_count",
+    "rating_sum",
+    "average_rating",
+    *HISTOGRAM_FIELDS,
+)
+
+
+def average_rating(rating_sum, rating_count):
+    """Average as stored in ``Book.average_rating`` (one decimal place)"""
+    if not rating_count:
+        return Decimal("0.0")
+    average = Decimal(rating_sum) / Decimal(rating_count)
+    return average.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP)
+
+
+def rating_stats(histogram):
+    """Column values for a ``{score: count}`` histogram"""
+    rating_count = sum(histogram.get(score, 0) for score in RATING_SCORES)
+    rating_sum = sum(score * histogram.get(score, 0) for score in RATING_SCORES)
+    stats = {
+        "rating_count": rating_count,
+        "rating_sum": rating_sum,
+        "average_rating": average_rating(rating_sum, rating_count),
+    }
+    for score, field in zip(RATING_SCORES, HISTOGRAM_FIELDS):
+        stats[field] = histogram.get(score, 0)
+    return stats
+
+
+def apply_rating_delta(book_id, histogram_delta, using="default"):
+    """Shift a book's aggregates by ``{score: change in count}``"""
+    count_delta = sum(histogram_delta.values())
+    sum_delta = sum(score * delta for score, delta in histogram_delta.items())
+    count = F("rating_count") + count_delta
+    total = F("rating_sum") + sum_delta
+    # Every right-hand side sees the pre-update row, so the average is
+    # derived from the shifted expressions rather than the stored columns.
+    updates = {
+        "rating_count": count,
+        "rating_sum": total,
+        "average_rating": average_expression(total, count),
+        "ratings_changed_at": timezone.now(),
+    }
+    for score, delta in histogram_delta.items():
+        if delta:
+            field = f"rating_{score}_count"
+            updates[field] = F(field) + delta
+    Book.objects.using(using).filter(pk=book_id).update(**updates)
+    apply_contributor_delta(book_id, count_delta, sum_delta, using=using)
+
+
+def record_rating_change(previous, current, using="default"):
+    """Apply a rating moving from ``previous`` to ``current``.
+
+    Both are ``(book_id, rating)`` pairs or None, for inserts and deletes.
+    """
+    deltas = defaultdict(Counter)
+    if previous is not None:
+        deltas[previous[0]][previous[1]] -= 1
+    if current is not None:
+        deltas[current[0]][current[1]] += 1
+    for book_id, histogram_delta in deltas.items():
+        if any(histogram_delta.values()):
+            apply_rating_delta(book_id, histogram_delta, using=using)
+
+
+def refresh_rating_stats(book_ids, using="default"):
+    """Recompute the rating columns of ``book_ids`` from their ratings"""
+    histograms = {book_id: {} for book_id in book_ids}
+    rows = (
+        Rating.objects.using(using)
+        .filter(book_id__in=histograms)
+        .values_list("book_id", "rating")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    for book_id, score, count in rows:
+        histograms[book_id][score] = count
+    now = timezone.now()
+    books = [
+        Book(pk=book_id, ratings_changed_at=now, **rating_stats(histogram))
+        for book_id, histogram in histograms.items()
+    ]
+    # Only the aggregate columns are written: no Book signals fire, so the
+    # search index and catalog version are left alone.
+    Book.objects.using(using).bulk_update(
+        books, [*RATING_STATS_FIELDS, "ratings_changed_at"]
+    )
+    refresh_contributor_stats(histograms, using=using)
+
+
+def rebuild_all_rating_stats(using="default"):
+    """Recompute every book's rating columns with two set-based UPDATEs"""
+    ratings = Rating.objects.filter(book=OuterRef("pk")).order_by().values("book")
+    books = Book.objects.using(using)
+    books.update(
+        **{
+            field: Coalesce(
+                Subquery(
+                    ratings.filter(rating=score)
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            )
+            for score, field in zip(RATING_SCORES, HISTOGRAM_FIELDS)
+        }
+    )
+    count = sum((F(field) for field in HISTOGRAM_FIELDS), Value(0))
+    total = sum(
+        (score * F(field) for score, field in zip(RATING_SCORES, HISTOGRAM_FIELDS)),
+        Value(0),
+    )
+    books.update(
+        rating_count=count,
+        rating_sum=total,
+        average_rating=average_expression(total, count),
+        ratings_changed_at=timezone.now(),
+    )
+    refresh_author_stats(using=using)
+    refresh_publisher_stats(using=using)
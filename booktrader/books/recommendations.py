@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""Personalised recommendations from matrix factorisation of ``Rating``.
+
+``train`` fits user and book factors with alternating least squares (ALS),
+either on the explicit 1-5 scores or, with ``implicit=True``, treating every
+rating as a positive interaction with confidence ``1 + alpha * score`` (the
+Hu, Koren and Volinsky model). Each half-step solves one side's least-squares
+systems in batches, a bounded number of ratings at a time, so memory stays
+flat however many users there are.
+
+``save`` writes the factors as ``.npy`` files in a new directory under
+``settings.RECOMMENDATIONS_DIR`` and then switches the ``CURRENT`` pointer to
+it; ``get_recommender`` memory-maps whichever model the pointer names, and
+``Recommender.recommend`` scores a user against every book with a single
+matrix-vector product.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .arrays import csr, fetch_columns
+from .models import Book, Rating
+
+FACTORS = 32
+ITERATIONS = 10
+REGULARIZATION = 0.1
+ALPHA = 40.0
+# Bound on a padded batch of rating vectors (ratings x factors floats)
+MAX_BATCH_CELLS = 2**22
+POPULAR_BOOKS = 1000
+KEEP_MODELS = 2
+POINTER = "CURRENT"
+
+
+def _batches(counts, max_cells):
+    """Row batches of similar length, each padded to at most ``max_cells``"""
+    rated = np.flatnonzero(counts)
+    # Rows are grouped by the power of two above their length, so padding a
+    # batch to its longest row at most doubles its size
+    buckets = np.ceil(np.log2(counts[rated])).astype(np.int64)
+    order = np.argsort(buckets, kind="stable")
+    rated, buckets = rated[order], buckets[order]
+    bounds = np.flatnonzero(np.diff(buckets)) + 1
+    for rows in np.split(rated, bounds):
+        if not len(rows):
+            continue
+        length = int(counts[rows].max())
+        size = max(1, max_cells // length)
+        for start in range(0, len(rows), size):
+            yield rows[start : start + size], length
+
+
+def _solve(indptr, indices, values, other, regularization, implicit, alpha):
+    """Least-squares factors for every row of a CSR matrix, given the columns'"""
+    n_rows, factors = len(indptr) - 1, other.shape[1]
+    solved = np.zeros((n_rows, factors), dtype=np.float32)
+    identity = np.eye(factors, dtype=np.float32)
+    gram = other.T @ other if implicit else None
+    counts = np.diff(indptr)
+
+    for rows, length in _batches(counts, MAX_BATCH_CELLS // factors):
+        # Each row's ratings padded to ``length``; padding gets zero weight
+        offsets = np.arange(length)
+        present = offsets < counts[rows, None]
+        entries = np.where(present, indptr[rows, None] + offsets, 0)
+        vectors = other[indices[entries]]
+        scores = np.where(present, values[entries], 0).astype(np.float32)
+        if implicit:
+            # (YtY + Yt (C - I) Y + lambda I) x = Yt C p, with p = 1
+            weights = alpha * scores
+            targets = np.where(present, 1 + weights, 0).astype(np.float32)
+            lhs = gram + regularization * identity
+        else:
+            # Weighted-lambda regularisation: lambda scales with the row's ratings
+            weights, targets = present.astype(np.float32), scores
+            lhs = (regularization * counts[rows])[:, None, None] * identity
+        weighted = (vectors * weights[..., None]).transpose(0, 2, 1)
+        lhs = lhs + np.matmul(weighted, vectors)
+        rhs = np.matmul(targets[:, None, :], vectors)[:, 0]
+        solved[rows] = np.linalg.solve(lhs, rhs[..., None])[..., 0]
+    # Rows without ratings keep zero factors: there is nothing to fit
+    return solved
+
+
+def train(
+    user_index,
+    book_index,
+    scores,
+    n_users,
+    n_books,
+    factors=FACTORS,
+    iterations=ITERATIONS,
+    regularization=REGULARIZATION,
+    implicit=False,
+    alpha=ALPHA,
+    seed=0,
+    callback=None,
+):
+    """Fit ``(user_factors, book_factors)`` to the ``(user, book, score)`` triples.
+
+    ``callback(iteration, user_factors, book_factors)`` runs after each sweep.
+    """
+    rng = np.random.default_rng(seed)
+    user_factors = rng.normal(0, 0.1, (n_users, factors)).astype(np.float32)
+    book_factors = rng.normal(0, 0.1, (n_books, factors)).astype(np.float32)
+    scores = np.asarray(scores, dtype=np.float64)
+    by_user = csr(user_index, book_index, scores, n_users)
+    by_book = csr(book_index, user_index, scores, n_books)
+    for iteration in range(iterations):
+        user_factors = _solve(*by_user, book_factors, regularization, implicit, alpha)
+        book_factors = _solve(*by_book, user_factors, regularization, implicit, alpha)
+        if callback is not None:
+            callback(iteration, user_factors, book_factors)
+    return user_factors, book_factors
+
+
+def rmse(user_index, book_index, scores, user_factors, book_factors, chunk=1_000_000):
+    """Root mean squared error of the factors' predictions for ``scores``"""
+    squared = 0.0
+    for start in range(0, len(scores), chunk):
+        rows = slice(start, start + chunk)
+        predicted = np.einsum(
+            "ij,ij->i",
+            user_factors[user_index[rows]],
+            book_factors[book_index[rows]],
+        )
+        squared += float(np.sum((predicted - scores[rows]) ** 2))
+    return (squared / max(len(scores), 1)) ** 0.5
+
+
+def load_ratings(using="default"):
+    """``(user_ids, book_ids, user_index, book_index, scores)`` for every rating"""
+    user_ids, rated_ids, scores = fetch_columns(
+        Rating.objects.using(using), ("user_id", "book_id", "rating")
+    )
+    user_ids, user_index = np.unique(user_ids, return_inverse=True)
+    book_ids, book_index = np.unique(rated_ids, return_inverse=True)
+    return user_ids, book_ids, user_index, book_index, scores.astype(np.float64)
+
+
+def save(user_ids, user_factors, book_ids, book_factors, popular, **meta):
+    """Write a model and make it the current one; returns its directory"""
+    root = Path(settings.RECOMMENDATIONS_DIR)
+    version = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    directory = root / version
+    directory.mkdir(parents=True)
+    arrays = {
+        "user_ids": user_ids,
+        "user_factors": user_factors,
+        "book_ids": book_ids,
+        "book_factors": book_factors,
+        "popular": popular,
+    }
+    for name, array in arrays.items():
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(array))
+    meta.update(version=version, users=len(user_ids), books=len(book_ids))
+    (directory / "meta.json").write_text(json.dumps(meta))
+
+    pointer = root / f"{POINTER}.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, root / POINTER)
+
+    # Older models may still be mapped by running processes; keep a spare
+    versions = sorted(path for path in root.iterdir() if path.is_dir())
+    for stale in versions[:-KEEP_MODELS]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return directory
+
+
+class Recommender:
+    """A trained model, memory-mapped read-only"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.meta = json.loads((self.directory / "meta.json").read_text())
+        self.version = self.meta["version"]
+        self.user_ids = self._load("user_ids")
+        self.user_factors = self._load("user_factors")
+        self.book_ids = self._load("book_ids")
+        self.book_factors = self._load("book_factors")
+        self.popular = self._load("popular")
+
+    def _load(self, name):
+        return np.load(self.directory / f"{name}.npy", mmap_mode="r")
+
+    @staticmethod
+    def _positions(ids, wanted):
+        """Positions in ``ids`` of the sorted ``wanted`` ids that it contains"""
+        wanted = np.asarray(wanted, dtype=np.int64)
+        positions = np.searchsorted(ids, wanted)
+        positions = positions[positions < len(ids)]
+        return positions[ids[positions] == wanted[: len(positions)]]
+
+    def recommend(self, user_id, limit=10, exclude=()):
+        """``[(book_id, score), ...]`` best first, skipping ``exclude``.
+
+        Users the model has not seen get the most rated books, scored None.
+        """
+        excluded = self._positions(self.book_ids, sorted(exclude))
+        user = self._positions(self.user_ids, [user_id])
+        if not len(user):
+            popular = self.popular[~np.isin(self.popular, excluded)][:limit]
+            return [(int(self.book_ids[i]), None) for i in popular]
+
+        scores = self.book_factors @ self.user_factors[user[0]]
+        scores[excluded] = -np.inf
+        limit = min(limit, len(scores) - len(excluded))
+        if limit <= 0:
+            return []
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(self.book_ids[i]), float(scores[i])) for i in best]
+
+
+_current = {}
+
+
+def get_recommender():
+    """The current model (reloaded when a newer one is saved), or None"""
+    root = Path(settings.RECOMMENDATIONS_DIR)
+    try:
+        version = (root / POINTER).read_text().strip()
+    except FileNotFoundError:
+        return None
+    recommender = _current.get(root)
+    if recommender is None or recommender.version != version:
+        recommender = _current[root] = Recommender(root / version)
+    return recommender
+
+
+def recommend_books(user_id, limit=10, using="default"):
+    """``[(book, score), ...]`` for ``user_id``, or None before any training"""
+    recommender = get_recommender()
+    if recommender is None:
+        return None
+    rated = Rating.objects.using(using).filter(user_id=user_id)
+    # Books removed since training drop out below, so ask for a few extra
+    picks = recommender.recommend(
+        user_id, limit + 10, exclude=rated.values_list("book_id", flat=True)
+    )
+    books = (
+        Book.objects.using(using)
+        .prefetch_related("authors")
+        .in_bulk([book_id for book_id, _ in picks])
+    )
+    found = [(books[book_id], score) for book_id, score in picks if book_id in books]
+    return found[:limit]
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""Pluggable full-text search over the book catalog.
+
+Each backend filters a ``Book`` queryset down to the matches for a query and
+annotates it with ``search_rank`` (higher is more relevant), and keeps its
+index in step with the catalog through ``index_books``/``remove_books``, which
+``books.signals`` calls whenever a book, an author or the book/author link
+changes.
+
+* ``PostgresSearchBackend`` keeps a weighted ``tsvector`` column on
+  ``books_book`` behind a GIN index and ranks with ``ts_rank_cd``.
+* ``SQLiteSearchBackend`` keeps an FTS5 shadow table keyed by book id and
+  ranks with ``bm25``.
+* ``IContainsSearchBackend`` is the original ``icontains`` scan, used when
+  neither index is available.
+
+``settings.BOOKS_SEARCH_BACKEND`` may name a backend class to override the
+automatic choice.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Book
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+FTS_TABLE = "books_book_fts"
+INDEX_CHUNK_SIZE = 500
+
+_backends = {}
+
+
+def search_terms(query):
+    """Split a free-form query into word terms, dropping FTS syntax"""
+    return TERM_RE.findall(query or "")
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), INDEX_CHUNK_SIZE):
+        yield ids[start : start + INDEX_CHUNK_SIZE]
+
+
+class BaseSearchBackend:
+    def __init__(self, using="default"):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def no_results(self, queryset):
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).none()
+
+    def index_books(self, book_ids):
+        """(Re)index the given books"""
+
+    def remove_books(self, book_ids):
+        """Drop the given books from the index"""
+
+    def rebuild(self):
+        """Reindex the whole catalog, returning the number of books"""
+        book_ids = list(Book.objects.using(self.using).values_list("pk", flat=True))
+        self.remove_books(book_ids)
+        self.index_books(book_ids)
+        return len(book_ids)
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """Unindexed substring match on title, description and author names"""
+
+    def search(self, queryset, query):
+        query = (query or "").strip()
+        return (
+            queryset.filter(
+                Q(title__icontains=query)
+                | Q(description__icontains=query)
+                | Q(authors__name__icontains=query)
+            )
+            .distinct()
+            .annotate(search_rank=Value(0.0, output_field=FloatField()))
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted tsvector column (title A, authors B, description C)"""
+
+    config = "english"
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return self.no_results(queryset)
+        # Prefix-match every term so that keystroke-driven searches for a
+        # partial word still hit, e.g. "found" finds "Foundation".
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        table = self.connection.ops.quote_name(Book._meta.db_table)
+        return queryset.filter(
+            RawSQL(
+                f"{table}.search_vector @@ to_tsquery(%s::regconfig, %s)",
+                [self.config, tsquery],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank_cd({table}.search_vector, to_tsquery(%s::regconfig, %s))",
+                [self.config, tsquery],
+                output_field=FloatField(),
+            )
+        )
+
+    def index_books(self, book_ids):
+        with self.connection.cursor() as cursor:
+            for chunk in _chunks(book_ids):
+                cursor.execute(
+                    """
+                    UPDATE books_book SET search_vector =
+                        setweight(to_tsvector(%s::regconfig, books_book.title), 'A')
+                        || setweight(to_tsvector(%s::regconfig, coalesce((
+                            SELECT string_agg(books_author.name, ' ')
+                            FROM books_author
+                            INNER JOIN books_book_authors
+                                ON books_book_authors.author_id = books_author.id
+                            WHERE books_book_authors.book_id = books_book.id
+                        ), '')), 'B')
+                        || setweight(
+                            to_tsvector(%s::regconfig, books_book.description), 'C'
+                        )
+                    WHERE books_book.id = ANY(%s)
+                    """,
+                    [self.config, self.config, self.config, chunk],
+                )
+
+    def rebuild(self):
+        # Removing is a no-op: the vector lives on the row itself.
+        book_ids = list(Book.objects.using(self.using).values_list("pk", flat=True))
+        self.index_books(book_ids)
+        return len(book_ids)
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 shadow table whose rowid is the book id"""
+
+    # bm25 column weights for (title, authors, description)
+    weights = (10.0, 5.0, 1.0)
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return self.no_results(queryset)
+        match = " ".join('"{}"*'.format(term) for term in terms)
+        weights = ", ".join(str(weight) for weight in self.weights)
+        table = self.connection.ops.quote_name(Book._meta.db_table)
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+            )
+        ).annotate(
+            # bm25() is "lower is better"; negate it so every backend ranks
+            # in the same direction.
+            search_rank=RawSQL(
+                f"(SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id)",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    def index_books(self, book_ids):
+        with self.connection.cursor() as cursor:
+            for chunk in _chunks(book_ids):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk
+                )
+                cursor.execute(
+                    f"""
+                    INSERT INTO {FTS_TABLE} (rowid, title, authors, description)
+                    SELECT books_book.id, books_book.title, coalesce((
+                        SELECT group_concat(books_author.name, ' ')
+                        FROM books_author
+                        INNER JOIN books_book_authors
+                            ON books_book_authors.author_id = books_author.id
+                        WHERE books_book_authors.book_id = books_book.id
+                    ), ''), books_book.description
+                    FROM books_book
+                    WHERE books_book.id IN ({placeholders})
+                    """,
+                    chunk,
+                )
+
+    def remove_books(self, book_ids):
+        with self.connection.cursor() as cursor:
+            for chunk in _chunks(book_ids):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk
+                )
+
+
+def get_search_backend(using="default"):
+    """Return the search backend for database alias ``using``"""
+    if using not in _backends:
+        backend_path = getattr(settings, "BOOKS_SEARCH_BACKEND", None)
+        if backend_path:
+            backend_class = import_string(backend_path)
+        else:
+            connection = connections[using]
+            if connection.vendor == "postgresql":
+                backend_class = PostgresSearchBackend
+            elif (
+                connection.vendor == "sqlite"
+                and FTS_TABLE in connection.introspection.table_names()
+            ):
+                backend_class = SQLiteSearchBackend
+            else:
+                backend_class = IContainsSearchBackend
+        _backends[using] = backend_class(using)
+    return _backends[using]
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Keep derived catalog data in step with Book/Author changes"""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Author, Book, Publisher, Rating
+from .ratings import record_rating_change
+from .search import get_search_backend
+from .stats import refresh_author_stats, refresh_publisher_stats
+from .suggestions import suggestion_index
+from .versions import CATALOG, RATINGS, bump_version
+
+
+def touch_books(book_ids, using="default"):
+    """Move ``updated_at`` of books whose author list changed.
+
+    Book payloads list their authors, but link rows change without saving the
+    book; without this the books' HTTP validators would not change either.
+    """
+    Book.objects.using(using).filter(pk__in=book_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Book)
+def index_saved_book(sender, instance, raw=False, using="default", **kwargs):
+    if raw:
+        return
+    get_search_backend(using).index_books([instance.pk])
+    suggestion_index.update("book", instance.pk, instance.title)
+
+
+@receiver(post_delete, sender=Book)
+def unindex_deleted_book(sender, instance, using="default", **kwargs):
+    get_search_backend(using).remove_books([instance.pk])
+    suggestion_index.update("book", instance.pk)
+
+
+@receiver(post_save, sender=Author)
+def reindex_author_books(sender, instance, raw=False, using="default", **kwargs):
+    if raw:
+        return
+    suggestion_index.update("author", instance.pk, instance.name)
+    book_ids = list(instance.books.using(using).values_list("pk", flat=True))
+    if book_ids:
+        get_search_backend(using).index_books(book_ids)
+
+
+@receiver(pre_delete, sender=Author)
+def remember_author_books(sender, instance, using="default", **kwargs):
+    # The through rows are cascaded away without an m2m_changed signal, so
+    # note which books lose this author before they disappear.
+    instance._affected_book_ids = list(
+        instance.books.using(using).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Author)
+def reindex_former_author_books(sender, instance, using="default", **kwargs):
+    suggestion_index.update("author", instance.pk)
+    book_ids = getattr(instance, "_affected_book_ids", [])
+    if book_ids:
+        get_search_backend(using).index_books(book_ids)
+        touch_books(book_ids, using=using)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def reindex_book_authors(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action == "pre_clear" and reverse:
+        # author.books.clear(): pk_set is not provided for clears
+        instance._affected_book_ids = list(
+            instance.books.using(using).values_list("pk", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        book_ids = [instance.pk]
+    elif action == "post_clear":
+        book_ids = getattr(instance, "_affected_book_ids", [])
+    else:
+        book_ids = list(pk_set or [])
+    if book_ids:
+        get_search_backend(using).index_books(book_ids)
+        touch_books(book_ids, using=using)
+
+
+@receiver(pre_save, sender=Book)
+def remember_book_publisher(sender, instance, raw=False, using="default", **kwargs):
+    if raw or instance._state.adding:
+        return
+    # A book moving publisher changes the stats of the one it leaves too
+    instance._previous_publisher_id = (
+        Book.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list("publisher_id", flat=True)
+        .first()
+    )
+
+
+@receiver(pre_delete, sender=Book)
+def remember_book_authors(sender, instance, using="default", **kwargs):
+    instance._stats_author_ids = list(
+        instance.authors.using(using).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def refresh_book_contributor_stats(
+    sender, instance, raw=False, using="default", **kwargs
+):
+    if raw:
+        return
+    author_ids = getattr(instance, "_stats_author_ids", None)
+    if author_ids is None:
+        author_ids = list(instance.authors.using(using).values_list("pk", flat=True))
+    refresh_author_stats(author_ids, using=using)
+    publisher_ids = {instance.publisher_id}
+    publisher_ids.add(getattr(instance, "_previous_publisher_id", None))
+    refresh_publisher_stats(publisher_ids - {None}, using=using)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def refresh_linked_author_stats(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+):
+    if action == "pre_clear" and not reverse:
+        # book.authors.clear(): pk_set is not provided for clears
+        instance._cleared_author_ids = list(
+            instance.authors.using(using).values_list("pk", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        author_ids = [instance.pk]
+    elif action == "post_clear":
+        author_ids = getattr(instance, "_cleared_author_ids", [])
+    else:
+        author_ids = list(pk_set or [])
+    if author_ids:
+        refresh_author_stats(author_ids, using=using)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=Publisher)
+@receiver(post_delete, sender=Publisher)
+@receiver(m2m_changed, sender=Book.authors.through)
+def bump_catalog_version(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        bump_version(CATALOG)
+
+
+@receiver(post_delete, sender=Rating)
+def discount_deleted_rating(sender, instance, using="default", **kwargs):
+    stored = getattr(instance, "_stored_score", (None, None))
+    if None in stored:
+        stored = (instance.book_id, instance.rating)
+    record_rating_change(stored, None, using=using)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def bump_ratings_version(sender, **kwargs):
+    bump_version(RATINGS)
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""Precomputed item-to-item "related books".
+
+A book's neighbours are ranked by a weighted blend of four signals:
+
+* co-rating: cosine similarity of the two books' columns in the user x book
+  rating matrix,
+* co-authorship: Jaccard overlap of their author sets,
+* sharing a genre, and
+* sharing a publisher.
+
+The sparse matrices are plain CSR triples (``indptr``, ``indices``, ``data``)
+built with NumPy, and a block of books is scored against the whole catalog at
+once with ``np.bincount``. The best ``TOP_K`` neighbours of every book are
+stored in ``BookSimilarity``, so the detail page reads them back with a single
+query on the ``(book, rank)`` index.
+
+Rating writes stamp ``Book.ratings_changed_at``; ``rebuild_similarities``
+recomputes the books changed since their last run together with the books
+whose top-K lists those changes can reach.
+"""
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .arrays import csr, fetch_columns, ranges
+from .models import Book, BookSimilarity, Rating
+from .versions import RELATED, bump_version
+
+TOP_K = 20
+WEIGHTS = {"rating": 0.6, "author": 0.25, "genre": 0.1, "publisher": 0.05}
+# Upper bound on block size x catalog size for the dense score block
+MAX_BLOCK_CELLS = 2**22
+
+
+class _Incidence:
+    """Sparse ``entity x book`` matrix (users x books, authors x books)"""
+
+    def __init__(self, entities, books, values, n_entities, n_books):
+        self.n_books = n_books
+        self.by_entity = csr(entities, books, values, n_entities)
+        self.by_book = csr(books, entities, values, n_books)
+        self.squared_norms = np.bincount(books, values * values, minlength=n_books)
+
+    def dot(self, targets):
+        """Column dot products, ``len(targets) x n_books``"""
+        indptr, entities, values = self.by_book
+        lengths = indptr[targets + 1] - indptr[targets]
+        entries = ranges(indptr[targets], lengths)
+        owners = np.repeat(np.arange(len(targets)), lengths)
+        entities, values = entities[entries], values[entries]
+
+        indptr, books, weights = self.by_entity
+        lengths = indptr[entities + 1] - indptr[entities]
+        entries = ranges(indptr[entities], lengths)
+        cells = np.repeat(owners * self.n_books, lengths) + books[entries]
+        products = np.repeat(values, lengths) * weights[entries]
+        return np.bincount(
+            cells, products, minlength=len(targets) * self.n_books
+        ).reshape(len(targets), self.n_books)
+
+
+def _divide(numerator, denominator):
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros(numerator.shape),
+        where=denominator > 0,
+    )
+
+
+class SimilarityModel:
+    """The catalog and its ratings as arrays, ready for scoring"""
+
+    def __init__(self, book_ids, publishers, genres, popularity, ratings, authors):
+        self.book_ids = book_ids
+        self.publishers = publishers
+        self.genres = genres
+        n = len(book_ids)
+        # Equal scores go to the more rated, then the older book: a bonus
+        # in [0, 1e-9), too small to reorder scores that actually differ
+        self.tiebreak = np.zeros(n)
+        self.tiebreak[np.lexsort((-book_ids, popularity))] = np.arange(n) / (
+            max(n, 1) * 1e9
+        )
+        self.ratings = _Incidence(*ratings, n)
+        self.authors = _Incidence(*authors, n)
+
+    @classmethod
+    def load(cls, using="default"):
+        book_ids, publishers, popularity = fetch_columns(
+            Book.objects.using(using).order_by("pk"),
+            ("pk", "publisher_id", "rating_count"),
+        )
+        genre_names = list(
+            Book.objects.using(using).order_by("pk").values_list("genre", flat=True)
+        )
+        _, genres = np.unique(np.array(genre_names, dtype=object), return_inverse=True)
+
+        user_ids, rated_ids, scores = fetch_columns(
+            Rating.objects.using(using), ("user_id", "book_id", "rating")
+        )
+        users, user_index = np.unique(user_ids, return_inverse=True)
+        ratings = (
+            user_index,
+            np.searchsorted(book_ids, rated_ids),
+            scores.astype(np.float64),
+            len(users),
+        )
+
+        author_ids, written_ids = fetch_columns(
+            Book.authors.through.objects.using(using), ("author_id", "book_id")
+        )
+        authors, author_index = np.unique(author_ids, return_inverse=True)
+        authorship = (
+            author_index,
+            np.searchsorted(book_ids, written_ids),
+            np.ones(len(author_index)),
+            len(authors),
+        )
+        return cls(book_ids, publishers, genres, popularity, ratings, authorship)
+
+    def __len__(self):
+        return len(self.book_ids)
+
+    def indexes(self, book_ids):
+        """Positions of the ``book_ids`` that are still in the catalog"""
+        book_ids = np.asarray(sorted(book_ids), dtype=np.int64)
+        positions = np.searchsorted(self.book_ids, book_ids)
+        positions = positions[positions < len(self.book_ids)]
+        return positions[np.isin(self.book_ids[positions], book_ids)]
+
+    def block_size(self):
+        return max(1, MAX_BLOCK_CELLS // max(len(self), 1))
+
+    def scores(self, targets):
+        """Blended similarity of each target book to every book"""
+        co_rating = _divide(
+            self.ratings.dot(targets),
+            np.sqrt(
+                np.outer(
+                    self.ratings.squared_norms[targets], self.ratings.squared_norms
+                )
+            ),
+        )
+        shared = self.authors.dot(targets)
+        sizes = self.authors.squared_norms
+        co_author = _divide(shared, sizes[targets, None] + sizes[None, :] - shared)
+        same_genre = self.genres[targets, None] == self.genres[None, :]
+        same_publisher = self.publishers[targets, None] == self.publishers[None, :]
+
+        scores = (
+            WEIGHTS["rating"] * co_rating
+            + WEIGHTS["author"] * co_author
+            + WEIGHTS["genre"] * same_genre
+            + WEIGHTS["publisher"] * same_publisher
+        )
+        scores[np.arange(len(targets)), targets] = 0.0
+        return scores
+
+    def top_k(self, scores, k=TOP_K):
+        """``(neighbours, scores)`` per row, best first; unscored slots are -1"""
+        k = min(k, scores.shape[1])
+        if not k:
+            empty = np.empty((len(scores), 0))
+            return empty.astype(np.int64), empty
+        keyed = np.where(scores > 0, scores + self.tiebreak, -1.0)
+        best = np.argpartition(-keyed, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(keyed, best, axis=1), axis=1)
+        neighbours = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(scores, neighbours, axis=1)
+        neighbours[best_scores <= 0] = -1
+        return neighbours, best_scores
+
+
+def _store(model, targets, neighbours, scores, computed_at, using):
+    book_ids = model.book_ids[targets].tolist()
+    rows = [
+        BookSimilarity(
+            book_id=book_id,
+            neighbor_id=int(model.book_ids[neighbour]),
+            rank=rank,
+            score=float(score),
+        )
+        for book_id, row, row_scores in zip(book_ids, neighbours, scores)
+        for rank, (neighbour, score) in enumerate(zip(row, row_scores))
+        if neighbour >= 0
+    ]
+    with transaction.atomic(using=using):
+        BookSimilarity.objects.using(using).filter(book_id__in=book_ids).delete()
+        BookSimilarity.objects.using(using).bulk_create(rows, batch_size=1000)
+        Book.objects.using(using).filter(pk__in=book_ids).update(
+            similarities_computed_at=computed_at
+        )
+    return len(rows)
+
+
+def _lowest_listed_scores(model, k, using):
+    """Score a book must beat to enter each stored list (0 while not full)"""
+    full = dict(
+        BookSimilarity.objects.using(using)
+        .values("book_id")
+        .annotate(entries=Count("pk"), lowest=Min("score"))
+        .filter(entries__gte=k)
+        .values_list("book_id", "lowest")
+    )
+    return np.array([full.get(book_id, 0.0) for book_id in model.book_ids.tolist()])
+
+
+def _reached_by(model, block, scores, lowest, using):
+    """Books whose stored top-K the new scores of ``block`` may change"""
+    # Similarity is symmetric: column j of a block row is j's score for it
+    entering = np.flatnonzero(((scores > 0) & (scores >= lowest)).any(axis=0))
+    holders = (
+        BookSimilarity.objects.using(using)
+        .filter(neighbor_id__in=model.book_ids[block].tolist())
+        .values_list("book_id", flat=True)
+        .distinct()
+    )
+    return np.union1d(entering, model.indexes(holders))
+
+
+def stale_book_ids(using="default"):
+    """Books whose similarities were never computed or predate a change"""
+    computed_at = F("similarities_computed_at")
+    return (
+        Book.objects.using(using)
+        .filter(
+            Q(similarities_computed_at__isnull=True)
+            | Q(ratings_changed_at__gt=computed_at)
+            | Q(updated_at__gt=computed_at)
+        )
+        .values_list("pk", flat=True)
+    )
+
+
+def rebuild_similarities(book_ids=None, k=TOP_K, using="default", model=None):
+    """Recompute and store top-``k`` neighbours.
+
+    With ``book_ids`` only those books, and the books whose lists they can
+    enter or leave, are recomputed; otherwise the whole catalog is. Returns
+    ``(books recomputed, neighbour rows written)``.
+    """
+    computed_at = timezone.now()
+    model = model or SimilarityModel.load(using)
+    size = model.block_size()
+    if book_ids is None:
+        targets = np.arange(len(model))
+        lowest = None
+    else:
+        targets = model.indexes(book_ids)
+        lowest = _lowest_listed_scores(model, k, using)
+
+    rows = 0
+    reached = [np.empty(0, dtype=np.int64)]
+    for start in range(0, len(targets), size):
+        block = targets[start : start + size]
+        scores = model.scores(block)
+        if lowest is not None:
+            reached.append(_reached_by(model, block, scores, lowest, using))
+        rows += _store(model, block, *model.top_k(scores, k), computed_at, using)
+
+    others = np.setdiff1d(np.concatenate(reached), targets)
+    for start in range(0, len(others), size):
+        block = others[start : start + size]
+        rows += _store(
+            model, block, *model.top_k(model.scores(block), k), computed_at, using
+        )
+    bump_version(RELATED)
+    return len(targets) + len(others), rows
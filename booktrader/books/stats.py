@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Denormalised catalog stats on ``Author`` and ``Publisher``.
+
+Each author and publisher row carries ``book_count``, ``rating_count``,
+``rating_sum``, ``average_rating`` (the mean of every rating of their books,
+so weighted by how often each book was rated) and ``latest_publication_date``.
+Rating writes shift the rating columns of a book's authors and publisher with
+``F()`` UPDATEs alongside the book's own (see ``books.ratings``); catalog
+edits, which are rare, recompute the affected rows with a set-based UPDATE.
+Both also move ``updated_at``, since the stats are part of what the API serves.
+"""
+
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Now, Round
+from django.db.models.lookups import GreaterThan
+
+from .models import Author, Book, Publisher
+
+STATS_FIELDS = (
+    "book_count",
+    "rating_count",
+    "rating_sum",
+    "average_rating",
+    "latest_publication_date",
+)
+
+
+def average_expression(total, count):
+    """``total / count`` to one decimal place, 0 when there is nothing to count"""
+    return Case(
+        When(GreaterThan(count, 0), then=Round(Cast(total, FloatField()) / count, 1)),
+        default=Value(0.0),
+    )
+
+
+def apply_contributor_delta(book_id, count_delta, sum_delta, using="default"):
+    """Shift the rating columns of ``book_id``'s authors and publisher"""
+    count = F("rating_count") + count_delta
+    total = F("rating_sum") + sum_delta
+    updates = {
+        "rating_count": count,
+        "rating_sum": total,
+        "average_rating": average_expression(total, count),
+        "updated_at": Now(),
+    }
+    authors = Book.authors.through.objects.filter(book_id=book_id).values("author_id")
+    Author.objects.using(using).filter(pk__in=authors).update(**updates)
+    publisher = Book.objects.using(using).filter(pk=book_id).values("publisher_id")
+    Publisher.objects.using(using).filter(pk__in=publisher).update(**updates)
+
+
+def _refresh(queryset, books, book_path):
+    """Recompute ``queryset``'s stats from ``books`` grouped per row.
+
+    ``books`` is correlated with the outer row through ``OuterRef("pk")``
+    and reaches the book fields through ``book_path``.
+    """
+
+    def aggregate(function, field, default):
+        return Coalesce(
+            Subquery(
+                books.annotate(value=function(f"{book_path}{field}")).values("value")
+            ),
+            default,
+        )
+
+    queryset.update(
+        book_count=aggregate(Count, "pk", 0),
+        rating_count=aggregate(Sum, "rating_count", 0),
+        rating_sum=aggregate(Sum, "rating_sum", 0),
+        latest_publication_date=Subquery(
+            books.annotate(value=Max(f"{book_path}publication_date")).values("value")
+        ),
+        updated_at=Now(),
+    )
+    queryset.update(
+        average_rating=average_expression(F("rating_sum"), F("rating_count"))
+    )
+
+
+def refresh_author_stats(author_ids=None, using="default"):
+    """Recompute the stats of ``author_ids`` (or of every author)"""
+    authors = Author.objects.using(using)
+    if author_ids is not None:
+        authors = authors.filter(pk__in=author_ids)
+    books = (
+        Book.authors.through.objects.filter(author_id=OuterRef("pk"))
+        .order_by()
+        .values("author_id")
+    )
+    _refresh(authors, books, "book__")
+
+
+def refresh_publisher_stats(publisher_ids=None, using="default"):
+    """Recompute the stats of ``publisher_ids`` (or of every publisher)"""
+    publishers = Publisher.objects.using(using)
+    if publisher_ids is not None:
+        publishers = publishers.filter(pk__in=publisher_ids)
+    books = (
+        Book.objects.filter(publisher_id=OuterRef("pk"))
+        .order_by()
+        .values("publisher_id")
+    )
+    _refresh(publishers, books, "")
+
+
+def refresh_contributor_stats(book_ids, using="default"):
+    """Recompute the stats of the authors and publishers of ``book_ids``"""
+    book_ids = list(book_ids)
+    refresh_author_stats(
+        Book.authors.through.objects.using(using)
+        .filter(book_id__in=book_ids)
+        .values_list("author_id", flat=True)
+        .distinct(),
+        using=using,
+    )
+    refresh_publisher_stats(
+        Book.objects.using(using)
+        .filter(pk__in=book_ids)
+        .values_list("publisher_id", flat=True)
+        .distinct(),
+        using=using,
+    )
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""In-process prefix index behind the search-as-you-type suggestions.
+
+``search_suggestions_view`` fires on every keystroke, so instead of two
+``icontains`` scans per request each worker keeps book titles and author names
+in memory and answers prefix queries with a binary search.
+
+Layout (see ``PrefixIndex``): labels are normalised (accents stripped,
+case-folded) and stored back to back in UTF-8 ``bytes`` blobs.  A key is the
+normalised label starting at one of its first few word boundaries, so "rune"
+also finds "The Road of the Rune"; keys are never materialised, only
+``(label, offset)`` pairs packed into one integer ``array`` and sorted by the
+key they describe.  That keeps a million titles in well under 100 MiB.
+
+Updates from ``post_save``/``post_delete`` go to a small sorted delta plus a
+set of superseded ids, which are folded into a fresh base once the delta grows.
+Each worker warms its own copy in a background thread on its first request
+and rebuilds it after ``BOOKS_SUGGESTIONS_MAX_AGE`` seconds, which bounds how
+stale another worker's edits can be. A build that failed is not retried for
+``BOOKS_SUGGESTIONS_RETRY_AFTER`` seconds.
+"""
+
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+MAX_WORD_STARTS = 4
+
+
+def normalize(text):
+    """Fold ``text`` to lowercase ASCII-ish form for prefix matching"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def word_starts(normalized):
+    """Byte offsets of the first ``MAX_WORD_STARTS`` words in ``normalized``"""
+    encoded = normalized.encode("utf-8")
+    starts = [0] if encoded else []
+    position = encoded.find(b" ")
+    while position != -1 and len(starts) < MAX_WORD_STARTS:
+        starts.append(position + 1)
+        position = encoded.find(b" ", position + 1)
+    return encoded, starts
+
+
+class _Segment:
+    """Immutable, sorted base of a ``PrefixIndex``"""
+
+    def __init__(self, items):
+        labels, normalized, ids = [], [], array("q")
+        entries = []  # label index << 16 | byte offset of the word start
+        for item_id, label in items:
+            encoded, starts = word_starts(normalize(label))
+            index = len(ids)
+            ids.append(item_id)
+            labels.append(label.encode("utf-8"))
+            normalized.append(encoded)
+            entries.extend((index << 16) | start for start in starts)
+
+        self.ids = ids
+        self.labels, self.label_offsets = self._pack(labels)
+        self.normalized, self.normalized_offsets = self._pack(normalized)
+        blob, offsets = self.normalized, self.normalized_offsets
+
+        def entry_key(entry):
+            index = entry >> 16
+            return blob[offsets[index] + (entry & 0xFFFF) : offsets[index + 1]]
+
+        entries.sort(key=entry_key)
+        self.entries = array("Q", entries)
+
+    @staticmethod
+    def _pack(chunks):
+        offsets = array("Q", [0])
+        total = 0
+        for chunk in chunks:
+            total += len(chunk)
+            offsets.append(total)
+        return b"".join(chunks), offsets
+
+    def _entry_key(self, entry):
+        index = entry >> 16
+        start = self.normalized_offsets[index] + (entry & 0xFFFF)
+        return self.normalized[start : self.normalized_offsets[index + 1]]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, position):
+        return self._entry_key(self.entries[position])
+
+    def label(self, index):
+        offsets = self.label_offsets
+        return self.labels[offsets[index] : offsets[index + 1]].decode("utf-8")
+
+    def items(self):
+        for index, item_id in enumerate(self.ids):
+            yield item_id, self.label(index)
+
+    def matches(self, prefix):
+        """Yield ``(key, id, label_index)`` for keys starting with ``prefix``"""
+        position = bisect_left(range(len(self)), prefix, key=self.key)
+        while position < len(self):
+            key = self.key(position)
+            if not key.startswith(prefix):
+                break
+            index = self.entries[position] >> 16
+            yield key, self.ids[index], index
+            position += 1
+
+
+class PrefixIndex:
+    """Prefix index over ``(id, label)`` pairs"""
+
+    def __init__(self, items=(), compact_ratio=0.05, compact_minimum=10_000):
+        self.compact_ratio = compact_ratio
+        self.compact_minimum = compact_minimum
+        self._lock = threading.RLock()
+        self._load(items)
+
+    def _load(self, items):
+        self._base = _Segment(items)
+        self._delta = []  # sorted (key, id) tuples
+        self._delta_labels = {}  # id -> label
+        self._superseded = set()  # base ids that were updated or removed
+
+    def add(self, item_id, label):
+        """Insert or replace the label for ``item_id``"""
+        with self._lock:
+            self._discard(item_id)
+            encoded, starts = word_starts(normalize(label))
+            for start in starts:
+                insort(self._delta, (encoded[start:], item_id))
+            self._delta_labels[item_id] = label
+            self._maybe_compact()
+
+    def remove(self, item_id):
+        with self._lock:
+            self._discard(item_id)
+
+    def _discard(self, item_id):
+        self._superseded.add(item_id)
+        if self._delta_labels.pop(item_id, None) is not None:
+            self._delta = [entry for entry in self._delta if entry[1] != item_id]
+
+    def _maybe_compact(self):
+        threshold = max(self.compact_minimum, len(self._base) * self.compact_ratio)
+        if len(self._delta) > threshold:
+            self._load(list(self.items()))
+
+    def items(self):
+        """Iterate the live ``(id, label)`` pairs"""
+        with self._lock:
+            superseded = self._superseded
+            for item_id, label in self._base.items():
+                if item_id not in superseded:
+                    yield item_id, label
+            yield from list(self._delta_labels.items())
+
+    def search(self, query, limit=5):
+        """Return up to ``limit`` ``(id, label)`` pairs whose key starts with
+        ``query``, in key order"""
+        prefix = normalize(query).encode("utf-8")
+        if not prefix:
+            return []
+        with self._lock:
+            base = self._base
+            superseded = self._superseded
+            position = bisect_left(self._delta, (prefix,))
+            delta = []
+            for key, item_id in self._delta[position:]:
+                if not key.startswith(prefix):
+                    break
+                delta.append((key, item_id, None))
+
+            results, seen = [], set()
+            for key, item_id, index in heapq.merge(
+                base.matches(prefix), delta, key=itemgetter(0)
+            ):
+                if item_id in seen:
+                    continue
+                if index is not None and item_id in superseded:
+                    continue
+                seen.add(item_id)
+                label = (
+                    self._delta_labels[item_id] if index is None else base.label(index)
+                )
+                results.append((item_id, label))
+                if len(results) >= limit:
+                    break
+            return results
+
+
+class SuggestionIndex:
+    """Book title and author name indexes for one worker process"""
+
+    def __init__(self):
+        self.books = None
+        self.authors = None
+        self.built_at = None
+        self._lock = threading.Lock()
+        self._warming = False
+        self._failed_at = None
+        self._pending = []
+
+    @property
+    def is_ready(self):
+        return self.books is not None
+
+    @property
+    def max_age(self):
+        return getattr(settings, "BOOKS_SUGGESTIONS_MAX_AGE", 900)
+
+    @property
+    def retry_after(self):
+        """Seconds to wait after a failed build before starting another"""
+        return getattr(settings, "BOOKS_SUGGESTIONS_RETRY_AFTER", 30)
+
+    def warm(self):
+        """Load every title and name from the database (blocking)"""
+        with self._lock:
+            claimed = self._claim()
+        if claimed:
+            self._build()
+
+    def warm_in_background(self):
+        """Warm (or refresh a stale index) without blocking the caller"""
+        now = time.monotonic()
+        with self._lock:
+            if self.is_ready and now - self.built_at < self.max_age:
+                return
+            # Not on every request while the database keeps failing
+            if self._failed_at is not None and now - self._failed_at < self.retry_after:
+                return
+            if not self._claim():
+                return
+
+        def run():
+            try:
+                self._build()
+            except Exception:
+                logger.exception("Failed to warm the suggestion index")
+            finally:
+                connection.close()
+
+        threading.Thread(target=run, name="suggestion-index", daemon=True).start()
+
+    def _claim(self):
+        """Mark a build as started unless one already is (hold the lock)"""
+        if self._warming:
+            return False
+        self._warming = True
+        self._pending = []
+        return True
+
+    def _build(self):
+        from .models import Author, Book
+
+        try:
+            started = time.monotonic()
+            books = PrefixIndex(Book.objects.values_list("pk", "title").iterator())
+            authors = PrefixIndex(Author.objects.values_list("pk", "name").iterator())
+            with self._lock:
+                # Replay changes that were signalled while we were loading
+                for kind, item_id, label in self._pending:
+                    index = books if kind == "book" else authors
+                    if label is None:
+                        index.remove(item_id)
+                    else:
+                        index.add(item_id, label)
+                self.books, self.authors = books, authors
+                self.built_at = time.monotonic()
+                self._failed_at = None
+            logger.info("Warmed suggestion index in %.2fs", self.built_at - started)
+        except Exception:
+            self._failed_at = time.monotonic()
+            raise
+        finally:
+            with self._lock:
+                self._warming = False
+                self._pending = []
+
+    def reset(self):
+        """Forget the loaded indexes (suggestions fall back to the database)"""
+        with self._lock:
+            self.books = self.authors = self.built_at = None
+
+    def update(self, kind, item_id, label=None):
+        """Apply a saved (``label`` given) or deleted item"""
+        with self._lock:
+            if self._warming:
+                self._pending.append((kind, item_id, label))
+            index = self.books if kind == "book" else self.authors
+        if index is None:
+            return
+        if label is None:
+            index.remove(item_id)
+        else:
+            index.add(item_id, label)
+
+    def suggest(self, query, limit=5):
+        """Return ``(books, authors)`` lists of ``(id, label)`` pairs"""
+        return self.books.search(query, limit), self.authors.search(query, limit)
+
+
+suggestion_index = SuggestionIndex()
@@ -0,0 +1,132 @@
+# encoding: utf-8
+from books.models import Author, Book, BookCondition, Publisher, Rating
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class TestBookAdmin(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(self.admin)
+        self.publisher = Publisher.objects.create(name="Orbit")
+        self.author = Author.objects.create(name="Ann Leckie")
+        self.readers = []
+        self.added = 0
+
+    def add_books(self, count):
+        for _ in range(count):
+            self.added += 1
+            book = Book.objects.create(
+                title=f"Ancillary {self.added}",
+                isbn=f"9780316{self.added:06d}",
+                publisher=self.publisher,
+            )
+            book.authors.add(
+                self.author, Author.objects.create(name=f"Co {self.added}")
+            )
+            reader = User.objects.create_user(f"reader{self.added}")
+            Rating.objects.create(book=book, user=reader, rating=4)
+            BookCondition.objects.create(book=book, owner=reader, condition="good")
+
+    def queries(self, url, **params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    def test_changelists_do_not_grow_with_rows(self):
+        for name in ("book", "rating", "bookcondition"):
+            url = reverse(f"admin:books_{name}_changelist")
+            self.add_books(3)
+            few = self.queries(url)
+            self.add_books(10)
+            assert self.queries(url) == few, name
+
+    def test_author_names_are_aggregated(self):
+        self.add_books(2)
+        response = self.client.get(reverse("admin:books_book_changelist"))
+        books = {book.title: book for book in response.context["cl"].result_list}
+        names = sorted(books["Ancillary 2"].author_list.split(", "))
+        assert names == ["Ann Leckie", "Co 2"]
+
+    def test_counts_are_cached(self):
+        self.add_books(2)
+        url = reverse("admin:books_book_changelist")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        assert response.context["cl"].result_count == 2
+        assert not any("COUNT(" in query["sql"] for query in context.captured_queries)
+
+    def add_ratings(self, book, count):
+        for _ in range(count):
+            self.added += 1
+            reader = User.objects.create_user(f"critic{self.added}")
+            Rating.objects.create(book=book, user=reader, rating=3)
+
+    def test_inlines_are_paginated(self):
+        self.add_books(1)
+        book = Book.objects.get()
+        self.add_ratings(book, 25)
+        url = reverse("admin:books_book_change", args=[book.pk])
+
+        response = self.client.get(url)
+        ratings = response.context["inline_admin_formsets"][0].formset
+        assert len(ratings.forms) == 20
+        assert ratings.paginator.count == 26
+        self.assertContains(response, f"?{ratings.prefix}-page=2")
+
+        response = self.client.get(url, {f"{ratings.prefix}-page": 2})
+        ratings = response.context["inline_admin_formsets"][0].formset
+        assert len(ratings.forms) == 6
+
+        full_page = self.queries(url)
+        self.add_ratings(book, 40)
+        assert self.queries(url) == full_page
+
+    def test_contributor_stats_are_read_only(self):
+        self.add_books(1)
+        for obj, data in (
+            (self.author, {"name": "Ann Leckie", "website": ""}),
+            (self.publisher, {"name": "Orbit Books", "website": ""}),
+        ):
+            opts = obj._meta
+            url = reverse(
+                f"admin:{opts.app_label}_{opts.model_name}_change", args=[obj.pk]
+            )
+            response = self.client.post(
+                url, {**data, "book_count": 99, "rating_count": 99}
+            )
+            assert response.status_code == 302
+            obj.refresh_from_db()
+            assert (obj.name, obj.book_count, obj.rating_count) == (
+                data["name"],
+                1,
+                1,
+            )
+
+    def test_filters_use_fixed_choices(self):
+        self.add_books(2)
+        Book.objects.filter(title="Ancillary 2").update(language="fr")
+        Rating.objects.filter(book__title="Ancillary 2").update(rating=1)
+
+        response = self.client.get(
+            reverse("admin:books_book_changelist"), {"language": "fr"}
+        )
+        assert [book.title for book in response.context["cl"].result_list] == [
+            "Ancillary 2"
+        ]
+        self.assertContains(response, "?language=en")
+
+        response = self.client.get(
+            reverse("admin:books_rating_changelist"), {"rating": 1}
+        )
+        assert [r.book.title for r in response.context["cl"].result_list] == [
+            "Ancillary 2"
+        ]
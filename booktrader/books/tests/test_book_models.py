@@ -33,3 +33,23 @@ class TestBooks(TestCase):
         updated_average_rating = Book.objects.get(pk=self.book.pk).average_rating
 
         assert updated_average_rating == expected_rating
+
+    def test_rating_stats_follow_changes(self):
+        """rating_count and rating_sum track saved, edited and deleted ratings"""
+        first = Rating.objects.create(book=self.book, user=self.user, rating=2)
+        Rating.objects.create(book=self.book, user=self.user2, rating=5)
+        first.rating = 4
+        first.save()
+        book = Book.objects.get(pk=self.book.pk)
+        assert (book.rating_count, book.rating_sum) == (2, 9)
+        assert book.average_rating == 4.5
+
+        first.delete()
+        book.refresh_from_db()
+        assert (book.rating_count, book.rating_sum) == (1, 5)
+        assert book.average_rating == 5
+
+        self.user2.delete()
+        book.refresh_from_db()
+        assert (book.rating_count, book.rating_sum) == (0, 0)
+        assert book.average_rating == 0
@@ -0,0 +1,249 @@
+# encoding: utf-8
+from books.models import Author, Book, Publisher, Rating
+from books.pagination import KeysetPaginator, decode_cursor
+from books.similarity import rebuild_similarities
+from books.views import BOOKS_PER_PAGE, REVIEWS_PER_PAGE
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from images.models import ImageAsset
+
+
+class TestBookListView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name="Ursula Vance")
+        self.publisher = Publisher.objects.create(name="Gray Harbor")
+        for i in range(BOOKS_PER_PAGE * 2 + 3):
+            book = Book.objects.create(
+                title=f"Archipelago {i:02d}",
+                isbn=f"97800000000{i:02d}",
+                publisher=self.publisher,
+            )
+            book.authors.add(self.author)
+        self.url = reverse("books:book_list")
+
+    def test_first_page(self):
+        """The first page holds the first BOOKS_PER_PAGE titles in order"""
+        response = self.client.get(self.url)
+        assert response.status_code == 200
+        page = response.context["page_obj"]
+        assert [book.title for book in page] == [
+            f"Archipelago {i:02d}" for i in range(BOOKS_PER_PAGE)
+        ]
+        assert page.has_next()
+        assert not page.has_previous()
+        assert response.context["total_count"] == BOOKS_PER_PAGE * 2 + 3
+
+    def test_follow_cursors(self):
+        """Following next/previous cursors walks the catalog without gaps"""
+        seen = []
+        cursor = ""
+        while True:
+            response = self.client.get(self.url, {"cursor": cursor})
+            page = response.context["page_obj"]
+            seen.extend(book.title for book in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        assert seen == [f"Archipelago {i:02d}" for i in range(BOOKS_PER_PAGE * 2 + 3)]
+
+        response = self.client.get(self.url, {"cursor": page.previous_cursor})
+        previous = response.context["page_obj"]
+        assert [book.title for book in previous] == seen[
+            BOOKS_PER_PAGE : BOOKS_PER_PAGE * 2
+        ]
+
+    def test_links_keep_list_params_only(self):
+        """Pagination links carry the filters, not tracking parameters"""
+        response = self.client.get(self.url, {"genre": "", "utm_source": "mail"})
+        next_cursor = response.context["page_obj"].next_cursor
+        self.assertContains(response, f"?genre=&amp;cursor={next_cursor}")
+        self.assertNotContains(response, "utm_source")
+
+    def test_search_results_follow_cursors(self):
+        """Ranked search results page by (rank, pk) cursors"""
+        seen = []
+        cursor = ""
+        while True:
+            response = self.client.get(
+                self.url, {"search": "archipelago", "cursor": cursor}
+            )
+            page = response.context["page_obj"]
+            seen.extend(book.pk for book in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        assert sorted(seen) == sorted(Book.objects.values_list("pk", flat=True))
+        assert len(seen) == len(set(seen))
+
+    def test_invalid_cursor_returns_first_page(self):
+        """A garbage cursor falls back to the first page"""
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        assert response.status_code == 200
+        assert response.context["page_obj"][0].title == "Archipelago 00"
+
+    def test_min_rating_uses_stored_average(self):
+        """min_rating filters on the maintained average_rating column"""
+        Book.objects.filter(title="Archipelago 03").update(
+            average_rating=4.2, rating_count=5, rating_sum=21
+        )
+        response = self.client.get(self.url, {"min_rating": "4"})
+        books = list(response.context["page_obj"])
+        assert [book.title for book in books] == ["Archipelago 03"]
+        self.assertContains(response, "4.2 (5 reviews)")
+
+    def test_invalid_min_rating_is_ignored(self):
+        for value in ("nan", "inf", "-inf", "high"):
+            response = self.client.get(self.url, {"min_rating": value})
+            assert response.status_code == 200
+            assert response.context["total_count"] == BOOKS_PER_PAGE * 2 + 3
+
+    def test_page_number_links(self):
+        """Legacy ?page=N links are served with LIMIT/OFFSET"""
+        response = self.client.get(self.url, {"page": 3})
+        page = response.context["page_obj"]
+        assert page.number == 3
+        assert len(page) == 3
+
+
+class TestBookDetailView(TestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Gray Harbor")
+        author = Author.objects.create(name="Ursula Vance")
+        self.book, other = (
+            Book.objects.create(
+                title=title, isbn=f"978000000010{i}", publisher=publisher
+            )
+            for i, title in enumerate(["Tidewater", "Saltmarsh"])
+        )
+        self.book.authors.add(author)
+        other.authors.add(author)
+        for i, score in enumerate([4, 5]):
+            user = User.objects.create_user(f"reader{i}")
+            Rating.objects.create(user=user, book=self.book, rating=score)
+        rebuild_similarities()
+
+    def test_stats_come_from_the_book_row(self):
+        """Rating stats and the histogram need no queries against ratings"""
+        url = reverse("books:book_detail", args=[self.book.pk])
+        # book, its authors, related books, their authors
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        assert response.status_code == 200
+        book = response.context["book"]
+        assert (book.average_rating, book.rating_count) == (4.5, 2)
+        assert book.rating_histogram == [
+            (5, 1, 50),
+            (4, 1, 50),
+            (3, 0, 0),
+            (2, 0, 0),
+            (1, 0, 0),
+        ]
+        assert [b.title for b in response.context["related_books"]] == ["Saltmarsh"]
+        self.assertContains(
+            response, reverse("books:book_reviews", args=[self.book.pk])
+        )
+
+    def test_reviews_fragment_pages_newest_first(self):
+        """Reviews are served in keyset pages from their own endpoint"""
+        for i in range(REVIEWS_PER_PAGE):
+            user = User.objects.create_user(f"critic{i}")
+            Rating.objects.create(
+                user=user, book=self.book, rating=3, review=f"Review {i}"
+            )
+        url = reverse("books:book_reviews", args=[self.book.pk])
+        response = self.client.get(url)
+        page = response.context["reviews"]
+        assert [r.review for r in page] == [
+            f"Review {i}" for i in reversed(range(REVIEWS_PER_PAGE))
+        ]
+        assert page.has_next()
+
+        response = self.client.get(url, {"cursor": page.next_cursor})
+        rest = response.context["reviews"]
+        assert [r.user.username for r in rest] == ["reader1", "reader0"]
+        assert not rest.has_next()
+        self.assertNotContains(response, "Load more")
+
+    def test_missing_book(self):
+        response = self.client.get(reverse("books:book_detail", args=[0]))
+        assert response.status_code == 404
+
+
+class TestCoverImages(TestCase):
+    def setUp(self):
+        cache.clear()
+        publisher = Publisher.objects.create(name="Ace")
+        self.book = Book.objects.create(
+            title="Dune",
+            isbn="9780441013593",
+            publisher=publisher,
+            cover_image="book_covers/dune.jpg",
+        )
+
+    def test_pending_cover(self):
+        """Covers are looked up off the event loop, before rendering"""
+        for url in (
+            reverse("books:book_list"),
+            reverse("books:book_detail", args=[self.book.pk]),
+        ):
+            response = self.client.get(url)
+            assert response.status_code == 200
+            self.assertContains(response, "book_covers/dune.jpg")
+            self.assertNotContains(response, "<picture>")
+
+    def test_ready_cover(self):
+        ImageAsset.objects.filter(source="book_covers/dune.jpg").update(
+            status=ImageAsset.READY,
+            width=800,
+            height=1200,
+            derivatives=[
+                {
+                    "size": size,
+                    "width": width,
+                    "height": width * 3 // 2,
+                    "webp": f"derivatives/aa/{size}.webp",
+                    "jpeg": f"derivatives/aa/{size}.jpg",
+                }
+                for size, width in (("medium", 480), ("large", 800))
+            ],
+        )
+        for url in (
+            reverse("books:book_list"),
+            reverse("books:book_detail", args=[self.book.pk]),
+        ):
+            response = self.client.get(url)
+            assert response.status_code == 200
+            self.assertContains(response, "<picture>")
+            self.assertContains(response, "derivatives/aa/medium.webp 480w")
+
+
+class TestKeysetPaginator(TestCase):
+    def setUp(self):
+        self.publisher = Publisher.objects.create(name="Tied Titles")
+        for i in range(5):
+            Book.objects.create(
+                title="Same Title", isbn=f"978000000010{i}", publisher=self.publisher
+            )
+
+    def test_ties_are_broken_by_pk(self):
+        """Duplicate titles are neither skipped nor repeated"""
+        paginator = KeysetPaginator(Book.objects.all(), ("title", "pk"), 2)
+        page = paginator.get_page()
+        pks = [book.pk for book in page]
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            pks.extend(book.pk for book in page)
+        assert pks == sorted(Book.objects.values_list("pk", flat=True))
+
+    def test_descending_ordering(self):
+        """Descending keys page backwards through the index"""
+        paginator = KeysetPaginator(Book.objects.all(), ("-pk",), 3)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        expected = sorted(Book.objects.values_list("pk", flat=True), reverse=True)
+        assert [book.pk for book in first] + [book.pk for book in second] == expected
+        values, direction = decode_cursor(first.next_cursor)
+        assert values == [expected[2]] and direction == "n"
@@ -0,0 +1,192 @@
+# encoding: utf-8
+import csv
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from books.catalog_import import CatalogImporter
+from books.facets import get_facets
+from books.filters import get_book_filters
+from books.models import Author, Book, Publisher, Rating
+from books.search import get_search_backend
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.http import QueryDict
+from django.test import TestCase
+
+FIELDS = ["isbn", "title", "publisher", "authors", "publication_date", "page_count"]
+ROWS = [
+    ["9780441013593", "Dune", "Ace", "Frank Herbert", "1965-08-01", "412"],
+    ["0-441-47812-3", "The Left Hand of Darkness", "Ace", "Ursula K. Le Guin", "", ""],
+    [
+        "9780061054884",
+        "The Dispossessed",
+        "Harper Voyager",
+        "Ursula K. Le Guin|Brian  Attebery",
+        "1974-05-01",
+        "387",
+    ],
+    ["not-an-isbn", "Nameless", "Ace", "", "", ""],
+    ["9780553293357", "Foundation", "Spectra", "Isaac Asimov", "1951-06-01", "x"],
+    ["9780553293401", "Foundation and Empire", "Spectra", "Isaac Asimov", "", ""],
+]
+
+
+class TestImportCatalog(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write_csv(self, rows, name="catalog.csv"):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", newline="", encoding="utf-8") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(FIELDS)
+            writer.writerows(rows)
+        return path
+
+    def run_import(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_catalog", path, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imports_csv(self):
+        stdout, stderr = self.run_import(self.write_csv(ROWS), batch_size=2)
+        assert "4 created, 0 updated, 2 skipped" in stdout
+        assert "Row 4: invalid isbn 'not-an-isbn'" in stderr
+        assert "Row 5: invalid page_count 'x'" in stderr
+
+        assert Publisher.objects.count() == 3
+        # Names are deduplicated, whitespace included
+        assert sorted(Author.objects.values_list("name", flat=True)) == [
+            "Brian Attebery",
+            "Frank Herbert",
+            "Isaac Asimov",
+            "Ursula K. Le Guin",
+        ]
+        left_hand = Book.objects.get(isbn13="9780441478125")
+        assert left_hand.isbn == "0-441-47812-3"
+        assert left_hand.publication_date is None
+        dune = Book.objects.get(isbn13="9780441013593")
+        assert dune.publication_date == datetime.date(1965, 8, 1)
+        assert dune.page_count == 412
+
+        le_guin = Author.objects.get(name="Ursula K. Le Guin")
+        assert le_guin.book_count == 2
+        assert Publisher.objects.get(name="Ace").book_count == 2
+        results = get_search_backend().search(Book.objects.all(), "dispossessed")
+        assert [book.title for book in results] == ["The Dispossessed"]
+        assert not os.path.exists(self.write_csv(ROWS) + ".checkpoint")
+
+    def test_upserts_on_isbn(self):
+        self.run_import(self.write_csv(ROWS[:3]))
+        dune = Book.objects.get(isbn13="9780441013593")
+        Rating.objects.create(book=dune, user=User.objects.create_user("r"), rating=4)
+
+        path = os.path.join(self.directory, "update.jsonl")
+        with open(path, "w") as stream:
+            # ISBN-10 spelling of Dune, a new publisher and author list
+            record = {
+                "isbn": "0441013597",
+                "title": "Dune (Deluxe Edition)",
+                "publisher": "Chilton",
+                "authors": ["Frank Herbert", "Brian Herbert"],
+                "original_price": 19.999,
+            }
+            stream.write(json.dumps(record) + "\n")
+            stream.write("{broken\n")
+        stdout, _ = self.run_import(path)
+        assert "0 created, 1 updated, 1 skipped" in stdout
+
+        dune.refresh_from_db()
+        assert dune.title == "Dune (Deluxe Edition)"
+        assert dune.isbn == "9780441013593"
+        assert dune.original_price == Decimal("20.00")
+        # Columns the record did not mention are kept, ratings included
+        assert dune.page_count == 412
+        assert dune.rating_count == 1
+        assert sorted(dune.authors.values_list("name", flat=True)) == [
+            "Brian Herbert",
+            "Frank Herbert",
+        ]
+        assert Publisher.objects.get(name="Chilton").rating_count == 1
+        assert Publisher.objects.get(name="Ace").book_count == 1
+        assert Book.objects.count() == 3
+
+    def test_legacy_spelling_without_isbn13(self):
+        """A book holding a row's isbn but no isbn13 is updated, not duplicated"""
+        ace = Publisher.objects.create(name="Ace")
+        dune = Book.objects.create(title="Dune?", isbn="0441013597", publisher=ace)
+        other = Book.objects.create(title="Other", isbn="0441478123", publisher=ace)
+        Book.objects.filter(pk__in=[dune.pk, other.pk]).update(isbn13=None)
+        # The isbn13 of "0441478123" already belongs to another spelling
+        Book.objects.create(title="Left Hand", isbn="9780441478125", publisher=ace)
+
+        stdout, _ = self.run_import(
+            self.write_csv(
+                [
+                    ["0441013597", "Dune", "Ace", "", "", ""],
+                    ["0441478123", "The Left Hand of Darkness", "Ace", "", "", ""],
+                ]
+            )
+        )
+        assert "0 created, 2 updated" in stdout
+        dune.refresh_from_db()
+        assert (dune.title, dune.isbn13) == ("Dune", "9780441013593")
+        left_hand = Book.objects.get(isbn13="9780441478125")
+        assert left_hand.title == "The Left Hand of Darkness"
+        assert Book.objects.count() == 3
+
+    def test_resumes_from_checkpoint(self):
+        path = self.write_csv(ROWS)
+        write = CatalogImporter.write
+        calls = []
+
+        def interrupted(importer, rows):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return write(importer, rows)
+
+        with mock.patch.object(CatalogImporter, "write", interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import(path, batch_size=2)
+        assert Book.objects.count() == 2
+        with open(path + ".checkpoint") as stream:
+            assert json.load(stream)["rows"] == 2
+
+        stdout, _ = self.run_import(path, batch_size=2)
+        assert "Resuming after row 2" in stdout
+        assert "4 created, 0 updated, 2 skipped" in stdout
+        assert Book.objects.count() == 4
+        assert Author.objects.count() == 4
+
+    def test_interrupted_import_retires_facets(self):
+        filters = get_book_filters(QueryDict())
+        assert get_facets(filters)["publishers"] == []
+        write = CatalogImporter.write
+
+        def interrupted(importer, rows):
+            if Book.objects.exists():
+                raise KeyboardInterrupt
+            return write(importer, rows)
+
+        with mock.patch.object(CatalogImporter, "write", interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import(self.write_csv(ROWS), batch_size=2)
+        facets = get_facets(filters)
+        assert [facet["value"] for facet in facets["publishers"]] == ["Ace"]
+
+    def test_changed_file_needs_restart(self):
+        path = self.write_csv(ROWS)
+        with open(path + ".checkpoint", "w") as stream:
+            json.dump({"source": {"size": 1, "mtime_ns": 1}}, stream)
+        with self.assertRaises(CommandError):
+            self.run_import(path)
+        self.run_import(path, restart=True)
+        assert Book.objects.count() == 4
@@ -0,0 +1,21 @@
+# encoding: utf-8
+from books.checks import check_shared_cache
+from django.test import SimpleTestCase, override_settings
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+DATABASE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "booktrader_cache",
+    }
+}
+
+
+class TestSharedCacheCheck(SimpleTestCase):
+    def test_process_local_cache_warns_without_debug(self):
+        with override_settings(DEBUG=False, CACHES=LOCMEM):
+            assert [error.id for error in check_shared_cache(None)] == ["books.W001"]
+        with override_settings(DEBUG=False, CACHES=DATABASE):
+            assert check_shared_cache(None) == []
+        with override_settings(DEBUG=True, CACHES=LOCMEM):
+            assert check_shared_cache(None) == []
@@ -0,0 +1,84 @@
+# encoding: utf-8
+from books.facets import get_facets
+from books.filters import get_book_filters
+from books.models import Author, Book, Publisher
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+
+
+class TestFacets(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tor = Publisher.objects.create(name="Tor")
+        self.ace = Publisher.objects.create(name="Ace")
+        self.le_guin = Author.objects.create(name="Ursula K. Le Guin")
+        self.herbert = Author.objects.create(name="Frank Herbert")
+        books = [
+            ("A Wizard of Earthsea", self.tor, "fantasy", self.le_guin),
+            ("The Dispossessed", self.ace, "sci_fi", self.le_guin),
+            ("Dune", self.ace, "sci_fi", self.herbert),
+        ]
+        for i, (title, publisher, genre, author) in enumerate(books):
+            book = Book.objects.create(
+                title=title,
+                isbn=f"97800000002{i:02d}",
+                publisher=publisher,
+                genre=genre,
+            )
+            book.authors.add(author)
+
+    def facets(self, query=""):
+        return get_facets(get_book_filters(QueryDict(query)))
+
+    def test_counts_without_filters(self):
+        """Every facet value carries its book count"""
+        facets = self.facets()
+        assert facets["publishers"] == [
+            {"value": "Ace", "label": "Ace", "count": 2},
+            {"value": "Tor", "label": "Tor", "count": 1},
+        ]
+        assert facets["genres"] == [
+            {"value": "fantasy", "label": "Fantasy", "count": 1},
+            {"value": "sci_fi", "label": "Science Fiction", "count": 2},
+        ]
+        assert facets["languages"] == [{"value": "en", "label": "en", "count": 3}]
+
+    def test_counts_follow_other_filters(self):
+        """Facets are narrowed by every filter except their own"""
+        facets = self.facets("publisher=Ace&genre=sci_fi")
+        assert {a["value"]: a["count"] for a in facets["authors"]} == {
+            "Frank Herbert": 1,
+            "Ursula K. Le Guin": 1,
+        }
+        # The publisher facet ignores the publisher filter itself
+        assert {p["value"]: p["count"] for p in facets["publishers"]} == {"Ace": 2}
+
+    def test_cached_until_catalog_changes(self):
+        """Repeat requests hit the cache; catalog edits invalidate it"""
+        self.facets()
+        with self.assertNumQueries(0):
+            self.facets()
+
+        Publisher.objects.create(name="Gollancz")
+        book = Book.objects.create(
+            title="Hyperion", isbn="9780553283686", publisher_id=self.tor.pk
+        )
+        book.authors.add(self.herbert)
+        publishers = self.facets()["publishers"]
+        assert {p["value"]: p["count"] for p in publishers} == {"Ace": 2, "Tor": 2}
+
+
+class TestBookListFacets(TestCase):
+    def test_dropdowns_show_counts(self):
+        """The book list renders facet counts in its dropdowns"""
+        cache.clear()
+        publisher = Publisher.objects.create(name="Orbit")
+        Book.objects.create(
+            title="Leviathan Wakes", isbn="9780316129084", publisher=publisher
+        )
+        response = self.client.get(reverse("books:book_list"), {"genre": "other"})
+        assert response.status_code == 200
+        self.assertContains(response, "Orbit (1)")
+        assert response.context["genre_filter"] == "other"
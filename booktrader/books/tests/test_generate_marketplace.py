@@ -0,0 +1,47 @@
+# encoding: utf-8
+from io import StringIO
+
+from auctions.models import Auction, Bid
+from books.management.commands.generate_marketplace import isbn13
+from books.models import Book
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from trades.models import Trade
+from users.models import UserProfile
+
+
+class TestGenerateMarketplace(TestCase):
+    def generate(self):
+        call_command(
+            "generate_marketplace",
+            "--as-of=2026-01-01",
+            scale=0.001,
+            seed=3,
+            stdout=StringIO(),
+        )
+
+    def test_generates_linked_rows(self):
+        self.generate()
+        assert Book.objects.count() == 100
+        assert User.objects.count() == UserProfile.objects.count() == 25
+        assert Auction.objects.count() == 40
+        assert Trade.objects.count() == 30
+        assert not any(user.has_usable_password() for user in User.objects.all())
+        # Explicit timestamps survive bulk inserts, and auto_now is restored
+        assert Book.objects.filter(created_at__year__lt=2025).exists()
+        assert Book._meta.get_field("updated_at").auto_now
+
+    def test_bid_ladders_climb(self):
+        self.generate()
+        for auction in Auction.objects.filter(bids__isnull=False).distinct()[:10]:
+            amounts = list(
+                auction.bids.order_by("timestamp").values_list("amount", flat=True)
+            )
+            assert amounts == sorted(amounts)
+            assert amounts[0] > auction.starting_price
+        assert not Bid.objects.filter(auction__status="draft").exists()
+
+    def test_isbns_are_valid(self):
+        assert isbn13(1) == "9798000000014"
+        assert len({isbn13(n) for n in range(1000)}) == 1000
@@ -0,0 +1,63 @@
+# encoding: utf-8
+from books.isbn import InvalidISBN, normalize_isbn, to_isbn13
+from books.models import Book, Publisher
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+
+
+class TestNormalization(SimpleTestCase):
+    def test_spellings(self):
+        for value in (
+            "9780441013593",
+            "978-0-441-01359-3",
+            "ISBN 978 0 441 01359 3",
+            "0441013597",
+            "ISBN-10: 0-441-01359-7",
+        ):
+            assert to_isbn13(value) == "9780441013593", value
+        # ISBN-10 check digit X, in either case
+        assert normalize_isbn("0-8044-2957-x") == "9780804429573"
+
+    def test_invalid(self):
+        for value in ("978-0-441-01359-4", "0441013598", "1234567890123", "", None):
+            assert normalize_isbn(value) is None, value
+        with self.assertRaises(InvalidISBN):
+            to_isbn13("bench-000000000001")
+
+
+class TestBookISBN13(TestCase):
+    def setUp(self):
+        self.publisher = Publisher.objects.create(name="Ace")
+
+    def test_set_on_save(self):
+        book = Book.objects.create(
+            title="Dune", isbn="0-441-01359-7", publisher=self.publisher
+        )
+        assert book.isbn13 == "9780441013593"
+        book.isbn = "not an isbn"
+        book.save(update_fields=["isbn"])
+        book.refresh_from_db()
+        assert book.isbn13 is None
+
+    def test_other_spellings_conflict(self):
+        Book.objects.create(
+            title="Dune", isbn="9780441013593", publisher=self.publisher
+        )
+        duplicate = Book(title="Dune", isbn="0441013597", publisher=self.publisher)
+        with self.assertRaises(ValidationError) as raised:
+            duplicate.full_clean()
+        assert "isbn" in raised.exception.message_dict
+
+    def test_save_skips_a_taken_isbn13(self):
+        """Unvalidated saves of another spelling leave isbn13 NULL"""
+        dune = Book.objects.create(
+            title="Dune", isbn="9780441013593", publisher=self.publisher
+        )
+        legacy = Book.objects.create(
+            title="Dune", isbn="0441013597", publisher=self.publisher
+        )
+        assert legacy.isbn13 is None
+        legacy.title = "Dune (1965)"
+        legacy.save()
+        dune.refresh_from_db()
+        assert dune.isbn13 == "9780441013593"
@@ -0,0 +1,132 @@
+# encoding: utf-8
+import asyncio
+from unittest import mock
+
+from books import pagecache
+from books.models import Book, Publisher, Rating
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+
+class TestGetPage(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.renders = 0
+
+    async def render(self, html="<p>page</p>"):
+        self.renders += 1
+        await asyncio.sleep(0.01)
+        return html
+
+    async def test_one_render_for_concurrent_requests(self):
+        """Concurrent misses wait for a single render instead of stampeding"""
+        results = await asyncio.gather(
+            *(pagecache.aget_page("p", "v1", self.render) for _ in range(10))
+        )
+        assert self.renders == 1
+        assert [html for html, _ in results] == ["<p>page</p>"] * 10
+        outcomes = sorted(outcome for _, outcome in results)
+        assert outcomes == [pagecache.MISS] + [pagecache.WAIT] * 9
+
+        assert await pagecache.aget_page("p", "v1", self.render) == (
+            "<p>page</p>",
+            pagecache.HIT,
+        )
+
+    async def test_stale_copy_served_during_rerender(self):
+        """A new version is rendered once; meanwhile others get the old copy"""
+        await pagecache.aget_page("p", "v1", self.render)
+        renderer = asyncio.ensure_future(
+            pagecache.aget_page("p", "v2", lambda: self.render("<p>new</p>"))
+        )
+        await asyncio.sleep(0)
+        assert await pagecache.aget_page("p", "v2", self.render) == (
+            "<p>page</p>",
+            pagecache.STALE,
+        )
+        assert await renderer == ("<p>new</p>", pagecache.MISS)
+        assert self.renders == 2
+
+    async def test_gives_up_waiting(self):
+        await cache.aadd("books:page:p:lock:v1", 1)
+        with mock.patch.object(pagecache, "WAIT_FOR", 0.1):
+            result = await pagecache.aget_page("p", "v1", self.render)
+        assert result == ("<p>page</p>", pagecache.MISS)
+
+
+class TestCachedPages(TestCase):
+    def setUp(self):
+        cache.clear()
+        publisher = Publisher.objects.create(name="Gray Harbor")
+        self.book = Book.objects.create(
+            title="Tidewater", isbn="9780000000500", publisher=publisher
+        )
+        self.url = reverse("books:book_detail", args=[self.book.pk])
+
+    def test_anonymous_detail_is_cached_until_ratings_change(self):
+        response = self.client.get(self.url)
+        assert response["X-Cache"] == pagecache.MISS
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        assert response["X-Cache"] == pagecache.HIT
+        self.assertContains(response, "<title>Tidewater | Book Trader</title>")
+
+        user = User.objects.create_user("reader")
+        Rating.objects.create(user=user, book=self.book, rating=5)
+        response = self.client.get(self.url)
+        assert response["X-Cache"] == pagecache.MISS
+        assert response.context["book"].rating_count == 1
+
+    def test_list_is_cached_per_filters(self):
+        url = reverse("books:book_list")
+        assert self.client.get(url)["X-Cache"] == pagecache.MISS
+        assert self.client.get(url)["X-Cache"] == pagecache.HIT
+        response = self.client.get(url, {"genre": "fiction"})
+        assert response["X-Cache"] == pagecache.MISS
+        # Parameters the list ignores share its cached copy
+        response = self.client.get(url, {"genre": "fiction", "utm_source": "mail"})
+        assert response["X-Cache"] == pagecache.HIT
+        self.assertContains(response, "<title>Books | Book Trader</title>")
+
+        self.book.title = "Tidewater Revised"
+        self.book.save()
+        response = self.client.get(url)
+        assert response["X-Cache"] == pagecache.MISS
+        self.assertContains(response, "Tidewater Revised")
+
+    def test_revalidation_without_rendering(self):
+        etag = self.client.get(self.url)["ETag"]
+        assert etag.startswith('W/"')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert response["X-Cache"] == pagecache.NOT_MODIFIED
+
+        self.book.title = "Tidewater Revised"
+        self.book.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_signed_in_users_bypass_the_cache(self):
+        user = User.objects.create_user("reader")
+        self.client.force_login(user)
+        for _ in range(2):
+            response = self.client.get(self.url)
+            assert response["X-Cache"] == pagecache.BYPASS
+            assert not response.has_header("ETag")
+        self.assertContains(response, "Welcome, reader")
+
+    def test_stats(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        stats_url = reverse("books:page_cache_stats")
+        assert self.client.get(stats_url).status_code == 404
+
+        staff = User.objects.create_user("staff", is_staff=True)
+        self.client.force_login(staff)
+        stats = self.client.get(stats_url).json()
+        assert (stats["miss"], stats["hit"]) == (1, 1)
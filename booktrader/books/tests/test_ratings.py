@@ -0,0 +1,140 @@
+# encoding: utf-8
+from io import StringIO
+
+from books.models import Book, Publisher, Rating
+from books.versions import RATINGS, get_version
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class TestIncrementalRatings(TestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Tachyon")
+        self.book = Book.objects.create(
+            title="Flowers for Algernon", isbn="9780156030083", publisher=publisher
+        )
+        self.other = Book.objects.create(
+            title="The Left Hand of Darkness", isbn="9780441478125", publisher=publisher
+        )
+        self.users = [User.objects.create_user(f"reader{i}") for i in range(3)]
+
+    def stats(self, book):
+        book.refresh_from_db()
+        return book.rating_count, book.rating_sum, book.average_rating
+
+    def test_writes_do_not_aggregate(self):
+        """A rating write is the row plus one UPDATE each of the book, its
+        authors and its publisher"""
+        for user, score in zip(self.users[1:], [3, 4]):
+            Rating.objects.create(book=self.book, user=user, rating=score)
+        with self.assertNumQueries(6):  # savepoint, INSERT, 3 UPDATEs, release
+            rating = Rating.objects.create(book=self.book, user=self.users[0], rating=2)
+        assert self.stats(self.book) == (3, 9, 3)
+
+        rating.rating = 5
+        with self.assertNumQueries(6):
+            rating.save()
+        assert self.stats(self.book) == (3, 12, 4)
+
+    def test_histogram_follows_changes(self):
+        rating = Rating.objects.create(book=self.book, user=self.users[0], rating=2)
+        Rating.objects.create(book=self.book, user=self.users[1], rating=2)
+        rating.rating = 5
+        rating.save()
+        self.book.refresh_from_db()
+        assert [count for _, count, _ in self.book.rating_histogram] == [1, 0, 0, 1, 0]
+        rating.delete()
+        self.book.refresh_from_db()
+        assert [count for _, count, _ in self.book.rating_histogram] == [0, 0, 0, 1, 0]
+
+    def test_moving_a_rating_between_books(self):
+        rating = Rating.objects.create(book=self.book, user=self.users[0], rating=4)
+        rating.book = self.other
+        rating.save()
+        assert self.stats(self.book) == (0, 0, 0)
+        assert self.stats(self.other) == (1, 4, 4)
+
+    def test_deferred_score_is_read_before_saving(self):
+        """Without a loaded score the stored one is looked up first"""
+        rating = Rating.objects.create(book=self.book, user=self.users[0], rating=1)
+        rating = Rating.objects.defer("rating").get(pk=rating.pk)
+        rating.rating = 3
+        rating.save()
+        assert self.stats(self.book) == (1, 3, 3)
+
+    def test_bulk_delete(self):
+        for user, score in zip(self.users, [1, 2, 5]):
+            Rating.objects.create(book=self.book, user=user, rating=score)
+        Rating.objects.filter(rating__lt=5).delete()
+        assert self.stats(self.book) == (1, 5, 5)
+
+
+class TestReconcileRatings(TestCase):
+    def test_repairs_drift(self):
+        publisher = Publisher.objects.create(name="Tachyon")
+        books = [
+            Book.objects.create(
+                title=f"Volume {i}", isbn=f"97800000003{i:02d}", publisher=publisher
+            )
+            for i in range(3)
+        ]
+        user = User.objects.create_user("reader")
+        Rating.objects.create(book=books[0], user=user, rating=4)
+        # Writes that bypass Rating.save() leave the aggregates behind
+        Rating.objects.bulk_create([Rating(book=books[1], user=user, rating=2)])
+        Book.objects.filter(pk=books[2].pk).update(rating_3_count=7)
+
+        version = get_version(RATINGS)
+        call_command("reconcile_ratings", workers=1, dry_run=True, stdout=StringIO())
+        assert get_version(RATINGS) == version
+
+        out = StringIO()
+        call_command(
+            "reconcile_ratings", chunk_size=2, workers=1, verbosity=2, stdout=out
+        )
+        assert "Checked 3 books. Repaired 2 drifted." in out.getvalue()
+        assert get_version(RATINGS) != version
+        assert f"Book ids: {books[1].pk}, {books[2].pk}" in out.getvalue()
+        stats = Book.objects.order_by("pk").values_list(
+            "rating_count", "rating_sum", "average_rating"
+        )
+        assert list(stats) == [(1, 4, 4), (1, 2, 2), (0, 0, 0)]
+
+
+class TestGenerateRandomRatings(TestCase):
+    def test_seeded_generation(self):
+        """Seeded runs are reproducible and leave the aggregates correct"""
+        publisher = Publisher.objects.create(name="Tachyon")
+        for i in range(10):
+            Book.objects.create(
+                title=f"Volume {i}", isbn=f"97800000004{i:02d}", publisher=publisher
+            )
+        for i in range(4):
+            User.objects.create_user(f"reader{i}")
+
+        def generate():
+            call_command(
+                "generate_random_ratings",
+                users=3,
+                density=0.5,
+                seed=11,
+                batch_size=4,
+                stdout=StringIO(),
+            )
+            return list(
+                Rating.objects.order_by("user", "book").values_list(
+                    "user", "book", "rating"
+                )
+            )
+
+        first = generate()
+        assert first == generate()
+        assert len(first) == 3 * 5
+        assert {user for user, _, _ in first} == set(
+            User.objects.order_by("pk").values_list("pk", flat=True)[:3]
+        )
+        assert all(1 <= rating <= 5 for _, _, rating in first)
+        out = StringIO()
+        call_command("reconcile_ratings", workers=1, dry_run=True, stdout=out)
+        assert "Found 0 drifted" in out.getvalue()
@@ -0,0 +1,101 @@
+# encoding: utf-8
+import tempfile
+from io import StringIO
+
+import numpy as np
+from books import recommendations
+from books.models import Book, Publisher, Rating
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+SCI_FI = ["Dune", "Hyperion", "Solaris"]
+ROMANCE = ["Emma", "Persuasion", "Rebecca"]
+
+
+class TestRecommendations(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(RECOMMENDATIONS_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        publisher = Publisher.objects.create(name="Penguin")
+        self.books = {
+            title: Book.objects.create(
+                title=title, isbn=f"97800000004{i:02d}", publisher=publisher
+            )
+            for i, title in enumerate(SCI_FI + ROMANCE)
+        }
+        # Two taste groups who love their genre and dislike the other one
+        for i in range(8):
+            user = User.objects.create_user(f"reader{i}")
+            liked, disliked = (SCI_FI, ROMANCE) if i % 2 else (ROMANCE, SCI_FI)
+            for title in liked:
+                self.rate(user, title, 5)
+            self.rate(user, disliked[i % 3], 1)
+        self.reader = User.objects.create_user("newcomer")
+        self.rate(self.reader, "Dune", 5)
+        self.rate(self.reader, "Hyperion", 4)
+        self.rate(self.reader, "Emma", 1)
+
+    def rate(self, user, title, score):
+        Rating.objects.create(user=user, book=self.books[title], rating=score)
+
+    def train(self, *args):
+        call_command("train_recommendations", *args, stdout=StringIO())
+
+    def titles(self, picks):
+        return [book.title for book, _ in picks]
+
+    def test_untrained(self):
+        assert recommendations.recommend_books(self.reader.pk) is None
+
+    def test_explicit_factors_follow_taste(self):
+        """Unrated books of the reader's favourite genre come first"""
+        self.train("--factors=4", "--iterations=15")
+        picks = recommendations.recommend_books(self.reader.pk, 3)
+        assert self.titles(picks)[0] == "Solaris"
+        assert "Dune" not in self.titles(picks)
+        assert picks[0][1] > picks[-1][1]
+
+    def test_implicit_factors_follow_taste(self):
+        """Every rating counts as interest; co-read books come first"""
+        browser = User.objects.create_user("browser")
+        self.rate(browser, "Dune", 3)
+        self.rate(browser, "Hyperion", 3)
+        self.train("--implicit", "--factors=4", "--iterations=15")
+        picks = recommendations.recommend_books(browser.pk, 1)
+        assert self.titles(picks) == ["Solaris"]
+
+    def test_unknown_users_get_popular_books(self):
+        self.train("--factors=2", "--iterations=2")
+        stranger = User.objects.create_user("stranger")
+        self.rate(stranger, "Dune", 3)  # too late for the trained model
+        picks = recommendations.recommend_books(stranger.pk, 2)
+        assert [score for _, score in picks] == [None, None]
+        assert "Dune" not in self.titles(picks)
+
+    def test_retraining_replaces_the_model(self):
+        self.train("--factors=2", "--iterations=1")
+        first = recommendations.get_recommender()
+        assert isinstance(first.book_factors, np.memmap)
+        self.train("--factors=3", "--iterations=1")
+        second = recommendations.get_recommender()
+        assert second.version != first.version
+        assert second.book_factors.shape == (len(self.books), 3)
+
+    def test_chunked_solve_matches_single_batch(self):
+        """Splitting the least-squares batches does not change the result"""
+        _, _, user_index, book_index, scores = recommendations.load_ratings()
+        arguments = (user_index, book_index, scores, 9, 6)
+        whole = recommendations.train(*arguments, factors=3, iterations=2)
+        cells = recommendations.MAX_BATCH_CELLS
+        recommendations.MAX_BATCH_CELLS = 3 * 4
+        try:
+            chunked = recommendations.train(*arguments, factors=3, iterations=2)
+        finally:
+            recommendations.MAX_BATCH_CELLS = cells
+        for expected, actual in zip(whole, chunked):
+            np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,101 @@
+# encoding: utf-8
+from books.models import Author, Book, Publisher
+from books.search import IContainsSearchBackend, get_search_backend
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class TestSearchBackend(TestCase):
+    def setUp(self):
+        self.backend = get_search_backend()
+        self.publisher = Publisher.objects.create(name="Orbit")
+        self.author = Author.objects.create(name="Isaac Asimov")
+        self.foundation = Book.objects.create(
+            title="Foundation",
+            isbn="9780553293357",
+            publisher=self.publisher,
+            description="The Galactic Empire is dying.",
+        )
+        self.foundation.authors.add(self.author)
+        self.robots = Book.objects.create(
+            title="The Caves of Steel",
+            isbn="9780553293401",
+            publisher=self.publisher,
+            description="A detective story with robots and a foundation of lies.",
+        )
+
+    def search(self, query):
+        queryset = self.backend.search(Book.objects.all(), query)
+        return list(queryset.order_by("-search_rank", "pk"))
+
+    def test_title_matches_rank_first(self):
+        """A title match outranks a description match"""
+        assert self.search("foundation") == [self.foundation, self.robots]
+
+    def test_prefix_match(self):
+        """Partial words match, as typed into the search box"""
+        assert self.search("foun") == [self.foundation, self.robots]
+
+    def test_author_name_indexed_through_m2m(self):
+        """Adding and removing authors keeps the index in sync"""
+        assert self.search("asimov") == [self.foundation]
+        self.robots.authors.add(self.author)
+        assert set(self.search("asimov")) == {self.foundation, self.robots}
+        self.author.books.clear()
+        assert self.search("asimov") == []
+
+    def test_author_rename_reindexes_books(self):
+        """Saving an author refreshes every book they wrote"""
+        self.author.name = "Paul French"
+        self.author.save()
+        assert self.search("asimov") == []
+        assert self.search("french") == [self.foundation]
+
+    def test_author_delete_reindexes_books(self):
+        """Deleting an author removes their name from the index"""
+        self.author.delete()
+        assert self.search("asimov") == []
+
+    def test_book_update_and_delete(self):
+        """Book edits and deletes are reflected immediately"""
+        self.robots.title = "The Naked Sun"
+        self.robots.save()
+        assert self.search("naked") == [self.robots]
+        self.robots.delete()
+        assert self.search("naked") == []
+
+    def test_query_syntax_is_not_interpreted(self):
+        """FTS operators in user input are treated as plain words"""
+        assert self.search('"found* (') == [self.foundation, self.robots]
+        assert self.search("   ") == []
+
+    def test_icontains_fallback(self):
+        """The fallback backend keeps the original substring semantics"""
+        backend = IContainsSearchBackend()
+        queryset = backend.search(Book.objects.all(), "undatio")
+        assert set(queryset) == {self.foundation, self.robots}
+
+
+class TestBookSearchEndpoint(APITestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Tor")
+        self.dune = Book.objects.create(
+            title="Dune", isbn="9780441013593", publisher=publisher
+        )
+        Book.objects.create(title="Hyperion", isbn="9780553283686", publisher=publisher)
+        self.url = reverse("book-search")
+
+    def test_search_endpoint(self):
+        """GET /api/v1/books/search/?q= returns ranked matches"""
+        response = self.client.get(self.url, {"q": "dune"})
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]  # type: ignore
+        assert [book["pk"] for book in results] == [self.dune.pk]
+
+    def test_search_endpoint_empty_query(self):
+        """An empty query matches nothing"""
+        response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == []  # type: ignore
@@ -0,0 +1,93 @@
+# encoding: utf-8
+from io import StringIO
+
+import numpy as np
+from books.models import Author, Book, BookSimilarity, Publisher, Rating
+from books.arrays import ranges
+from books.similarity import rebuild_similarities, stale_book_ids
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+
+def neighbours(book):
+    return list(
+        BookSimilarity.objects.filter(book=book).values_list(
+            "neighbor__title", flat=True
+        )
+    )
+
+
+class TestSimilarity(TestCase):
+    def setUp(self):
+        self.tor = Publisher.objects.create(name="Tor")
+        self.ace = Publisher.objects.create(name="Ace")
+        self.herbert = Author.objects.create(name="Frank Herbert")
+        self.books = {}
+        for i, (title, genre, publisher) in enumerate(
+            [
+                ("Dune", "sci_fi", self.ace),
+                ("Dune Messiah", "sci_fi", self.ace),
+                ("Hyperion", "sci_fi", self.tor),
+                ("Emma", "romance", self.tor),
+            ]
+        ):
+            self.books[title] = Book.objects.create(
+                title=title,
+                isbn=f"97800000003{i:02d}",
+                genre=genre,
+                publisher=publisher,
+            )
+        for title in ("Dune", "Dune Messiah"):
+            self.books[title].authors.add(self.herbert)
+        self.users = [User.objects.create_user(f"reader{i}") for i in range(3)]
+
+    def rate(self, user, title, score):
+        Rating.objects.create(user=user, book=self.books[title], rating=score)
+
+    def test_ranges(self):
+        starts, lengths = np.array([5, 0, 2]), np.array([2, 0, 3])
+        assert ranges(starts, lengths).tolist() == [5, 6, 2, 3, 4]
+
+    def test_signals_rank_neighbours(self):
+        """Co-authorship beats co-rating beats genre or publisher alone"""
+        for user in self.users:
+            self.rate(user, "Hyperion", 5)
+            self.rate(user, "Emma", 5)
+        books, rows = rebuild_similarities(k=3)
+        assert books == 4
+        assert neighbours(self.books["Dune"]) == ["Dune Messiah", "Hyperion"]
+        assert neighbours(self.books["Hyperion"]) == ["Emma", "Dune", "Dune Messiah"]
+        score = BookSimilarity.objects.get(book=self.books["Emma"], rank=0).score
+        assert round(score, 3) == 0.65  # identical ratings plus the publisher
+
+    def test_top_k_is_capped(self):
+        rebuild_similarities(k=1)
+        assert neighbours(self.books["Dune"]) == ["Dune Messiah"]
+        assert not stale_book_ids().exists()
+
+    def test_incremental_refresh(self):
+        """Rating changes mark books stale and reach the lists they enter"""
+        rebuild_similarities(k=2)
+        assert neighbours(self.books["Emma"]) == ["Hyperion"]
+        assert neighbours(self.books["Dune"]) == ["Dune Messiah", "Hyperion"]
+
+        for user in self.users:
+            self.rate(user, "Dune", 4)
+            self.rate(user, "Emma", 4)
+        stale = set(stale_book_ids())
+        assert stale == {self.books["Dune"].pk, self.books["Emma"].pk}
+
+        out = StringIO()
+        call_command("rebuild_similarities", "--incremental", "--top-k=2", stdout=out)
+        assert out.getvalue().startswith("Recomputed 4 books")
+        assert not stale_book_ids().exists()
+        assert neighbours(self.books["Emma"]) == ["Dune", "Hyperion"]
+        assert neighbours(self.books["Dune"]) == ["Emma", "Dune Messiah"]
+        # Hyperion's list was reached through Emma and Dune but is unchanged
+        assert neighbours(self.books["Hyperion"]) == ["Dune", "Dune Messiah"]
+
+    def test_deleted_books_leave_lists(self):
+        rebuild_similarities()
+        self.books["Dune Messiah"].delete()
+        assert neighbours(self.books["Dune"]) == ["Hyperion"]
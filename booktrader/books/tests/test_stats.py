@@ -0,0 +1,190 @@
+# encoding: utf-8
+import datetime
+from decimal import Decimal
+
+from books.models import Author, Book, Publisher, Rating
+from books.stats import refresh_author_stats, refresh_publisher_stats
+from books.views import BOOKS_PER_PAGE
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+
+def stats(row):
+    row.refresh_from_db()
+    return row.book_count, row.rating_count, row.rating_sum, row.average_rating
+
+
+class TestContributorStats(TestCase):
+    def setUp(self):
+        self.publisher = Publisher.objects.create(name="Ace")
+        self.other_publisher = Publisher.objects.create(name="Gollancz")
+        self.author = Author.objects.create(name="Ursula K. Le Guin")
+        self.coauthor = Author.objects.create(name="Brian Attebery")
+        self.book = Book.objects.create(
+            title="The Left Hand of Darkness",
+            isbn="9780441478125",
+            publisher=self.publisher,
+            publication_date=datetime.date(1969, 3, 1),
+        )
+        self.other = Book.objects.create(
+            title="The Dispossessed",
+            isbn="9780061054884",
+            publisher=self.publisher,
+            publication_date=datetime.date(1974, 5, 1),
+        )
+        self.book.authors.add(self.author)
+        self.other.authors.add(self.author, self.coauthor)
+        self.users = [User.objects.create_user(f"reader{i}") for i in range(3)]
+
+    def test_counts_books(self):
+        assert stats(self.author)[0] == 2
+        assert stats(self.coauthor)[0] == 1
+        assert stats(self.publisher)[0] == 2
+        assert self.author.latest_publication_date == datetime.date(1974, 5, 1)
+
+    def test_ratings_are_weighted_by_book(self):
+        Rating.objects.create(book=self.book, user=self.users[0], rating=5)
+        Rating.objects.create(book=self.book, user=self.users[1], rating=4)
+        rating = Rating.objects.create(book=self.other, user=self.users[0], rating=1)
+        assert stats(self.author) == (2, 3, 10, Decimal("3.3"))
+        assert stats(self.coauthor) == (1, 1, 1, 1)
+        assert stats(self.publisher) == (2, 3, 10, Decimal("3.3"))
+
+        rating.rating = 4
+        rating.save()
+        assert stats(self.author) == (2, 3, 13, Decimal("4.3"))
+        rating.delete()
+        assert stats(self.coauthor) == (1, 0, 0, 0)
+        assert stats(self.publisher) == (2, 2, 9, Decimal("4.5"))
+
+    def test_moving_a_book_between_publishers(self):
+        Rating.objects.create(book=self.book, user=self.users[0], rating=2)
+        self.book.refresh_from_db()
+        self.book.publisher = self.other_publisher
+        self.book.save()
+        assert stats(self.publisher) == (1, 0, 0, 0)
+        assert stats(self.other_publisher) == (1, 1, 2, 2)
+
+    def test_deleting_a_book(self):
+        Rating.objects.create(book=self.other, user=self.users[0], rating=3)
+        self.other.delete()
+        assert stats(self.author) == (1, 0, 0, 0)
+        assert stats(self.coauthor) == (0, 0, 0, 0)
+        assert self.coauthor.latest_publication_date is None
+        assert stats(self.publisher) == (1, 0, 0, 0)
+
+    def test_changing_authors(self):
+        Rating.objects.create(book=self.book, user=self.users[0], rating=5)
+        self.book.authors.add(self.coauthor)
+        assert stats(self.coauthor) == (2, 1, 5, 5)
+        self.book.authors.remove(self.author)
+        assert stats(self.author) == (1, 0, 0, 0)
+        self.book.authors.clear()
+        assert stats(self.coauthor) == (1, 0, 0, 0)
+        self.coauthor.books.add(self.book)
+        assert stats(self.coauthor) == (2, 1, 5, 5)
+        self.coauthor.books.clear()
+        assert stats(self.coauthor) == (0, 0, 0, 0)
+
+    def test_refresh_repairs_drift(self):
+        Rating.objects.create(book=self.book, user=self.users[0], rating=4)
+        Author.objects.update(book_count=0, rating_count=9, rating_sum=9)
+        Publisher.objects.update(rating_count=0, rating_sum=0, average_rating=0)
+        refresh_author_stats()
+        refresh_publisher_stats([self.publisher.pk])
+        assert stats(self.author) == (2, 1, 4, 4)
+        assert stats(self.coauthor) == (1, 0, 0, 0)
+        assert stats(self.publisher) == (2, 1, 4, 4)
+
+
+class TestAuthorBooksView(TestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Tor")
+        self.author = Author.objects.create(name="Brandon Sanderson")
+        for i in range(BOOKS_PER_PAGE + 3):
+            book = Book.objects.create(
+                title=f"Book {i:02d}", isbn=f"97807653{i:05d}", publisher=publisher
+            )
+            book.authors.add(self.author)
+        self.url = reverse("books:author_books", args=[self.author.pk])
+
+    def test_pages_with_cursor(self):
+        response = self.client.get(self.url)
+        page = response.context["page_obj"]
+        assert len(page) == BOOKS_PER_PAGE
+        assert page.count == BOOKS_PER_PAGE + 3
+        assert page.has_next()
+
+        response = self.client.get(self.url, {"cursor": page.next_cursor})
+        page = response.context["page_obj"]
+        assert len(page) == 3
+        assert not page.has_next()
+        assert page.has_previous()
+
+    def test_unknown_author(self):
+        response = self.client.get(reverse("books:author_books", args=[0]))
+        assert response.status_code == 404
+
+
+class TestCatalogStatsEndpoints(APITestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Orbit")
+        self.prolific = Author.objects.create(name="Prolific")
+        self.acclaimed = Author.objects.create(name="Acclaimed")
+        self.unread = Author.objects.create(name="Unread")
+        user = User.objects.create_user("reader")
+        for i, (author, score) in enumerate(
+            [(self.prolific, 2), (self.prolific, 3), (self.acclaimed, 5)]
+        ):
+            book = Book.objects.create(
+                title=f"Book {i}", isbn=f"978031600{i:04d}", publisher=publisher
+            )
+            book.authors.add(author)
+            Rating.objects.create(book=book, user=user, rating=score)
+        self.url = reverse("author-list")
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        assert response.status_code == 200
+        return [author["name"] for author in response.data["results"]]  # type: ignore
+
+    def test_stats_are_serialized(self):
+        response = self.client.get(
+            reverse("author-detail", kwargs={"pk": self.prolific.pk})
+        )
+        assert response.data["book_count"] == 2  # type: ignore
+        assert response.data["rating_count"] == 2  # type: ignore
+        assert response.data["average_rating"] == "2.5"  # type: ignore
+
+    def test_stats_are_read_only(self):
+        response = self.client.patch(
+            reverse("author-detail", kwargs={"pk": self.unread.pk}),
+            data={"book_count": 50},
+        )
+        assert response.status_code == 200
+        assert stats(self.unread)[0] == 0
+
+    def test_ordering(self):
+        assert self.names(ordering="-average_rating") == [
+            "Acclaimed",
+            "Prolific",
+            "Unread",
+        ]
+        assert self.names(ordering="-book_count") == ["Prolific", "Acclaimed", "Unread"]
+        # Unknown fields are ignored rather than rejected
+        assert len(self.names(ordering="bio")) == 3
+
+    def test_filters(self):
+        assert self.names(min_books=2) == ["Prolific"]
+        assert self.names(min_ratings=1, ordering="name") == ["Acclaimed", "Prolific"]
+        assert self.names(min_rating="4.5") == ["Acclaimed"]
+        assert len(self.names(min_rating="high")) == 3
+
+    def test_non_finite_filters_are_rejected(self):
+        for url in (self.url, reverse("publisher-list")):
+            for value in ("nan", "inf", "-inf"):
+                response = self.client.get(url, {"min_rating": value})
+                assert response.status_code == 400
+                assert "min_rating" in response.data  # type: ignore
@@ -0,0 +1,135 @@
+# encoding: utf-8
+from unittest import mock
+
+from books.models import Author, Book, Publisher
+from books.suggestions import PrefixIndex, SuggestionIndex, suggestion_index
+from django.db import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+
+
+class TestPrefixIndex(TestCase):
+    def setUp(self):
+        self.index = PrefixIndex(
+            [(1, "The Road of Runes"), (2, "Rune Stones"), (3, "Crème Brûlée")],
+            compact_minimum=2,
+        )
+
+    def test_prefix_and_word_start_matches(self):
+        """Queries match the start of the title or of any early word"""
+        assert self.index.search("rune") == [
+            (2, "Rune Stones"),
+            (1, "The Road of Runes"),
+        ]
+        assert self.index.search("THE R") == [(1, "The Road of Runes")]
+        assert self.index.search("oad") == []
+
+    def test_accents_are_folded(self):
+        """Accented labels match unaccented queries and vice versa"""
+        assert self.index.search("creme brul") == [(3, "Crème Brûlée")]
+        assert self.index.search("brûl") == [(3, "Crème Brûlée")]
+
+    def test_incremental_updates(self):
+        """Adds, renames and removals apply without a rebuild"""
+        self.index.add(4, "Runaway")
+        self.index.add(2, "Standing Stones")
+        self.index.remove(1)
+        assert self.index.search("run") == [(4, "Runaway")]
+        assert self.index.search("stand") == [(2, "Standing Stones")]
+        assert sorted(self.index.items()) == [
+            (2, "Standing Stones"),
+            (3, "Crème Brûlée"),
+            (4, "Runaway"),
+        ]
+
+    def test_compaction_keeps_contents(self):
+        """Folding the delta into a new base changes nothing observable"""
+        for item_id in range(10, 20):
+            self.index.add(item_id, f"Runic Volume {item_id}")
+        assert len(self.index.search("runic", limit=50)) == 10
+        assert self.index.search("road") == [(1, "The Road of Runes")]
+
+    def test_limit(self):
+        assert len(self.index.search("r", limit=1)) == 1
+
+
+class TestSuggestionIndex(TestCase):
+    def setUp(self):
+        self.index = SuggestionIndex()
+        patcher = mock.patch("books.suggestions.threading.Thread")
+        self.thread = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_thread(self):
+        """Run the last background build in the test's thread"""
+        with mock.patch("books.suggestions.connection"):
+            self.thread.call_args.kwargs["target"]()
+
+    def test_one_build_at_a_time(self):
+        self.index.warm_in_background()
+        self.index.warm_in_background()
+        self.index.warm()
+        assert self.thread.call_count == 1
+        assert not self.index.is_ready
+        self.run_thread()
+        assert self.index.is_ready
+
+    def test_failed_build_is_retried_later(self):
+        with mock.patch(
+            "books.suggestions.PrefixIndex", side_effect=OperationalError
+        ), self.assertLogs("books.suggestions", "ERROR"):
+            self.index.warm_in_background()
+            self.run_thread()
+        self.index.warm_in_background()
+        assert self.thread.call_count == 1
+
+        with self.settings(BOOKS_SUGGESTIONS_RETRY_AFTER=0):
+            self.index.warm_in_background()
+        assert self.thread.call_count == 2
+        self.run_thread()
+        assert self.index.is_ready
+
+
+class TestSearchSuggestionsView(TestCase):
+    def setUp(self):
+        publisher = Publisher.objects.create(name="Bantam")
+        self.book = Book.objects.create(
+            title="Hyperion", isbn="9780553283686", publisher=publisher
+        )
+        self.author = Author.objects.create(name="Dan Simmons")
+        self.url = reverse("books:search_suggestions")
+        suggestion_index.warm()
+        self.addCleanup(suggestion_index.reset)
+
+    def test_suggestions_from_index(self):
+        """Warm suggestions are answered without touching the database"""
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"q": "hyp"})
+        suggestions = response.json()["suggestions"]
+        assert suggestions == [
+            {
+                "type": "book",
+                "id": self.book.pk,
+                "title": "Hyperion",
+                "url": f"/books/{self.book.pk}/",
+            }
+        ]
+
+    def test_signals_update_index(self):
+        """Saved and deleted rows are reflected in the index"""
+        self.author.name = "Dan Brown"
+        self.author.save()
+        self.book.delete()
+        response = self.client.get(self.url, {"q": "dan b"})
+        assert [s["name"] for s in response.json()["suggestions"]] == ["Dan Brown"]
+        response = self.client.get(self.url, {"q": "hyp"})
+        assert response.json()["suggestions"] == []
+
+    def test_cold_index_falls_back_to_database(self):
+        """Before warming, suggestions come from icontains queries"""
+        suggestion_index.reset()
+        with mock.patch.object(suggestion_index, "warm_in_background") as warm:
+            response = self.client.get(self.url, {"q": "peri"})
+        assert [s["title"] for s in response.json()["suggestions"]] == ["Hyperion"]
+        # A failed startup warm is retried by the next request
+        warm.assert_called_once_with()
@@ -7,7 +7,9 @@ app_name = "books"
 urlpatterns = [
     path("", views.book_list_view, name="book_list"),
     path("<int:book_id>/", views.book_detail_view, name="book_detail"),
+    path("<int:book_id>/reviews/", views.book_reviews_view, name="book_reviews"),
     path("authors/<int:author_id>/", views.author_books_view, name="author_books"),
+    path("cache-stats/", views.page_cache_stats_view, name="page_cache_stats"),
     path(
         "search-suggestions/", views.search_suggestions_view, name="search_suggestions"
     ),
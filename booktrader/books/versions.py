@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Version counters used to namespace cache keys for derived catalog data.
+
+Instead of hunting down every cached entry that a change could affect, cached
+values embed the current version of the data they were computed from in their
+key; bumping the version makes all of them unreachable at once and they age
+out of the cache on their own.
+
+A counter that is missing (never set, evicted or cleared) restarts from the
+clock rather than from 1, so a version number is never handed out twice and
+can also serve as an HTTP validator.
+"""
+
+import time
+
+from django.core.cache import cache
+
+CATALOG = "catalog"  # books, authors, publishers and their links
+RATINGS = "ratings"  # anything derived from Rating rows
+RELATED = "related"  # precomputed related books (books.similarity)
+
+
+def _key(name):
+    return f"books:version:{name}"
+
+
+def _seed():
+    return time.time_ns() // 1000
+
+
+def get_version(name):
+    """Return the current version number of ``name``"""
+    version = cache.get(_key(name))
+    if version is None:
+        seed = _seed()
+        cache.add(_key(name), seed, timeout=None)
+        version = cache.get(_key(name), seed)
+    return version
+
+
+async def aget_version(name):
+    """Async version of ``get_version()``"""
+    version = await cache.aget(_key(name))
+    if version is None:
+        seed = _seed()
+        await cache.aadd(_key(name), seed, timeout=None)
+        version = await cache.aget(_key(name), seed)
+    return version
+
+
+def bump_version(name):
+    """Invalidate every cache key built from the current version of ``name``"""
+    try:
+        return cache.incr(_key(name))
+    except ValueError:
+        # Not set yet (or evicted): any value other than the old one will do
+        seed = _seed()
+        cache.add(_key(name), seed, timeout=None)
+        return cache.get(_key(name), seed)
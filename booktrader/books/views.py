@@ -1,15 +1,85 @@
 # -*- coding: utf-8 -*-
 
-import asyncio
-
 from asgiref.sync import sync_to_async
 from django.core.paginator import Paginator
-from django.db.models import Avg, Count, Q
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, render
+from django.http import Http404, JsonResponse, QueryDict
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.views import generic
-
-from .models import Author, Book, Publisher
+from images.pipeline import get_renditions
+
+from .conditional import make_etag, not_modified, set_validators
+from .facets import aget_facets
+from .filters import BOOK_FILTER_PARAMS, filter_books, get_book_filters
+from .models import Author, Book, Rating
+from .pagecache import (
+    BYPASS,
+    NOT_MODIFIED,
+    acount,
+    aget_page,
+    page_cache_stats,
+    params_digest,
+)
+from .pagination import KeysetPaginator, aestimated_count
+from .search import get_search_backend
+from .suggestions import suggestion_index
+from .versions import CATALOG, RATINGS, RELATED, aget_version
+
+BOOKS_PER_PAGE = 12
+BOOK_LIST_ORDERING = ("title", "pk")
+SEARCH_ORDERING = ("-search_rank", "pk")
+REVIEWS_PER_PAGE = 10
+REVIEW_ORDERING = ("-created_at", "-pk")
+RELATED_BOOKS = 5
+# The query parameters a book list page is rendered from; any others (e.g.
+# utm_source) are dropped, so they share its cached copy
+BOOK_LIST_PARAMS = (*BOOK_FILTER_PARAMS, "page", "cursor")
+
+
+async def catalog_versions():
+    return f"{await aget_version(CATALOG)}.{await aget_version(RATINGS)}"
+
+
+async def arender(request, template_name, context):
+    """Render a template on the event loop.
+
+    Every database-backed value in ``context`` must already be loaded. The
+    only lazy lookup left is ``request.user`` (session, auth and OTP device),
+    which the navbar needs; it is resolved here in a single thread hop.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return render(request, template_name, context)
+
+
+async def arender_cached(request, name, tag, render_body):
+    """Render ``render_body()`` inside ``base.html``, cached for anonymous users.
+
+    ``render_body`` returns the page's ``(title, body)``, both cached together.
+
+    The body is shared between visitors, so it must not depend on the user
+    or carry CSRF tokens; those live in the per-request ``base.html`` chrome.
+    Anonymous responses carry a weak ETag made from ``name`` and ``tag``, and
+    a matching ``If-None-Match`` is answered with 304 before any rendering.
+    """
+    etag = None
+    if await sync_to_async(lambda: request.user.is_authenticated)():
+        page, outcome = await render_body(), BYPASS
+    else:
+        etag = make_etag(name, tag, weak=True)
+        response = not_modified(request, etag)
+        if response is not None:
+            await acount(NOT_MODIFIED)
+            response["X-Cache"] = NOT_MODIFIED
+            return response
+        page, outcome = await aget_page(name, tag, render_body)
+    await acount(outcome)
+    title, body = page
+    response = render(
+        request, "books/page.html", {"title": title, "content": mark_safe(body)}
+    )
+    response["X-Cache"] = outcome
+    return set_validators(response, etag)
 
 
 class MainView(generic.TemplateView):
@@ -24,132 +94,151 @@ class MainView(generic.TemplateView):
 
 async def book_list_view(request):
     """Async view to list books with search and filtering"""
-    search_query = request.GET.get("search", "")
-    author_filter = request.GET.get("author", "")
-    publisher_filter = request.GET.get("publisher", "")
-    min_rating = request.GET.get("min_rating", "")
-    page = request.GET.get("page", 1)
-
-    # Build the query asynchronously
-    books_queryset = Book.objects.select_related("publisher").prefetch_related(
-        "authors", "ratings"
+    params = QueryDict(mutable=True)
+    for name in BOOK_LIST_PARAMS:
+        if name in request.GET:
+            params.setlist(name, request.GET.getlist(name))
+    return await arender_cached(
+        request,
+        f"list:{params_digest(params)}",
+        await catalog_versions(),
+        lambda: _render_book_list(request, params),
     )
 
-    # Apply search filters
-    if search_query:
-        books_queryset = books_queryset.filter(
-            Q(title__icontains=search_query)
-            | Q(description__icontains=search_query)
-            | Q(authors__name__icontains=search_query)
-        ).distinct()
-
-    if author_filter:
-        books_queryset = books_queryset.filter(authors__name__icontains=author_filter)
-
-    if publisher_filter:
-        books_queryset = books_queryset.filter(
-            publisher__name__icontains=publisher_filter
-        )
 
-    if min_rating:
-        try:
-            min_rating_float = float(min_rating)
-            books_queryset = books_queryset.annotate(
-                avg_rating=Avg("ratings__rating")
-            ).filter(avg_rating__gte=min_rating_float)
-        except ValueError:
-            pass  # Invalid rating filter, ignore
-
-    # Get books with async database operations
-    books_list = await sync_to_async(list)(
-        books_queryset.annotate(
-            avg_rating=Avg("ratings__rating"), rating_count=Count("ratings")
-        )
-    )
+async def _render_book_list(request, params):
+    filters = get_book_filters(params)
+    search_query = filters["search"]
+    page = params.get("page")
+    cursor = params.get("cursor", "")
 
-    # Paginate results
-    paginator = Paginator(books_list, 12)  # 12 books per page
-    books_page = await sync_to_async(paginator.get_page)(page)
+    books_queryset = Book.objects.select_related("publisher").prefetch_related(
+        "authors"
+    )
+    books_queryset = filter_books(books_queryset, filters, exclude=("search",))
 
-    # Get filter options for dropdowns
-    authors_list = await sync_to_async(list)(
-        Author.objects.values("name").distinct().order_by("name")
+    # Apply search filters; matches are ranked by relevance
+    ordering = BOOK_LIST_ORDERING
+    if search_query:
+        books_queryset = get_search_backend().search(books_queryset, search_query)
+        ordering = SEARCH_ORDERING
+
+    # Paginate in the database: only the rows for this page are fetched.
+    # ``?page=N`` links keep working as LIMIT/OFFSET queries, everything else
+    # walks the catalog by keyset cursors over ``ordering``.
+    total_count = await aestimated_count(
+        books_queryset, version=await catalog_versions()
     )
-    publishers_list = await sync_to_async(list)(
-        Publisher.objects.values("name").distinct().order_by("name")
+    if page:
+        paginator = Paginator(books_queryset.order_by(*ordering), BOOKS_PER_PAGE)
+        paginator.count = total_count
+        books_page = paginator.get_page(page)
+        books_page.object_list = [book async for book in books_page.object_list]
+    else:
+        paginator = KeysetPaginator(books_queryset, ordering, BOOKS_PER_PAGE)
+        books_page = await paginator.aget_page(cursor, count=total_count)
+
+    # Filter options for the dropdowns, with book counts (usually cached)
+    facets = await aget_facets(filters)
+    renditions = await sync_to_async(get_renditions)(
+        [book.cover_image.name for book in books_page]
     )
 
     context = {
         "books": books_page,
         "search_query": search_query,
-        "author_filter": author_filter,
-        "publisher_filter": publisher_filter,
-        "min_rating": min_rating,
-        "authors": authors_list,
-        "publishers": publishers_list,
+        "author_filter": filters["author"],
+        "publisher_filter": filters["publisher"],
+        "genre_filter": filters["genre"],
+        "language_filter": filters["language"],
+        "min_rating": filters["min_rating"],
+        "authors": facets["authors"],
+        "publishers": facets["publishers"],
+        "genres": facets["genres"],
+        "languages": facets["languages"],
         "page_obj": books_page,
+        "total_count": total_count,
+        "renditions": renditions,
+        "params": params,
     }
 
-    return await sync_to_async(render)(request, "books/book_list.html", context)
+    return "Books", render_to_string("books/book_list.html", context, request)
 
 
 async def book_detail_view(request, book_id):
-    """Async view to display book details"""
-    # Get book with related data
-    book = await sync_to_async(get_object_or_404)(
-        Book.objects.select_related("publisher").prefetch_related("authors", "ratings"),
-        pk=book_id,
-    )
-
-    # Get average rating and rating count concurrently
-    # type: ignore on next lines for pylance reverse relationship issue
-    ratings_manager = book.ratings  # type: ignore
-
-    async def get_avg_rating():
-        return await sync_to_async(ratings_manager.aggregate)(avg_rating=Avg("rating"))
-
-    avg_rating_task = get_avg_rating()
-    rating_count_task = sync_to_async(ratings_manager.count)()
-
-    # Wait for both operations to complete
-    avg_rating_result, rating_count = await asyncio.gather(
-        avg_rating_task, rating_count_task
+    """Async view to display book details.
+
+    Rating stats and the star histogram are columns on the book row; the
+    reviews themselves are loaded separately by ``book_reviews_view``.
+    """
+    versions = f"{await catalog_versions()}.{await aget_version(RELATED)}"
+    return await arender_cached(
+        request,
+        f"detail:{book_id}",
+        versions,
+        lambda: _render_book_detail(request, book_id),
     )
 
-    avg_rating = avg_rating_result.get("avg_rating")
 
-    # Get related books by same authors (async)
-    author_ids = await sync_to_async(list)(book.authors.values_list("id", flat=True))
-    related_books = await sync_to_async(list)(
-        Book.objects.filter(authors__in=author_ids).exclude(pk=book_id).distinct()[:5]
-    )
+async def _render_book_detail(request, book_id):
+    try:
+        book = (
+            await Book.objects.select_related("publisher")
+            .prefetch_related("authors")
+            .aget(pk=book_id)
+        )
+    except Book.DoesNotExist:
+        raise Http404("No Book matches the given query.")
+
+    # Precomputed neighbours (books.similarity), one query on (book, rank)
+    related_books = [
+        related
+        async for related in Book.objects.filter(similar_to__book_id=book_id)
+        .order_by("similar_to__rank")
+        .select_related("publisher")
+        .prefetch_related("authors")[:RELATED_BOOKS]
+    ]
 
     context = {
         "book": book,
-        "avg_rating": avg_rating,
-        "rating_count": rating_count,
         "related_books": related_books,
+        "renditions": await sync_to_async(get_renditions)([book.cover_image.name]),
     }
 
-    return await sync_to_async(render)(request, "books/book_detail.html", context)
+    return book.title, render_to_string("books/book_detail.html", context, request)
+
+
+async def book_reviews_view(request, book_id):
+    """HTMX fragment with one page of a book's reviews, newest first"""
+    reviews = Rating.objects.filter(book_id=book_id).select_related("user")
+    paginator = KeysetPaginator(reviews, REVIEW_ORDERING, REVIEWS_PER_PAGE)
+    page = await paginator.aget_page(request.GET.get("cursor", ""))
+
+    context = {"book_id": book_id, "reviews": page}
+    # The fragment never touches request.user, so it renders on the loop as is
+    return render(request, "books/book_reviews.html", context)
 
 
 async def author_books_view(request, author_id):
-    """Async view to display all books by a specific author"""
-    author = await sync_to_async(get_object_or_404)(Author, pk=author_id)
-
-    # Get author's books with ratings
-    books_queryset = Book.objects.filter(authors=author).select_related("publisher")
-    books_list = await sync_to_async(list)(
-        books_queryset.annotate(
-            avg_rating=Avg("ratings__rating"), rating_count=Count("ratings")
-        )
+    """Async view to display all books by a specific author.
+
+    Books are fetched a keyset page at a time and the total comes from the
+    author's maintained ``book_count``, so no query touches the whole list.
+    """
+    try:
+        author = await Author.objects.aget(pk=author_id)
+    except Author.DoesNotExist:
+        raise Http404("No Author matches the given query.")
+
+    books_queryset = (
+        Book.objects.filter(authors=author)
+        .select_related("publisher")
+        .prefetch_related("authors")
+    )
+    paginator = KeysetPaginator(books_queryset, BOOK_LIST_ORDERING, BOOKS_PER_PAGE)
+    books_page = await paginator.aget_page(
+        request.GET.get("cursor", ""), count=author.book_count
     )
-
-    # Pagination
-    page = request.GET.get("page", 1)
-    paginator = Paginator(books_list, 12)
-    books_page = await sync_to_async(paginator.get_page)(page)
 
     context = {
         "author": author,
@@ -157,7 +246,7 @@ async def author_books_view(request, author_id):
         "page_obj": books_page,
     }
 
-    return await sync_to_async(render)(request, "books/author_books.html", context)
+    return await arender(request, "books/author_books.html", context)
 
 
 async def search_suggestions_view(request):
@@ -167,19 +256,27 @@ async def search_suggestions_view(request):
     if len(query) < 2:
         return JsonResponse({"suggestions": []})
 
-    # Search for books and authors concurrently
-    book_suggestions_task = sync_to_async(list)(
-        Book.objects.filter(title__icontains=query).values("id", "title")[:5]
-    )
-
-    author_suggestions_task = sync_to_async(list)(
-        Author.objects.filter(name__icontains=query).values("id", "name")[:5]
-    )
-
-    # Wait for both searches to complete
-    book_suggestions, author_suggestions = await asyncio.gather(
-        book_suggestions_task, author_suggestions_task
-    )
+    # Builds this worker's in-memory prefix index if it is missing (the
+    # startup warm may have failed), or refreshes it in the background once
+    # it is older than BOOKS_SUGGESTIONS_MAX_AGE.
+    suggestion_index.warm_in_background()
+    if suggestion_index.is_ready:
+        book_matches, author_matches = suggestion_index.suggest(query, limit=5)
+        book_suggestions = [{"id": pk, "title": title} for pk, title in book_matches]
+        author_suggestions = [{"id": pk, "name": name} for pk, name in author_matches]
+    else:
+        book_suggestions = [
+            book
+            async for book in Book.objects.filter(title__icontains=query).values(
+                "id", "title"
+            )[:5]
+        ]
+        author_suggestions = [
+            author
+            async for author in Author.objects.filter(name__icontains=query).values(
+                "id", "name"
+            )[:5]
+        ]
 
     suggestions = []
 
@@ -206,3 +303,10 @@ async def search_suggestions_view(request):
         )
 
     return JsonResponse({"suggestions": suggestions})
+
+
+async def page_cache_stats_view(request):
+    """Page cache hit/miss counters, for staff"""
+    if not await sync_to_async(lambda: request.user.is_staff)():
+        raise Http404()
+    return JsonResponse(await sync_to_async(page_cache_stats)())
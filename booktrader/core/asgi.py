@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_asgi_application()
+
+# Load the search-as-you-type index for this worker without delaying startup
+from books.suggestions import suggestion_index  # noqa: E402
+
+suggestion_index.warm_in_background()
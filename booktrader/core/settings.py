@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
     "users.apps.UsersConfig",
     "auctions.apps.AuctionsConfig",
     "trades.apps.TradesConfig",
+    "images.apps.ImagesConfig",
 ]
 
 MIDDLEWARE = [
@@ -143,6 +145,30 @@ if os.environ.get("DB_HOST"):
     except:
         pass  # Keep SQLite
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Must be shared by every process: the web workers, the images worker and the
+# management commands all bump the catalog version counters (books.versions)
+# and write cached pages, facets and image renditions. A per-process cache
+# would never see the other processes' changes (check books.W001).
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+elif DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # Created by ``manage.py createcachetable`` (see entrypoint.sh)
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "booktrader_cache",
+        }
+    }
+# Otherwise Django's per-process memory cache, for a single SQLite process
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -186,6 +212,51 @@ STATICFILES_DIRS = [
 # Static files collection directory (required for collectstatic)
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# User uploads (book covers, auction and trade photos, avatars)
+MEDIA_URL = "media/"
+MEDIA_ROOT = Path(os.environ.get("MEDIA_ROOT", BASE_DIR / "media"))
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    # Uploaded images and their derivatives, named by content hash (images app)
+    "images": {"BACKEND": "images.storage.ContentHashStorage"},
+}
+
+# Trained recommendation models (books.recommendations)
+RECOMMENDATIONS_DIR = Path(
+    os.environ.get("RECOMMENDATIONS_DIR", BASE_DIR / "var" / "recommendations")
+)
+
+# Django REST framework: every list endpoint is cursor-paginated
+# (api.v1.pagination); JSON (orjson when installed) and MessagePack are picked
+# by the Accept header (api.v1.renderers), the browsable API only in DEBUG
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "api.v1.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": int(os.environ.get("API_PAGE_SIZE", "50")),
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.v1.renderers.JSONRenderer",
+        *(["api.v1.renderers.MessagePackRenderer"] if find_spec("msgpack") else []),
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.v1.parsers.JSONParser",
+        *(["api.v1.parsers.MessagePackParser"] if find_spec("msgpack") else []),
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+# Largest page a client may ask for with ?limit=
+API_MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", "500"))
+# Seconds an export's ?since= reaches back for rows that committed late
+API_EXPORT_OVERLAP = int(os.environ.get("API_EXPORT_OVERLAP", "300"))
+# Serve reads from values() rows instead of model instances (api.v1.rows)
+API_ROW_SERIALIZER = os.environ.get("API_ROW_SERIALIZER", "True").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -28,8 +28,9 @@ urlpatterns = [
     path("books/", include("books.urls")),
 ]
 
-# Serve static files during development
+# Serve static files and uploads during development
 if settings.DEBUG:
     urlpatterns += static(
         settings.STATIC_URL, document_root=settings.STATICFILES_DIRS[0]
     )
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
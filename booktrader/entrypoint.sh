@@ -3,5 +3,8 @@
 # Run database migrations
 python manage.py migrate
 
+# Table behind the database cache (used when REDIS_URL is not set)
+python manage.py createcachetable
+
 # Start the Django development server
 python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib import admin
+
+from .models import ImageAsset
+
+
+@admin.register(ImageAsset)
+class ImageAssetAdmin(admin.ModelAdmin):
+    list_display = ["source", "status", "width", "height", "attempts", "created_at"]
+    list_filter = ["status"]
+    search_fields = ["source"]
+    readonly_fields = [
+        "source",
+        "width",
+        "height",
+        "derivatives",
+        "attempts",
+        "error",
+        "created_at",
+        "claimed_at",
+        "processed_at",
+    ]
+    actions = ["requeue"]
+
+    @admin.action(description="Process selected images again")
+    def requeue(self, request, queryset):
+        updated = queryset.update(status=ImageAsset.PENDING, attempts=0, error="")
+        self.message_user(request, f"Requeued {updated} images.")
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management import BaseCommand
+from images.models import ImageAsset
+from images.pipeline import enqueue, image_models, process_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the WebP/JPEG derivatives of uploaded images. Runs as a worker "
+        "polling the queue unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the queue, then exit"
+        )
+        parser.add_argument(
+            "--enqueue-existing",
+            action="store_true",
+            help="First queue images uploaded before the pipeline existed",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="First give failed images another round of attempts",
+        )
+
+    def handle(self, *args, **options):
+        if options["enqueue_existing"]:
+            self._enqueue_existing()
+        if options["retry_failed"]:
+            retried = ImageAsset.objects.filter(status=ImageAsset.FAILED).update(
+                status=ImageAsset.PENDING, attempts=0
+            )
+            self.stdout.write(f"Requeued {retried} failed images")
+
+        while True:
+            processed, failed = process_queue(options["batch_size"])
+            if processed or failed:
+                self.stdout.write(f"Processed {processed} images, {failed} failed")
+            elif options["once"]:
+                return
+            else:
+                time.sleep(options["poll_interval"])
+
+    def _enqueue_existing(self, chunk_size=1000):
+        for model, fields in image_models():
+            for field in fields:
+                names = (
+                    model._default_manager.exclude(**{field.name: ""})
+                    .exclude(**{f"{field.name}__isnull": True})
+                    .values_list(field.name, flat=True)
+                    .distinct()
+                    .iterator(chunk_size=chunk_size)
+                )
+                chunk = []
+                for name in names:
+                    chunk.append(name)
+                    if len(chunk) == chunk_size:
+                        enqueue(chunk)
+                        chunk = []
+                enqueue(chunk)
+        queued = ImageAsset.objects.filter(status=ImageAsset.PENDING).count()
+        self.stdout.write(f"{queued} images queued")
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models
+
+
+class ImageAsset(models.Model):
+    """Derivatives of one stored image, and the work queue that builds them.
+
+    Rows are created ``pending`` when an image is saved and picked up by the
+    ``process_images`` worker; see ``images.pipeline``.
+    """
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
+
+    source = models.CharField(
+        max_length=255, unique=True, help_text="Storage name of the original"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    # [{"size": "thumb", "width": 160, "height": 240, "webp": ..., "jpeg": ...}]
+    derivatives = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # The worker's queue scan
+            models.Index(fields=["status", "created_at"], name="imageasset_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.status})"
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Resized WebP/JPEG derivatives of uploaded images, built off the request path.
+
+Saving a model with an image field only records an ``ImageAsset`` row (see
+``images.signals``); the ``process_images`` worker claims queued rows, decodes
+each original once and writes a thumbnail, medium and large rendition in both
+formats through the content-hash storage, so identical uploads and identical
+renditions are stored once.
+
+Templates and serializers read renditions through ``describe()``, which is
+served from the cache once an asset is ready and falls back to the original
+upload until then.
+"""
+
+import hashlib
+import io
+import posixpath
+from datetime import timedelta
+
+from books.versions import CATALOG, bump_version
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import ExifTags, Image, ImageOps
+
+from .models import ImageAsset
+from .storage import ContentHashStorage, image_storage
+
+# Rendition name -> target width in pixels. Images are never upscaled.
+SIZES = {"thumb": 160, "medium": 480, "large": 1024}
+
+FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+EXTENSIONS = {"webp": ".webp", "jpeg": ".jpg"}
+
+MAX_ATTEMPTS = 3
+# A claim older than this belongs to a worker that died; the asset is requeued
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+READY_TIMEOUT = 60 * 60 * 24
+# How long "not ready yet" is remembered, bounding lookups for pending images
+PENDING_TIMEOUT = 60
+
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def image_fields(model):
+    """``model``'s image fields stored through the content-hash storage"""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.ImageField)
+        and isinstance(field.storage, ContentHashStorage)
+    ]
+
+
+def image_models():
+    """``(model, image_fields)`` for every model with processed images"""
+    return [
+        (model, fields)
+        for model in apps.get_models()
+        if (fields := image_fields(model))
+    ]
+
+
+def enqueue(names):
+    """Queue the stored images ``names`` for processing (once per name)"""
+    names = {name for name in names if name}
+    if names:
+        ImageAsset.objects.bulk_create(
+            [ImageAsset(source=name) for name in sorted(names)],
+            ignore_conflicts=True,
+        )
+
+
+def claim(limit):
+    """Claim up to ``limit`` queued assets, oldest first, for this worker"""
+    now = timezone.now()
+    queued = Q(status=ImageAsset.PENDING) | Q(
+        status=ImageAsset.PROCESSING, claimed_at__lt=now - CLAIM_TIMEOUT
+    )
+    candidates = ImageAsset.objects.filter(queued).order_by("created_at", "pk")
+    claimed = [
+        pk
+        for pk in candidates.values_list("pk", flat=True)[:limit]
+        # Conditional update: only one of several workers wins each row
+        if ImageAsset.objects.filter(queued, pk=pk).update(
+            status=ImageAsset.PROCESSING,
+            claimed_at=now,
+            attempts=F("attempts") + 1,
+        )
+    ]
+    return list(ImageAsset.objects.filter(pk__in=claimed).order_by("created_at"))
+
+
+def _open(image):
+    """Size of ``image`` as displayed, preparing it to decode at reduced scale"""
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale, far cheaper than in full
+    largest = min(max(SIZES.values()), width, height)
+    image.draft("RGB", (largest, largest))
+    return width, height
+
+
+def _flatten(image):
+    """``(webp_image, jpeg_image)``: alpha is kept for WebP, dropped for JPEG"""
+    if image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    ):
+        rgba = image.convert("RGBA")
+        rgb = Image.new("RGB", rgba.size, "white")
+        rgb.paste(rgba, mask=rgba.getchannel("A"))
+        return rgba, rgb
+    rgb = image.convert("RGB")
+    return rgb, rgb
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, **FORMATS[fmt])
+    return ContentFile(buffer.getvalue())
+
+
+def build_derivatives(source, storage=None):
+    """``(width, height, derivatives)`` for the stored image ``source``"""
+    storage = storage or image_storage()
+    stem = posixpath.splitext(posixpath.basename(source))[0]
+    with storage.open(source) as content, Image.open(content) as image:
+        width, height = _open(image)
+        webp_image, jpeg_image = _flatten(ImageOps.exif_transpose(image))
+
+    derivatives = []
+    # Largest first, so each rendition is resized from the next larger one
+    for size, target in sorted(SIZES.items(), key=lambda item: -item[1]):
+        scale = min(target, width) / width
+        dimensions = (max(1, round(width * scale)), max(1, round(height * scale)))
+        if webp_image.size != dimensions:
+            shared = webp_image is jpeg_image
+            webp_image = webp_image.resize(dimensions, Image.Resampling.LANCZOS)
+            jpeg_image = (
+                webp_image
+                if shared
+                else jpeg_image.resize(dimensions, Image.Resampling.LANCZOS)
+            )
+        derivative = {"size": size, "width": dimensions[0], "height": dimensions[1]}
+        for fmt, image in (("webp", webp_image), ("jpeg", jpeg_image)):
+            derivative[fmt] = storage.save(
+                f"derivatives/{stem}-{dimensions[0]}{EXTENSIONS[fmt]}",
+                _encode(image, fmt),
+            )
+        derivatives.insert(0, derivative)
+    return width, height, derivatives
+
+
+def process(asset, storage=None):
+    """Build ``asset``'s derivatives and record the outcome; True on success"""
+    try:
+        width, height, derivatives = build_derivatives(asset.source, storage)
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        # Missing, truncated or hostile uploads must not wedge the queue
+        status = ImageAsset.PENDING
+        if asset.attempts >= MAX_ATTEMPTS:
+            status = ImageAsset.FAILED
+        ImageAsset.objects.filter(pk=asset.pk).update(
+            status=status, error=f"{type(exc).__name__}: {exc}", claimed_at=None
+        )
+        return False
+
+    ImageAsset.objects.filter(pk=asset.pk).update(
+        status=ImageAsset.READY,
+        width=width,
+        height=height,
+        derivatives=derivatives,
+        error="",
+        processed_at=timezone.now(),
+    )
+    cache.set(
+        _cache_key(asset.source),
+        {"width": width, "height": height, "derivatives": derivatives},
+        READY_TIMEOUT,
+    )
+    return True
+
+
+def touch_owners(sources):
+    """Bump ``updated_at`` on rows showing ``sources`` so validators change"""
+    now = timezone.now()
+    for model, fields in image_models():
+        if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+            owners = Q()
+            for field in fields:
+                owners |= Q(**{f"{field.name}__in": sources})
+            model._default_manager.filter(owners).update(updated_at=now)
+
+
+def process_queue(limit):
+    """Claim and process one batch; returns ``(processed, failed)``"""
+    ready = []
+    failed = 0
+    for asset in claim(limit):
+        if process(asset):
+            ready.append(asset.source)
+        else:
+            failed += 1
+    if ready:
+        # Cached pages and API validators still describe the originals
+        touch_owners(ready)
+        bump_version(CATALOG)
+    return len(ready), failed
+
+
+def _cache_key(name):
+    return "images:asset:" + hashlib.md5(name.encode("utf-8")).hexdigest()
+
+
+def get_renditions(names):
+    """``{name: {"width", "height", "derivatives"} or None}`` for ready assets"""
+    names = {name for name in names if name}
+    keys = {_cache_key(name): name for name in names}
+    cached = cache.get_many(keys)
+    found = {keys[key]: value or None for key, value in cached.items()}
+
+    missing = names.difference(found)
+    if missing:
+        ready = {
+            source: {"width": width, "height": height, "derivatives": derivatives}
+            for source, width, height, derivatives in ImageAsset.objects.filter(
+                source__in=missing, status=ImageAsset.READY
+            ).values_list("source", "width", "height", "derivatives")
+        }
+        cache.set_many({_cache_key(name): ready[name] for name in ready}, READY_TIMEOUT)
+        cache.set_many(
+            {_cache_key(name): {} for name in missing.difference(ready)},
+            PENDING_TIMEOUT,
+        )
+        found.update((name, ready.get(name)) for name in missing)
+    return found
+
+
+def describe(fieldfile, url=None, renditions=None):
+    """Everything needed to render ``fieldfile`` responsively, or None if empty.
+
+    ``url`` turns storage URLs into the URLs to emit (e.g. absolute ones).
+    ``renditions`` may hold a ``get_renditions()`` result fetched in bulk.
+    """
+    if not fieldfile:
+        return None
+    url = url or (lambda value: value)
+    name = fieldfile.name
+    if renditions is None or name not in renditions:
+        renditions = get_renditions([name])
+    rendition = renditions.get(name)
+
+    info = {"url": url(fieldfile.url), "ready": rendition is not None}
+    if rendition is None:
+        return info
+
+    storage = fieldfile.storage
+    info.update(width=rendition["width"], height=rendition["height"], sizes={})
+    srcset = {fmt: {} for fmt in FORMATS}
+    for derivative in rendition["derivatives"]:
+        size = {"width": derivative["width"], "height": derivative["height"]}
+        for fmt in FORMATS:
+            size[fmt] = url(storage.url(derivative[fmt]))
+            # Renditions clamped to a small original share a width; list it once
+            srcset[fmt].setdefault(derivative["width"], size[fmt])
+        info["sizes"][derivative["size"]] = size
+    info["srcset"] = {
+        fmt: ", ".join(f"{src} {width}w" for width, src in sorted(sources.items()))
+        for fmt, sources in srcset.items()
+    }
+    return info
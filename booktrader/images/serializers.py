@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from rest_framework import serializers
+
+from .pipeline import describe
+
+
+class ImageRenditionsField(serializers.Field):
+    """Read-only image: the original URL plus srcset-ready derivatives.
+
+    ``{"url", "ready"}``, and once the derivatives are built also
+    ``{"width", "height", "sizes": {name: {"width", "height", "webp",
+    "jpeg"}}, "srcset": {"webp", "jpeg"}}``; URLs are absolute when the
+    request is in the serializer context. ``None`` when there is no image.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        url = request.build_absolute_uri if request is not None else None
+        return describe(value, url=url)
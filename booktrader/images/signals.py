@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""Queue uploaded images for the derivative pipeline as their models are saved"""
+
+from django.db.models.signals import post_save
+
+from .pipeline import enqueue, image_fields, image_models
+
+
+def queue_images(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    enqueue(getattr(instance, field.attname).name for field in image_fields(sender))
+
+
+def connect_image_fields():
+    for model, _fields in image_models():
+        post_save.connect(
+            queue_images, sender=model, dispatch_uid=f"images:{model._meta.label}"
+        )
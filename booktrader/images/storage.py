@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Storage that names uploaded images after the SHA-256 of their content.
+
+``cover.jpg`` uploaded to ``book_covers/`` is stored as
+``book_covers/ab/ab12…ef.jpg``. Identical uploads map to the same name and are
+written once, and a name never changes meaning, so both the originals and
+their derivatives can be served with a far-future, immutable cache policy.
+"""
+
+import hashlib
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+
+
+def content_digest(content):
+    """Hex SHA-256 of a ``File``, leaving it rewound"""
+    sha = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        sha.update(chunk)
+    content.seek(0)
+    return sha.hexdigest()
+
+
+class ContentHashStorage(FileSystemStorage):
+    """``FileSystemStorage`` that stores each distinct file once"""
+
+    def hashed_name(self, name, digest):
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(name, content_digest(content))
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+def image_storage():
+    """The ``images`` storage (``STORAGES["images"]``), for ``ImageField``"""
+    return storages["images"]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""``{% picture %}``: responsive markup for images processed by ``images``"""
+
+from django import template
+from django.utils.html import format_html
+
+from ..pipeline import describe
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(image, alt="", size="medium", sizes=None, css_class="", renditions=None):
+    """``<picture>`` offering WebP and JPEG renditions of ``image`` via srcset.
+
+    ``size`` picks the rendition used for ``src`` and the intrinsic
+    dimensions; ``sizes`` defaults to that rendition's width. Until the
+    derivatives are ready this is a plain ``<img>`` of the original upload.
+    Templates rendered on the event loop must pass ``renditions`` (from
+    ``get_renditions()``), as looking them up may query the database.
+    """
+    info = describe(image, renditions=renditions)
+    if info is None:
+        return ""
+    if not info["ready"]:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async">',
+            info["url"],
+            alt,
+            css_class,
+        )
+
+    rendition = info["sizes"][size]
+    sizes = sizes or f"{rendition['width']}px"
+    return format_html(
+        "<picture>"
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"'
+        ' class="{}" loading="lazy" decoding="async">'
+        "</picture>",
+        info["srcset"]["webp"],
+        sizes,
+        rendition["jpeg"],
+        info["srcset"]["jpeg"],
+        sizes,
+        rendition["width"],
+        rendition["height"],
+        alt,
+        css_class,
+    )
@@ -0,0 +1,186 @@
+# encoding: utf-8
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+
+from books.models import Book, Publisher
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from images.models import ImageAsset
+from images.pipeline import MAX_ATTEMPTS, claim, describe, process_queue
+from images.storage import image_storage
+from PIL import Image
+from rest_framework.test import APITestCase
+
+
+def make_image(size=(600, 900), fmt="JPEG", mode="RGB", color="navy", exif=None):
+    buffer = io.BytesIO()
+    image = Image.new(mode, size, color)
+    if exif:
+        image.save(buffer, fmt, exif=exif)
+    else:
+        image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def upload(content, name="cover.jpg"):
+    return SimpleUploadedFile(name, content, content_type="image/jpeg")
+
+
+class MediaTestMixin:
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        self.publisher = Publisher.objects.create(name="Penguin")
+        self.isbn = 9780000000000
+
+    def book(self, cover=None):
+        self.isbn += 1
+        book = Book(title="Cover story", isbn=str(self.isbn), publisher=self.publisher)
+        if cover is not None:
+            book.cover_image = cover
+        book.save()
+        return book
+
+
+class TestUploads(MediaTestMixin, TestCase):
+    def test_identical_uploads_are_stored_once(self):
+        content = make_image()
+        first = self.book(upload(content, "front.jpg"))
+        second = self.book(upload(content, "same-front.JPG"))
+        assert first.cover_image.name == second.cover_image.name
+        directory, filename = first.cover_image.name.rsplit("/", 1)
+        assert directory.startswith("book_covers/")
+        assert filename.endswith(".jpg")
+        assert image_storage().listdir(directory)[1] == [filename]
+
+        assert ImageAsset.objects.get().source == first.cover_image.name
+
+    def test_books_without_covers_are_not_queued(self):
+        self.book()
+        assert not ImageAsset.objects.exists()
+
+
+class TestProcessing(MediaTestMixin, TestCase):
+    def test_builds_derivatives(self):
+        book = self.book(upload(make_image()))
+        stamp = book.updated_at
+        assert process_queue(10) == (1, 0)
+
+        asset = ImageAsset.objects.get()
+        assert asset.status == ImageAsset.READY
+        assert (asset.width, asset.height) == (600, 900)
+        # Never upscaled: the large rendition is the original's width
+        assert [(d["size"], d["width"], d["height"]) for d in asset.derivatives] == [
+            ("thumb", 160, 240),
+            ("medium", 480, 720),
+            ("large", 600, 900),
+        ]
+        storage = image_storage()
+        for derivative in asset.derivatives:
+            for fmt, extension in (("webp", ".webp"), ("jpeg", ".jpg")):
+                name = derivative[fmt]
+                assert name.startswith("derivatives/") and name.endswith(extension)
+                with storage.open(name) as content, Image.open(content) as image:
+                    assert image.format == fmt.upper()
+                    assert image.size == (derivative["width"], derivative["height"])
+
+        book.refresh_from_db()
+        assert book.updated_at > stamp
+        assert process_queue(10) == (0, 0)
+
+    def test_transparency_and_orientation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotated 90°: displayed as 200x300
+        self.book(upload(make_image((300, 200), exif=exif)))
+        self.book(
+            upload(make_image(mode="RGBA", fmt="PNG", color=(0, 0, 0, 0)), "a.png")
+        )
+        assert process_queue(10) == (2, 0)
+
+        rotated, transparent = ImageAsset.objects.order_by("created_at", "pk")
+        assert (rotated.width, rotated.height) == (200, 300)
+        assert rotated.derivatives[0]["height"] == 240
+        storage = image_storage()
+        thumb = transparent.derivatives[0]
+        with storage.open(thumb["webp"]) as content, Image.open(content) as image:
+            assert image.mode == "RGBA"
+        with storage.open(thumb["jpeg"]) as content, Image.open(content) as image:
+            assert image.mode == "RGB"
+            assert image.getpixel((0, 0)) == (255, 255, 255)
+
+    def test_broken_uploads_fail_after_retries(self):
+        self.book(upload(b"not an image"))
+        for _ in range(MAX_ATTEMPTS):
+            assert process_queue(10) == (0, 1)
+        asset = ImageAsset.objects.get()
+        assert asset.status == ImageAsset.FAILED
+        assert "UnidentifiedImageError" in asset.error
+        assert process_queue(10) == (0, 0)
+
+    def test_abandoned_claims_are_taken_over(self):
+        self.book(upload(make_image()))
+        assert len(claim(10)) == 1
+        assert claim(10) == []
+        ImageAsset.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        assert len(claim(10)) == 1
+
+
+class TestRendering(MediaTestMixin, TestCase):
+    template = Template(
+        '{% load images %}{% picture book.cover_image alt="Cover" size="thumb" %}'
+    )
+
+    def render(self, book):
+        return self.template.render(Context({"book": Book.objects.get(pk=book.pk)}))
+
+    def test_original_until_ready(self):
+        book = self.book(upload(make_image()))
+        html = self.render(book)
+        assert html.startswith(f'<img src="/media/{book.cover_image.name}"')
+        assert "srcset" not in html
+        assert self.render(self.book()) == ""
+
+    def test_srcset_once_ready(self):
+        book = self.book(upload(make_image()))
+        self.render(book)  # remembers "not ready yet"
+        process_queue(10)
+        html = self.render(book)
+        info = describe(book.cover_image)
+        assert html.startswith("<picture>")
+        assert f'srcset="{info["srcset"]["webp"]}"' in html
+        assert f'src="{info["sizes"]["thumb"]["jpeg"]}"' in html
+        assert 'width="160" height="240"' in html
+        assert info["srcset"]["jpeg"].count("w, ") == 2
+
+
+class TestSerializer(MediaTestMixin, APITestCase):
+    def test_book_cover(self):
+        book = self.book(upload(make_image((200, 300))))
+        url = reverse("book-detail", kwargs={"pk": book.pk})
+        cover = self.client.get(url).data["cover"]  # type: ignore
+        assert cover == {
+            "url": f"http://testserver/media/{book.cover_image.name}",
+            "ready": False,
+        }
+
+        process_queue(10)
+        cover = self.client.get(url).data["cover"]  # type: ignore
+        assert cover["ready"]
+        assert cover["sizes"]["large"]["width"] == 200
+        # A small original yields two distinct widths, listed once each
+        assert cover["srcset"]["webp"].count("http://testserver/media/") == 2
+
+        book = self.book()
+        url = reverse("book-detail", kwargs={"pk": book.pk})
+        assert self.client.get(url).data["cover"] is None  # type: ignore
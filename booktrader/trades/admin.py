@@ -6,20 +6,24 @@ from .models import Trade, TradeItem, TradeMessage, TradeOffer
 class TradeItemInline(admin.TabularInline):
     model = TradeItem
     extra = 0
+    autocomplete_fields = ["book", "owner"]
 
 
 class TradeMessageInline(admin.TabularInline):
     model = TradeMessage
     extra = 0
     readonly_fields = ["timestamp"]
+    autocomplete_fields = ["sender"]
 
 
 @admin.register(Trade)
 class TradeAdmin(admin.ModelAdmin):
     list_display = ["id", "initiator", "responder", "status", "proposed_at"]
+    list_select_related = ["initiator", "responder"]
     list_filter = ["status", "proposed_at"]
     search_fields = ["initiator__username", "responder__username", "title"]
     readonly_fields = ["proposed_at", "accepted_at", "completed_at"]
+    autocomplete_fields = ["initiator", "responder"]
     inlines = [TradeItemInline, TradeMessageInline]
 
     fieldsets = (
@@ -45,21 +49,28 @@ class TradeAdmin(admin.ModelAdmin):
 @admin.register(TradeItem)
 class TradeItemAdmin(admin.ModelAdmin):
     list_display = ["trade", "book", "owner", "condition", "estimated_value"]
-    list_filter = ["condition", "owner"]
+    list_select_related = ["trade__initiator", "trade__responder", "book", "owner"]
+    # An owner filter would list every user; search covers it
+    list_filter = ["condition"]
     search_fields = ["book__title", "owner__username"]
+    autocomplete_fields = ["trade", "book", "owner"]
 
 
 @admin.register(TradeMessage)
 class TradeMessageAdmin(admin.ModelAdmin):
     list_display = ["trade", "sender", "timestamp", "is_system_message"]
+    list_select_related = ["trade__initiator", "trade__responder", "sender"]
     list_filter = ["is_system_message", "timestamp"]
     search_fields = ["trade__id", "sender__username", "message"]
     readonly_fields = ["timestamp"]
+    autocomplete_fields = ["trade", "sender"]
 
 
 @admin.register(TradeOffer)
 class TradeOfferAdmin(admin.ModelAdmin):
     list_display = ["trade", "offered_by", "cash_difference", "created_at", "is_active"]
+    list_select_related = ["trade__initiator", "trade__responder", "offered_by"]
     list_filter = ["is_active", "created_at"]
     search_fields = ["trade__id", "offered_by__username"]
     readonly_fields = ["created_at"]
+    autocomplete_fields = ["trade", "offered_by"]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:10
+
+import images.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trades", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tradeitem",
+            name="image1",
+            field=models.ImageField(
+                blank=True,
+                storage=images.storage.image_storage,
+                upload_to="trade_images/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tradeitem",
+            name="image2",
+            field=models.ImageField(
+                blank=True,
+                storage=images.storage.image_storage,
+                upload_to="trade_images/",
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils import timezone
+from images.storage import image_storage
 
 
 class Trade(models.Model):
@@ -117,8 +118,12 @@ class TradeItem(models.Model):
     )
 
     # Images
-    image1 = models.ImageField(upload_to="trade_images/", blank=True)
-    image2 = models.ImageField(upload_to="trade_images/", blank=True)
+    image1 = models.ImageField(
+        upload_to="trade_images/", storage=image_storage, blank=True
+    )
+    image2 = models.ImageField(
+        upload_to="trade_images/", storage=image_storage, blank=True
+    )
 
     class Meta:
         unique_together = ["trade", "book", "owner"]
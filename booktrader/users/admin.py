@@ -23,14 +23,18 @@ admin.site.register(User, UserAdmin)
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ["user", "reputation_score", "is_verified", "created_at"]
+    list_select_related = ["user"]
     list_filter = ["is_verified", "willing_to_ship_internationally", "country"]
     search_fields = ["user__username", "user__email", "city", "state"]
     readonly_fields = ["created_at", "updated_at"]
+    autocomplete_fields = ["user"]
 
 
 @admin.register(UserReputation)
 class UserReputationAdmin(admin.ModelAdmin):
     list_display = ["user", "reputation_type", "points", "created_at"]
+    list_select_related = ["user"]
     list_filter = ["reputation_type", "created_at"]
     search_fields = ["user__username", "description"]
     readonly_fields = ["created_at"]
+    autocomplete_fields = ["user", "related_auction", "related_trade"]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:10
+
+import images.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userprofile",
+            name="avatar",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=images.storage.image_storage,
+                upload_to="avatars/",
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from images.storage import image_storage
 
 
 class UserProfile(models.Model):
@@ -23,7 +24,9 @@ class UserProfile(models.Model):
     bio = models.TextField(
         blank=True, help_text="Tell others about your reading interests"
     )
-    avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
+    avatar = models.ImageField(
+        upload_to="avatars/", storage=image_storage, blank=True, null=True
+    )
     date_of_birth = models.DateField(blank=True, null=True)
 
     # Trading Preferences